@@ -6,23 +6,29 @@ from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, field
 import uuid
 import os
+from llm_client import get_llm_client
+from llm_cache import get_response_cache
+from llm_profiles import CHARS_PER_TOKEN, cache_options, get_generation_budget
+from clock import clock_of
+from metrics import metrics_of
+from conference import ConferenceRoom
+from keywords import DECISIONS
+from officelog import get_logger
+from lazyimport import lazy_module
 
-# Optional OpenAI integration
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    print("OpenAI is not installed. Use: pip install openai")
+log = get_logger("agents")
 
-# Optional Ollama integration
-try:
-    import requests
-    OLLAMA_AVAILABLE = True
-    print("Ollama is available. Can use local Qwen3 model.")
-except ImportError:
-    OLLAMA_AVAILABLE = False
-    print("Requests is not installed. Use: pip install requests")
+# Optional OpenAI and Ollama (requests) integrations - imported on first use, not at startup.
+# Without them agents fall back to generate_simple_response.
+openai = lazy_module("openai")
+OPENAI_AVAILABLE = openai is not None
+requests = lazy_module("requests")
+OLLAMA_AVAILABLE = requests is not None
+
+# Roles whose (long) answers are streamed token by token to the GUI
+STREAMING_ROLES = {"Integrator (Coordinator)"}
+STREAM_FLUSH_CHARS = 200  # Forward partial text once this many characters are buffered...
+STREAM_FLUSH_INTERVAL = 0.5  # ...or this many seconds have passed since the last batch
 
 # --- Kandinsky 2.2 integration (kandinsky2 lib) ---
 # from kandinsky2 import get_kandinsky2
@@ -70,20 +76,15 @@ class AgentBase:
 
     def decide(self, task_desc: str) -> str:
         # Simple decision model (rules)
-        if self.agent_type == AgentType.CODER:
-            desc = task_desc.lower()
-            coding_keywords = ["code", "kod", "program", "website", "web", "html", "css", "javascript", "app", "application", "site", "strona"]
-            if any(word in desc for word in coding_keywords):
-                return "coding"
-        if self.agent_type == AgentType.ANALYST:
-            if "analyze" in task_desc.lower() or "data" in task_desc.lower() or "analiz" in task_desc.lower():
-                return "analyzing"
-        if self.agent_type == AgentType.IMAGE_GEN:
-            if "image" in task_desc.lower() or "picture" in task_desc.lower() or "obraz" in task_desc.lower():
-                return "generating image"
-        if self.agent_type == AgentType.TEXT_ANALYST:
-            if "text" in task_desc.lower() or "tekst" in task_desc.lower() or "content" in task_desc.lower():
-                return "analyzing text"
+        found = DECISIONS.classify(task_desc)
+        if self.agent_type == AgentType.CODER and "coding" in found:
+            return "coding"
+        if self.agent_type == AgentType.ANALYST and "analyzing" in found:
+            return "analyzing"
+        if self.agent_type == AgentType.IMAGE_GEN and "generating image" in found:
+            return "generating image"
+        if self.agent_type == AgentType.TEXT_ANALYST and "analyzing text" in found:
+            return "analyzing text"
         return "thinking"
 
     async def send_message(self, recipient, content, task_id=None, office=None):
@@ -111,8 +112,23 @@ class AgentBase:
         else:
             return self.generate_simple_response(task_description)
 
-    async def generate_ollama_response(self, task_description: str) -> str:
-        """Generates response using local Qwen3 0.6B model through Ollama API"""
+    async def generate_ollama_response(self, task_description: str, stream: Optional[bool] = None,
+                                       generations: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Generates response using local Qwen3 0.6B model through Ollama API.
+
+        With `generations`, the profile used and the observed answer length are appended to it.
+        """
+        if stream is None:
+            stream = self.role in STREAMING_ROLES
+        office = getattr(self, 'office', None)
+        with metrics_of(office).span("llm.call", role=self.role, agent=self.name, stream=stream) as span:
+            return await self._generate_ollama_response(task_description, stream, span, generations)
+
+    async def _generate_ollama_response(self, task_description: str, stream: bool, span,
+                                        generations: Optional[List[Dict[str, Any]]] = None) -> str:
+        record = {}
+        if generations is not None:
+            generations.append(record)
         try:
             # Log to GUI instead of terminal
             if hasattr(self, 'office') and self.office and self.office.gui:
@@ -122,66 +138,154 @@ class AgentBase:
             
             # Prepare prompt for specific agent type
             prompt = self._create_qwen_prompt(task_description)
+            # Token budget, timeout, stop sequences and context size per role (see llm_profiles.py)
+            budget = get_generation_budget()
+            profile = budget.profile(self.role, prompt)
+            record["profile"] = profile.to_dict()
+            span.labels["num_predict"] = profile.num_predict
+            payload = {
+                "model": "qwen3:0.6b",
+                "prompt": prompt,
+                "stream": stream,
+                "options": {
+                    **profile.options(),
+                    "top_k": 10,  # Limit token selection
+                    "top_p": 0.8,  # Nucleus sampling
+                    "repeat_penalty": 1.1  # Prevent repetitions
+                }
+            }
             
-            # Call Ollama API with accelerated parameters
-            response = requests.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "qwen3:0.6b",
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.3,  # Lower temperature = faster responses
-                        "num_predict": 200,  # Shorter responses
-                        "top_k": 10,  # Limit token selection
-                        "top_p": 0.8,  # Nucleus sampling
-                        "repeat_penalty": 1.1  # Prevent repetitions
-                    }
-                },
-                timeout=60  # Shorter timeout
-            )
-            
-            if response.status_code == 200:
+            cache = get_response_cache()
+            # Sampling options only: the adaptive budget must not change the key
+            cache_key = cache.make_key(payload["model"], prompt, cache_options(payload["options"])) if cache else None
+            cached = await cache.aget(cache_key) if cache else None
+            if cached is not None:
+                ai_response = cached
+                span.labels["outcome"] = "cached"
+                self.last_generation_timing = {"time_to_first_token": 0.0, "total_latency": 0.0, "streamed": False, "cached": True}
+                if hasattr(self, 'office') and self.office and self.office.gui:
+                    self.office.gui.update_communication_log(f"[{self.name}] 🤖 Reusing cached Qwen3 response (identical prompt)")
+            elif stream:
+                ai_response = (await self._stream_ollama_response(payload, timeout=profile.timeout)).strip()
+            else:
+                # Call Ollama API (shared pooled client, off the event loop)
+                started = time.perf_counter()
+                response = await get_llm_client().generate(payload, timeout=profile.timeout)
+                if response.status_code != 200:
+                    error_msg = f"❌ Ollama API error for {self.name}: {response.status_code}"
+                    span.labels["outcome"] = "http_error"
+                    record["outcome"] = "http_error"
+                    if hasattr(self, 'office') and self.office and self.office.gui:
+                        self.office.gui.update_task_status(error_msg)
+                    return self.generate_simple_response(task_description)
                 result = response.json()
                 ai_response = result.get('response', '').strip()
+                total = time.perf_counter() - started
+                self.last_generation_timing = {"time_to_first_token": total, "total_latency": total, "streamed": False,
+                                               "eval_count": result.get('eval_count'),
+                                               "done_reason": result.get('done_reason')}
+            if cached is None:
+                self._observe_generation(budget, profile, ai_response, record)
+            
+            # Answers cut off by the budget are not cached; a later, larger budget gets the full answer
+            if cache and cached is None and ai_response and not record.get("truncated"):
+                await cache.aput(cache_key, ai_response)
+            
+            # Log thinking process to GUI
+            if hasattr(self, 'office') and self.office and self.office.gui:
+                # Extract thinking process if present
+                if '<think>' in ai_response:
+                    think_start = ai_response.find('<think>')
+                    think_end = ai_response.find('</think>')
+                    if think_start != -1 and think_end != -1:
+                        thinking = ai_response[think_start+7:think_end].strip()
+                        self.office.gui.update_communication_log(f"[{self.name}] 💭 <think> {thinking[:200]}...")
+                        log.debug("[%s] 💭 <think> %.200s", self.name, thinking)
                 
-                # Log thinking process to GUI
-                if hasattr(self, 'office') and self.office and self.office.gui:
-                    # Extract thinking process if present
-                    if '<think>' in ai_response:
-                        think_start = ai_response.find('<think>')
-                        think_end = ai_response.find('</think>')
-                        if think_start != -1 and think_end != -1:
-                            thinking = ai_response[think_start+7:think_end].strip()
-                            self.office.gui.update_communication_log(f"[{self.name}] 💭 <think> {thinking[:200]}...")
-                            print(f"TERMINAL: [{self.name}] 💭 <think> {thinking[:200]}...")
-                    
-                    self.office.gui.update_task_status(f"✅ {self.name} received response from Qwen3")
-                    self.office.gui.update_communication_log(f"[{self.name}] ✅ Received response from Qwen3 model")
-                
-                return f"{self.name}: {ai_response}"
-            else:
-                error_msg = f"❌ Ollama API error for {self.name}: {response.status_code}"
-                if hasattr(self, 'office') and self.office and self.office.gui:
-                    self.office.gui.update_task_status(error_msg)
-                return self.generate_simple_response(task_description)
+                self.office.gui.update_task_status(f"✅ {self.name} received response from Qwen3")
+                self.office.gui.update_communication_log(f"[{self.name}] ✅ Received response from Qwen3 model")
+            
+            span.labels.setdefault("outcome", "ok")
+            record.setdefault("outcome", span.labels["outcome"])
+            return f"{self.name}: {ai_response}"
             
         except requests.exceptions.Timeout:
             error_msg = f"⏰ Timeout for {self.name} - model needs more time"
+            span.labels["outcome"] = "timeout"
+            record["outcome"] = "timeout"
             if hasattr(self, 'office') and self.office and self.office.gui:
                 self.office.gui.update_task_status(error_msg)
             return self.generate_simple_response(task_description)
         except requests.exceptions.ConnectionError:
             error_msg = f"🔌 Connection error with Ollama for {self.name}"
+            span.labels["outcome"] = "connection_error"
+            record["outcome"] = "connection_error"
             if hasattr(self, 'office') and self.office and self.office.gui:
                 self.office.gui.update_task_status(error_msg)
             return self.generate_simple_response(task_description)
         except Exception as e:
             error_msg = f"❌ Qwen3 error for {self.name}: {e}"
+            span.labels["outcome"] = "error"
+            record["outcome"] = "error"
             if hasattr(self, 'office') and self.office and self.office.gui:
                 self.office.gui.update_task_status(error_msg)
             return self.generate_simple_response(task_description)
 
+    def _observe_generation(self, budget, profile, text: str, record: Dict[str, Any]):
+        """Feed the answer's length (and whether the budget cut it off) back into the role's profile"""
+        timing = getattr(self, 'last_generation_timing', None) or {}
+        tokens = timing.get("eval_count") or len(text) // CHARS_PER_TOKEN
+        done_reason = timing.get("done_reason")
+        truncated = done_reason == "length" if done_reason else tokens >= profile.num_predict
+        # Without streaming there is no first-token time; the whole call counts as generation
+        first_token = timing.get("time_to_first_token", 0.0) if timing.get("streamed") else 0.0
+        budget.observe(self.role, profile, tokens, timing.get("total_latency", 0.0), first_token, truncated)
+        record.update(tokens=tokens, truncated=truncated, seconds=round(timing.get("total_latency", 0.0), 3))
+
+    async def _stream_ollama_response(self, payload: Dict[str, Any], timeout: float = 60) -> str:
+        """Consumes a streamed generation, forwarding partial text to the GUI in batches"""
+        gui = self.office.gui if hasattr(self, 'office') and self.office else None
+        started = time.perf_counter()
+        first_token_at = None
+        parts = []
+        pending = []
+        pending_chars = 0
+        last_flush = started
+        final = {}
+        async for chunk in get_llm_client().stream(payload, timeout=timeout):
+            text = chunk.get('response', '')
+            if text:
+                now = time.perf_counter()
+                if first_token_at is None:
+                    first_token_at = now
+                    if gui:
+                        gui.update_communication_log(f"[{self.name}] 🤖 First tokens after {first_token_at - started:.2f}s")
+                parts.append(text)
+                pending.append(text)
+                pending_chars += len(text)
+                # Batch partial text so the GUI gets a few updates per second, not one per token
+                if pending_chars >= STREAM_FLUSH_CHARS or now - last_flush >= STREAM_FLUSH_INTERVAL:
+                    self._forward_stream_batch(gui, "".join(pending))
+                    pending, pending_chars, last_flush = [], 0, now
+            if chunk.get('done'):
+                final = chunk
+                break
+        if pending:
+            self._forward_stream_batch(gui, "".join(pending))
+        total = time.perf_counter() - started
+        ttft = (first_token_at - started) if first_token_at is not None else total
+        self.last_generation_timing = {"time_to_first_token": ttft, "total_latency": total, "streamed": True,
+                                       "eval_count": final.get('eval_count'), "done_reason": final.get('done_reason')}
+        if gui:
+            gui.update_task_status(f"⏱️ {self.name}: first token {ttft:.2f}s, total {total:.2f}s")
+        return "".join(parts)
+
+    def _forward_stream_batch(self, gui, text: str):
+        if not gui or not text:
+            return
+        gui.update_communication_log(f"[{self.name}] 🤖 ...{text}")
+        gui.update_conference_room(f"<stream {self.name}> {text}")
+
     def _create_qwen_prompt(self, task_description: str) -> str:
         base_prompt = f"You are {self.name}, {self.role}. Your skills: {', '.join(self.skills)}.\n"
         base_prompt += f"Task: {task_description}\n"
@@ -807,21 +911,22 @@ Created by {self.name} - Text Analyst"""
     async def process_task(self, task, office=None):
         self.office = office
         action = self.decide(task.description)
+        generations = []  # Profiles and answer lengths of this task's Qwen3 calls
         if office and office.gui:
             office.gui.update_communication_log(f"[{self.name}] 🚀 Starting work on task: {task.title}")
             office.gui.update_communication_log(f"[{self.name}] 💭 Thinking about: {task.description[:100]}...")
             office.gui.update_task_status(f"🔄 {self.name} working on task: {task.title}")
         if office:
             await self._communicate_with_team(task, office)
-        await asyncio.sleep(2.0)  # Wydłużony czas symulacji pracy agenta
+        await clock_of(office).sleep(2.0)  # Wydłużony czas symulacji pracy agenta
         
         # AI Graphic Designer: Qwen3 + Kandinsky 2.2 (kandinsky2 lib)
         if self.role == "AI Graphic Designer":
             if office and office.gui:
                 office.gui.update_communication_log(f"[{self.name}] 💭 Thinking about graphic design for: {task.description[:100]}...")
-            print(f"TERMINAL: [{self.name}] 💭 Thinking about graphic design for: {task.description[:100]}...")
+            log.debug("[%s] 💭 Thinking about graphic design for: %.100s", self.name, task.description)
             qwen_prompt = self._create_qwen_prompt(task.description)
-            qwen_response = await self.generate_ollama_response(qwen_prompt)
+            qwen_response = await self.generate_ollama_response(qwen_prompt, generations=generations)
             prompts = []
             for line in qwen_response.splitlines():
                 if "|" in line and not line.strip().startswith("|"):
@@ -930,8 +1035,8 @@ Created by {self.name} - Text Analyst"""
             if office and office.gui:
                 office.gui.update_communication_log(f"[{self.name}] 💭 Thinking about integrating all agent outputs...")
                 office.gui.update_communication_log(f"[{self.name}] 💭 Analyzing project requirements and agent results...")
-            print(f"TERMINAL: [{self.name}] 💭 Thinking about integrating all agent outputs...")
-            print(f"TERMINAL: [{self.name}] 💭 Analyzing project requirements and agent results...")
+            log.debug("[%s] 💭 Thinking about integrating all agent outputs...", self.name)
+            log.debug("[%s] 💭 Analyzing project requirements and agent results...", self.name)
             
             summary = (
                 "=== INTEGRATOR MASTER REPORT ===\n"
@@ -1068,7 +1173,7 @@ Created by {self.name} - Text Analyst"""
             )
             # Wywołaj Qwen3 (Ollama)
             if OLLAMA_AVAILABLE:
-                qwen_code = await self.generate_ollama_response(prompt)
+                qwen_code = await self.generate_ollama_response(prompt, generations=generations)
             else:
                 qwen_code = self.generate_simple_response(prompt)
             result = summary + "\n\n=== QWEN3 FINAL CODE ===\n" + qwen_code
@@ -1113,8 +1218,8 @@ Created by {self.name} - Text Analyst"""
             if office and office.gui:
                 office.gui.update_communication_log(f"[{self.name}] 💭 Thinking about project planning and task coordination...")
                 office.gui.update_communication_log(f"[{self.name}] 💭 Planning timeline, resource allocation, and risk management...")
-            print(f"TERMINAL: [{self.name}] 💭 Thinking about project planning and task coordination...")
-            print(f"TERMINAL: [{self.name}] 💭 Planning timeline, resource allocation, and risk management...")
+            log.debug("[%s] 💭 Thinking about project planning and task coordination...", self.name)
+            log.debug("[%s] 💭 Planning timeline, resource allocation, and risk management...", self.name)
             import datetime
             today = datetime.date.today()
             schedule = f"=== PROJECT SCHEDULE ===\n"
@@ -1137,16 +1242,16 @@ Created by {self.name} - Text Analyst"""
             if office and office.gui:
                 office.gui.update_communication_log(f"[{self.name}] 💭 Thinking about website structure and code architecture...")
                 office.gui.update_communication_log(f"[{self.name}] 💭 Planning HTML structure, CSS styling, and JavaScript functionality...")
-            print(f"TERMINAL: [{self.name}] 💭 Thinking about website structure and code architecture...")
-            print(f"TERMINAL: [{self.name}] 💭 Planning HTML structure, CSS styling, and JavaScript functionality...")
+            log.debug("[%s] 💭 Thinking about website structure and code architecture...", self.name)
+            log.debug("[%s] 💭 Planning HTML structure, CSS styling, and JavaScript functionality...", self.name)
             result = self.generate_simple_response(task.description)
         # UI/UX Designer (rozbudowany)
         elif self.role == "UX/UI Designer":
             if office and office.gui:
                 office.gui.update_communication_log(f"[{self.name}] 💭 Thinking about user experience and interface design...")
                 office.gui.update_communication_log(f"[{self.name}] 💭 Planning color schemes, typography, and user flow...")
-            print(f"TERMINAL: [{self.name}] 💭 Thinking about user experience and interface design...")
-            print(f"TERMINAL: [{self.name}] 💭 Planning color schemes, typography, and user flow...")
+            log.debug("[%s] 💭 Thinking about user experience and interface design...", self.name)
+            log.debug("[%s] 💭 Planning color schemes, typography, and user flow...", self.name)
             result = (
                 "=== UX/UI DESIGN DELIVERABLES ===\n"
                 "- Design system: Figma, Tailwind export\n"
@@ -1160,8 +1265,8 @@ Created by {self.name} - Text Analyst"""
             if office and office.gui:
                 office.gui.update_communication_log(f"[{self.name}] 💭 Thinking about content strategy and SEO optimization...")
                 office.gui.update_communication_log(f"[{self.name}] 💭 Planning engaging headlines and compelling copy...")
-            print(f"TERMINAL: [{self.name}] 💭 Thinking about content strategy and SEO optimization...")
-            print(f"TERMINAL: [{self.name}] 💭 Planning engaging headlines and compelling copy...")
+            log.debug("[%s] 💭 Thinking about content strategy and SEO optimization...", self.name)
+            log.debug("[%s] 💭 Planning engaging headlines and compelling copy...", self.name)
             result = (
                 "=== COPYWRITING & SEO REPORT ===\n"
                 "- SEO texts: Homepage, product, blog\n"
@@ -1234,47 +1339,30 @@ Created by {self.name} - Text Analyst"""
 
         if 'result' not in locals():
             result = f"{self.name}: Task has been processed and completed successfully."
-        task.results[self.id] = result
+        blobs = getattr(office, "blobs", None)
+        task.results[self.id] = blobs.intern(result) if blobs is not None else result
+        if generations:
+            task.result_metadata[self.id] = {"generation": generations}
         from tasks import TaskStatus
         task.status = TaskStatus.COMPLETED
-        task.completed_at = time.time()
-        task.updated_at = time.time()
+        task.completed_at = clock_of(office).time()
+        task.updated_at = task.completed_at
+        notify = getattr(office, "notify_task_changed", None)
+        if notify:
+            notify(task)
         if office and office.gui:
             office.gui.update_task_status(f"✅ {self.name} completed task {task.id} ({action})")
             office.gui.update_communication_log(f"[{self.name}] ✅ Completed task: {task.title}")
         return task
 
     async def _communicate_with_team(self, task, office):
-        """Communicate with other agents about the task"""
-        if not office or not office.gui:
+        """Communicate with the agents this one works with about the task"""
+        if not office:
             return
-            
-        # Find other agents to communicate with
-        other_agents = [agent for agent in office.agents.values() if agent.id != self.id]
         
-        for other_agent in other_agents:
-            # Send message to other agent
-            message_content = self._create_team_message(task, other_agent)
-            if message_content:
-                # Log conference room communication
-                conference_msg = f"<talk {self.name} to {other_agent.name}> {message_content}"
-                if office.gui:
-                    office.gui.update_conference_room(conference_msg)
-                    print(f"DEBUG: wysłano do Conference Room: {conference_msg}")
-                
-                await self.send_message(other_agent, message_content, task.id, office)
-                
-                # Simulate response from other agent
-                await asyncio.sleep(0.5)
-                response = other_agent._create_response_message(task, self)
-                if response:
-                    # Log conference room response
-                    conference_response = f"<talk {other_agent.name} to {self.name}> {response}"
-                    if office.gui:
-                        office.gui.update_conference_room(conference_response)
-                        print(f"DEBUG: wysłano do Conference Room: {conference_response}")
-                    
-                    await other_agent.send_message(self, response, task.id, office)
+        # One concurrent round in a room scoped to this task and this agent's collaborators
+        # (also headless; without a GUI the room only skips its log lines)
+        await ConferenceRoom.for_task(self, task, office).discuss(task)
 
     def _create_team_message(self, task, other_agent):
         """Create appropriate message for team communication"""
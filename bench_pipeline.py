@@ -0,0 +1,170 @@
+"""End-to-end benchmark: website projects through submit_task against fake_ollama.py.
+
+    python bench_pipeline.py                                  # 20 projects, 4 at a time
+    python bench_pipeline.py --projects 100 --latency 0.3 --tokens-per-second 40 --error-rate 0.05
+    python bench_pipeline.py --save baseline.json             # record a baseline
+    python bench_pipeline.py --compare baseline.json          # exit 1 on a regression
+
+Starts the fake server in-process, points the shared LLM client at it and turns
+the response cache off, so every call pays the configured latency. Simulated
+work uses the virtual clock by default, so the numbers show the real cost of the
+pipeline and the LLM calls rather than the simulated delays. Reports projects per
+minute, p50/p99 latency of projects, of each stage and of LLM calls, and peak
+memory.
+"""
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+
+try:
+    import resource  # Not on Windows
+except ImportError:
+    resource = None
+
+# metric -> True when higher is better
+COMPARED = {
+    "projects_per_min": True,
+    "project_p50": False,
+    "project_p99": False,
+    "stage_p50": False,
+    "stage_p99": False,
+    "llm_p50": False,
+    "llm_p99": False,
+    "max_rss_mb": False,
+}
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB on Linux
+
+
+def run_benchmark(args):
+    from clock import make_clock
+    from fake_ollama import FakeOllama
+    from headless import run_briefs
+    from llm_cache import configure_response_cache
+    from llm_client import configure_llm_client
+    from llm_profiles import get_generation_budget
+    from main import build_default_office
+    from tasks import TaskPriority
+
+    briefs = [{"index": i, "title": f"Project {i}", "priority": TaskPriority.MEDIUM,
+               "description": f"Website for client {i}: home page, menu, gallery and contact form"}
+              for i in range(args.projects)]
+    configure_response_cache(enabled=False)
+    with FakeOllama(latency=args.latency, jitter=args.jitter, tokens_per_second=args.tokens_per_second,
+                    error_rate=args.error_rate, max_tokens=args.answer_tokens, seed=args.seed) as server:
+        configure_llm_client(base_url=server.url, max_concurrency=args.llm_concurrency)
+        office = build_default_office(make_clock(args.clock))
+        started = time.perf_counter()
+        records = asyncio.run(run_briefs(office, briefs, args.concurrency, io.StringIO()))
+        wall = time.perf_counter() - started
+        server_stats = server.stats()
+    durations, stages = {}, {}
+    for name, start, end, labels, _thread in office.metrics.spans:
+        durations.setdefault(name, []).append(end - start)
+        if name == "stage":
+            stages.setdefault(labels.get("stage", "?"), []).append(end - start)
+    projects = [record["elapsed"] for record in records]
+    return {
+        "projects": len(records),
+        "failed": sum(1 for record in records if not record["ok"]),
+        "concurrency": args.concurrency,
+        "wall_s": wall,
+        "projects_per_min": len(records) / wall * 60 if wall else 0.0,
+        "project_p50": percentile(projects, 0.5),
+        "project_p99": percentile(projects, 0.99),
+        "stage_p50": percentile(durations.get("stage", []), 0.5),
+        "stage_p99": percentile(durations.get("stage", []), 0.99),
+        # Stages differ a lot (the Integrator writes a whole page), so pooled percentiles hide which one got slower
+        "stages": {stage: {"count": len(values), "p50": percentile(values, 0.5), "p99": percentile(values, 0.99)}
+                   for stage, values in stages.items()},
+        "llm_p50": percentile(durations.get("llm.call", []), 0.5),
+        "llm_p99": percentile(durations.get("llm.call", []), 0.99),
+        "llm_calls": len(durations.get("llm.call", [])),
+        "max_rss_mb": max_rss_mb(),
+        "server": dict(server_stats, latency=args.latency, tokens_per_second=args.tokens_per_second,
+                       error_rate=args.error_rate, answer_tokens=args.answer_tokens),
+        "generation": get_generation_budget().stats(),
+    }
+
+
+def compare(result, baseline, tolerance: float):
+    """Print current vs baseline; returns the metrics that got worse by more than `tolerance`."""
+    regressions = []
+    print(f"\n{'metric':<18} {'baseline':>10} {'current':>10} {'change':>8}")
+    rows = [(metric, baseline.get(metric), result.get(metric), higher_is_better)
+            for metric, higher_is_better in COMPARED.items()]
+    for stage, old_stats in baseline.get("stages", {}).items():
+        new_stats = result.get("stages", {}).get(stage, {})
+        rows += [(f"{stage} {q}", old_stats.get(q), new_stats.get(q), False) for q in ("p50", "p99")]
+    for metric, old, new, higher_is_better in rows:
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        if flag:
+            regressions.append(metric)
+        print(f"{metric:<18} {old:>10.3f} {new:>10.3f} {change * 100:>7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="projects running at the same time")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="parallel requests of the LLM client")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake server: seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--answer-tokens", type=int, default=200, help="fake server: length of every answer")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--clock", choices=["real", "accelerated", "virtual"], default="virtual")
+    parser.add_argument("--save", help="write the result as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown (default 10%%)")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print(f"Projects: {result['projects']} ({result['failed']} failed), {args.concurrency} at a time, "
+          f"{result['wall_s']:.2f}s -> {result['projects_per_min']:.1f} projects/min")
+    print(f"Project latency p50 {result['project_p50']:.3f}s  p99 {result['project_p99']:.3f}s")
+    print(f"Stage latency   p50 {result['stage_p50']:.3f}s  p99 {result['stage_p99']:.3f}s")
+    for stage, stats in result["stages"].items():
+        print(f"  {stage:<13} p50 {stats['p50']:.3f}s  p99 {stats['p99']:.3f}s  ({stats['count']} runs)")
+    print(f"LLM call        p50 {result['llm_p50']:.3f}s  p99 {result['llm_p99']:.3f}s  ({result['llm_calls']} calls)")
+    if result["max_rss_mb"] is not None:
+        print(f"Peak memory (RSS): {result['max_rss_mb']:.1f} MB")
+    print(f"Fake server: {result['server']}")
+    for role, stats in result["generation"].items():
+        print(f"Budget {role}: {stats['samples']} answers, avg {stats['avg_tokens']} tokens, {stats['truncated']} truncated")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
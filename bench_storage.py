@@ -0,0 +1,71 @@
+"""Compare the JSON and binary state formats: file size, save time and load time.
+
+    python bench_storage.py                      # 10k, 100k and 1M tasks
+    python bench_storage.py --sizes 1000,10000 --result-size 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from tasks import Task, TaskStatus, TaskPriority
+
+
+def make_tasks(count: int, result_size: int, seed: int = 1):
+    rng = random.Random(seed)
+    agent_ids = ["web_dev1", "ux_ui1", "copywriter1", "marketing1", "data_analyst1", "integrator1"]
+    body = ("<section><h2>Lorem ipsum</h2><p>dolor sit amet</p></section>\n" * (result_size // 60 + 1))[:result_size]
+    tasks = []
+    for i in range(count):
+        status = rng.choice(list(TaskStatus))
+        tasks.append(Task(
+            title=f"Website Skeleton: project {i}",
+            description=f"Create a website for client {i} with menu, gallery and contact form",
+            creator_id="user",
+            assignee_id=rng.choice(agent_ids),
+            status=status,
+            priority=rng.choice(list(TaskPriority)),
+            dependencies={f"dep-{i - 1}"} if i else set(),
+            created_at=1_700_000_000.0 + i,
+            updated_at=1_700_000_000.0 + i,
+            completed_at=1_700_000_100.0 + i if status == TaskStatus.COMPLETED else None,
+            results={rng.choice(agent_ids): body} if status == TaskStatus.COMPLETED else {},
+        ))
+    return tasks
+
+
+def bench(count: int, result_size: int, directory: str):
+    from main import OfficeSimulation
+    office = OfficeSimulation()
+    office.tasks = {task.id: task for task in make_tasks(count, result_size)}
+    rows = []
+    for fmt, extension in (("json", ".json"), ("binary", ".aio")):
+        filename = os.path.join(directory, f"state-{count}{extension}")
+        start = time.perf_counter()
+        office.save_all(filename, format=fmt)
+        save_time = time.perf_counter() - start
+        loaded = OfficeSimulation()
+        start = time.perf_counter()
+        loaded.load_all(filename)
+        load_time = time.perf_counter() - start
+        assert len(loaded.tasks) == count
+        rows.append((fmt, os.path.getsize(filename), save_time, load_time))
+        os.remove(filename)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="task counts, comma separated")
+    parser.add_argument("--result-size", type=int, default=500, help="characters per completed task result")
+    args = parser.parse_args()
+    print(f"{'tasks':>9} {'format':>7} {'size MB':>9} {'save s':>8} {'load s':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (int(size) for size in args.sizes.split(",")):
+            for fmt, size, save_time, load_time in bench(count, args.result_size, directory):
+                print(f"{count:>9} {fmt:>7} {size / 1e6:>9.1f} {save_time:>8.2f} {load_time:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,601 @@
+"""Compact binary format for saved office state.
+
+File layout (all integers little-endian):
+
+    header   b"AIOSTATE" + u16 version + u16 flags
+    record*  u8 kind + u32 length + payload
+             kind 3 (schema, first): [task field names, agent field names,
+                                      [[enum class, member], ...]]
+             kind 4 (blob, before agents/tasks): sha256 digest (32 bytes) + string
+             kind 1 (agent): list of field values in schema order
+             kind 2 (task):  u32 meta_len + meta (list of Task field values
+                             without `results`) + results (dict agent_id -> result)
+    end      u8 kind 0
+
+Values are encoded msgpack-style as a one-byte tag followed by the data:
+None/True/False, int64, float64, utf-8 strings and bytes (u32 length), lists,
+dicts and sets (u32 count), enums (u16 index into the schema's enum table)
+and blob references (u32 index of a blob record). Every string of at least
+BLOB_MIN_CHARS is written once as a blob and referenced from everywhere it
+occurs, e.g. a result that is also the next stage's description. Sets and enums survive a round trip, unlike with JSON. Field names
+are stored once in the schema rather than in every record. Task results come
+after the metadata in their own length-prefixed block, so a reader can skip
+or defer them.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping, MutableMapping
+from dataclasses import fields
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Tuple
+
+from storage import write_atomic, state_from_dict
+from blobstore import BLOB_MIN_CHARS
+from tasks import Task, TaskStatus, TaskPriority
+
+MAGIC = b"AIOSTATE"
+BINARY_EXTENSION = ".aio"
+VERSION = 2  # 2: blob records and references
+HEADER = struct.Struct("<8sHH")
+RECORD = struct.Struct("<BI")
+U16 = struct.Struct("<H")
+U32 = struct.Struct("<I")
+I64 = struct.Struct("<q")
+F64 = struct.Struct("<d")
+
+# Windows cannot replace a file while it is memory-mapped
+MAPPED_FILES_LOCKED = sys.platform == "win32"
+
+KIND_END = 0
+KIND_AGENT = 1
+KIND_TASK = 2
+KIND_SCHEMA = 3
+KIND_BLOB = 4
+
+# Value tags
+T_NONE, T_TRUE, T_FALSE = ord("N"), ord("T"), ord("F")
+T_INT, T_BIGINT, T_FLOAT = ord("i"), ord("I"), ord("d")
+T_STR, T_BYTES = ord("s"), ord("b")
+T_LIST, T_DICT, T_SET, T_ENUM = ord("l"), ord("m"), ord("S"), ord("e")
+T_REF = ord("r")
+
+
+class FormatError(ValueError):
+    pass
+
+
+def _enum_classes() -> Dict[str, type]:
+    from agents import AgentType
+    return {cls.__name__: cls for cls in (TaskStatus, TaskPriority, AgentType)}
+
+
+def is_binary_state(filename: str) -> bool:
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# Encoding
+
+class Encoder:
+    def __init__(self, blob_min_chars: int = BLOB_MIN_CHARS):
+        self.enum_table = [member for cls in _enum_classes().values() for member in cls]
+        self.enum_index = {member: index for index, member in enumerate(self.enum_table)}
+        self.blob_min_chars = blob_min_chars
+        self.blob_index: Dict[bytes, int] = {}
+        self.blob_records: List[bytes] = []  # Payloads of the blob records, in index order
+        self.blob_source = None  # StateReader whose blob indexes this encoder keeps
+
+    def seed_blobs(self, reader: "StateReader"):
+        """Start with `reader`'s blobs at the same indexes, so its encoded records can be copied as-is."""
+        for digest, (start, end) in zip(reader.blob_digests, reader.blob_spans):
+            self.blob_index[digest] = len(self.blob_records)
+            self.blob_records.append(bytes(reader.buffer[start:end]))
+        self.blob_source = reader
+
+    def can_copy_from(self, reader: "StateReader") -> bool:
+        return self.blob_source is reader and reader.decoder.enum_table == self.enum_table
+
+    def _blob(self, data: bytes) -> int:
+        digest = hashlib.sha256(data).digest()
+        index = self.blob_index.get(digest)
+        if index is None:
+            index = self.blob_index[digest] = len(self.blob_records)
+            self.blob_records.append(digest + bytes([T_STR]) + U32.pack(len(data)) + data)
+        return index
+
+    def schema(self, task_fields: List[str], agent_fields: List[str]) -> list:
+        return [task_fields, agent_fields, [[type(member).__name__, member.name] for member in self.enum_table]]
+
+    def _str(self, out: bytearray, text: str):
+        data = text.encode('utf-8')
+        out += U32.pack(len(data))
+        out += data
+
+    def value(self, out: bytearray, value: Any):
+        if isinstance(value, str):
+            if len(value) >= self.blob_min_chars:
+                out.append(T_REF)
+                out += U32.pack(self._blob(value.encode('utf-8')))
+            else:
+                out.append(T_STR)
+                self._str(out, value)
+        elif value is None:
+            out.append(T_NONE)
+        elif value is True:
+            out.append(T_TRUE)
+        elif value is False:
+            out.append(T_FALSE)
+        elif isinstance(value, Enum):
+            if value not in self.enum_index:
+                raise TypeError(f"Cannot encode enum {type(value).__name__}")
+            out.append(T_ENUM)
+            out += U16.pack(self.enum_index[value])
+        elif isinstance(value, int):
+            if -(1 << 63) <= value < (1 << 63):
+                out.append(T_INT)
+                out += I64.pack(value)
+            else:
+                out.append(T_BIGINT)
+                self._str(out, str(value))
+        elif isinstance(value, float):
+            out.append(T_FLOAT)
+            out += F64.pack(value)
+        elif isinstance(value, (bytes, bytearray)):
+            out.append(T_BYTES)
+            out += U32.pack(len(value))
+            out += value
+        elif isinstance(value, (list, tuple)):
+            out.append(T_LIST)
+            out += U32.pack(len(value))
+            for item in value:
+                self.value(out, item)
+        elif isinstance(value, Mapping):
+            out.append(T_DICT)
+            out += U32.pack(len(value))
+            for key, item in value.items():
+                self.value(out, key)
+                self.value(out, item)
+        elif isinstance(value, (set, frozenset)):
+            out.append(T_SET)
+            out += U32.pack(len(value))
+            try:
+                items = sorted(value)
+            except TypeError:
+                items = list(value)
+            for item in items:
+                self.value(out, item)
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+# Decoding
+
+class Decoder:
+    """Decodes values from `buffer` (bytes or an mmap) at given offsets."""
+
+    def __init__(self, buffer, enum_table: List = ()):
+        self.buffer = buffer
+        self.enum_table = list(enum_table)
+        self.blob_offsets: List[int] = []
+        self._blobs: Dict[int, str] = {}
+
+    def blob(self, index: int) -> str:
+        # Decoded once; every reference gets the same string object
+        text = self._blobs.get(index)
+        if text is None:
+            text = self._blobs[index] = self.value(self.blob_offsets[index])[0]
+        return text
+
+    def use_schema(self, schema: list):
+        enums = _enum_classes()
+        self.enum_table = []
+        for class_name, member in schema[2]:
+            if class_name not in enums:
+                raise FormatError(f"Unknown enum type {class_name}")
+            self.enum_table.append(enums[class_name][member])
+
+    def value(self, pos: int) -> Tuple[Any, int]:
+        buf = self.buffer
+        tag = buf[pos]
+        pos += 1
+        if tag == T_STR:
+            (length,) = U32.unpack_from(buf, pos)
+            pos += 4
+            return buf[pos:pos + length].decode('utf-8'), pos + length
+        if tag == T_NONE:
+            return None, pos
+        if tag == T_REF:
+            return self.blob(U32.unpack_from(buf, pos)[0]), pos + 4
+        if tag == T_ENUM:
+            return self.enum_table[U16.unpack_from(buf, pos)[0]], pos + 2
+        if tag == T_FLOAT:
+            return F64.unpack_from(buf, pos)[0], pos + 8
+        if tag == T_LIST or tag == T_SET:
+            items, pos = self._items(pos)
+            return (set(items) if tag == T_SET else items), pos
+        if tag == T_DICT:
+            (count,) = U32.unpack_from(buf, pos)
+            pos += 4
+            result = {}
+            value = self.value
+            for _ in range(count):
+                key, pos = value(pos)
+                result[key], pos = value(pos)
+            return result, pos
+        if tag == T_INT:
+            return I64.unpack_from(buf, pos)[0], pos + 8
+        if tag == T_TRUE:
+            return True, pos
+        if tag == T_FALSE:
+            return False, pos
+        if tag == T_BIGINT:
+            (length,) = U32.unpack_from(buf, pos)
+            pos += 4
+            return int(buf[pos:pos + length].decode('ascii')), pos + length
+        if tag == T_BYTES:
+            (length,) = U32.unpack_from(buf, pos)
+            pos += 4
+            return bytes(buf[pos:pos + length]), pos + length
+        raise FormatError(f"Unknown value tag {tag!r} at offset {pos - 1}")
+
+
+    def _items(self, pos: int) -> Tuple[list, int]:
+        # List items, with the common scalar cases inlined (one call per list, not per item)
+        buf = self.buffer
+        unpack_u32, unpack_u16, unpack_f64 = U32.unpack_from, U16.unpack_from, F64.unpack_from
+        enum_table = self.enum_table
+        (count,) = unpack_u32(buf, pos)
+        pos += 4
+        items = []
+        append = items.append
+        for _ in range(count):
+            tag = buf[pos]
+            if tag == T_STR:
+                (length,) = unpack_u32(buf, pos + 1)
+                pos += 5
+                append(buf[pos:pos + length].decode('utf-8'))
+                pos += length
+            elif tag == T_NONE:
+                append(None)
+                pos += 1
+            elif tag == T_ENUM:
+                append(enum_table[unpack_u16(buf, pos + 1)[0]])
+                pos += 3
+            elif tag == T_FLOAT:
+                append(unpack_f64(buf, pos + 1)[0])
+                pos += 9
+            else:
+                item, pos = self.value(pos)
+                append(item)
+        return items, pos
+
+
+def iter_records(buffer):
+    """Yield (kind, payload_start, payload_end) for each record after the header."""
+    if len(buffer) < HEADER.size:
+        raise FormatError("File too short for a state header")
+    magic, version, _flags = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise FormatError("Not a binary office state file")
+    if version > VERSION:
+        raise FormatError(f"Unsupported state format version {version}")
+    pos, size = HEADER.size, len(buffer)
+    while pos < size:
+        kind = buffer[pos]
+        if kind == KIND_END:
+            return
+        _kind, length = RECORD.unpack_from(buffer, pos)
+        start = pos + RECORD.size
+        if start + length > size:
+            break
+        yield kind, start, start + length
+        pos = start + length
+    raise FormatError("Missing end record (truncated file?)")
+
+
+# Whole-state save/load
+
+TASK_META_FIELDS = [f.name for f in fields(Task) if f.name != "results"]
+TASK_FIELD_NAMES = frozenset(f.name for f in fields(Task))
+
+
+def encode_state(agents, tasks) -> bytes:
+    from agents import AgentBase
+    agent_fields = [f.name for f in fields(AgentBase)]
+    encoder = Encoder()
+    if isinstance(tasks, LazyTaskMap):
+        # Keep the source file's blob indexes so its undecoded records stay valid
+        encoder.seed_blobs(tasks.reader)
+    # Agents and tasks go to `body` first; blob records (collected meanwhile) must precede them
+    body = bytearray()
+    payload = bytearray()
+    for agent in agents:
+        payload.clear()
+        encoder.value(payload, [getattr(agent, name) for name in agent_fields])
+        body += RECORD.pack(KIND_AGENT, len(payload))
+        body += payload
+    meta = bytearray()
+    if isinstance(tasks, LazyTaskMap):
+        tasks = tasks.entries_for_copy(encoder)
+    elif isinstance(tasks, Mapping):
+        tasks = tasks.values()
+    for task in tasks:
+        if isinstance(task, bytes):
+            # Record of a task never decoded since loading: copy it unchanged
+            body += RECORD.pack(KIND_TASK, len(task))
+            body += task
+            continue
+        meta.clear()
+        payload.clear()
+        encoder.value(meta, [getattr(task, name) for name in TASK_META_FIELDS])
+        raw = task.results.raw(encoder) if isinstance(task.results, LazyResults) else b""
+        if raw:
+            payload += raw
+        else:
+            encoder.value(payload, task.results)
+        body += RECORD.pack(KIND_TASK, U32.size + len(meta) + len(payload))
+        body += U32.pack(len(meta))
+        body += meta
+        body += payload
+    out = bytearray(HEADER.pack(MAGIC, VERSION, 0))
+    payload.clear()
+    encoder.value(payload, encoder.schema(TASK_META_FIELDS, agent_fields))
+    out += RECORD.pack(KIND_SCHEMA, len(payload))
+    out += payload
+    for record in encoder.blob_records:
+        out += RECORD.pack(KIND_BLOB, len(record))
+        out += record
+    out += body
+    out.append(KIND_END)
+    return bytes(out)
+
+
+class StateReader:
+    """Walks the records of a binary state held in `buffer` (bytes or an mmap)."""
+
+    def __init__(self, buffer, path: str = ""):
+        self.buffer = buffer
+        self.path = path  # File behind a mapped `buffer`
+        self.decoder = Decoder(buffer)
+        self.task_fields: List[str] = []
+        self.agent_fields: List[str] = []
+        self.blob_digests: List[bytes] = []
+        self.blob_spans: List[Tuple[int, int]] = []
+
+    def records(self):
+        for kind, start, end in iter_records(self.buffer):
+            if kind == KIND_SCHEMA:
+                schema, _ = self.decoder.value(start)
+                self.task_fields, self.agent_fields = schema[0], schema[1]
+                self.decoder.use_schema(schema)
+            elif kind == KIND_BLOB:
+                # Only indexed here; decoded on first reference
+                self.blob_digests.append(bytes(self.buffer[start:start + 32]))
+                self.blob_spans.append((start, end))
+                self.decoder.blob_offsets.append(start + 32)
+            elif kind in (KIND_AGENT, KIND_TASK):
+                if not self.task_fields:
+                    raise FormatError("Record before schema")
+                yield kind, start, end
+            # Unknown record kinds from newer writers are skipped
+
+    def maps(self, filename: str) -> bool:
+        """True when the buffer is a mapping of `filename`."""
+        try:
+            return bool(self.path) and os.path.samefile(self.path, filename)
+        except OSError:
+            return False
+
+    def detach(self):
+        """Copy a mapped buffer into memory and close the mapping, so the file can be replaced."""
+        if isinstance(self.buffer, mmap.mmap):
+            mapping = self.buffer
+            self.buffer = self.decoder.buffer = bytes(mapping)
+            mapping.close()
+        self.path = ""
+
+    def agent(self, start: int):
+        from agents import AgentBase
+        values, _ = self.decoder.value(start)
+        known = {f.name for f in fields(AgentBase)}
+        # Fields written by a newer version are dropped
+        return AgentBase(**{name: value for name, value in zip(self.agent_fields, values) if name in known})
+
+    def task_meta(self, start: int) -> Dict[str, Any]:
+        values, _ = self.decoder.value(start + U32.size)
+        return dict(zip(self.task_fields, values))
+
+    def task_id(self, start: int) -> str:
+        """Only the task's id, read straight from the record when `id` is the first field."""
+        pos = start + U32.size
+        buf = self.buffer
+        if self.task_fields[0] == "id" and buf[pos] == T_LIST and buf[pos + 5] == T_STR:
+            (length,) = U32.unpack_from(buf, pos + 6)
+            return buf[pos + 10:pos + 10 + length].decode('utf-8')
+        return self.task_meta(start)["id"]
+
+    def task(self, start: int, end: int, lazy_results: bool = False) -> Task:
+        if lazy_results:
+            results = LazyResults(self, self.task_results_offset(start), end)
+        else:
+            results = self.task_results(start)
+        meta = {name: value for name, value in self.task_meta(start).items() if name in TASK_FIELD_NAMES}
+        return Task(results=results, **meta)
+
+    def task_results_offset(self, start: int) -> int:
+        return start + U32.size + U32.unpack_from(self.buffer, start)[0]
+
+    def task_results(self, start: int) -> Dict[str, Any]:
+        return self.decoder.value(self.task_results_offset(start))[0]
+
+
+class LazyResults(MutableMapping):
+    """A task's results that stay encoded in the state file until first accessed.
+
+    Any read or write decodes the whole results block once, and from then on
+    it acts as a plain dict. While untouched, saving copies the encoded bytes
+    as they are, without decoding them.
+    """
+
+    def __init__(self, reader: "StateReader", start: int, end: int):
+        self._reader = reader
+        self._start = start
+        self._end = end
+        self._data = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def raw(self, encoder: Encoder) -> bytes:
+        """Encoded bytes if they can be copied as-is into `encoder`'s file, else b''."""
+        if self._data is not None or not encoder.can_copy_from(self._reader):
+            return b""
+        return bytes(self._reader.buffer[self._start:self._end])
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = self._reader.decoder.value(self._start)[0]
+            self._reader = None  # Drop the reference to the mapped file once decoded
+        return self._data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+
+    def __delitem__(self, key):
+        del self._load()[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __repr__(self) -> str:
+        return repr(self._data) if self.loaded else "LazyResults(<not loaded>)"
+
+
+def decode_state(buffer) -> Tuple[List, List[Task]]:
+    reader = StateReader(buffer)
+    agents, tasks = [], []
+    for kind, start, end in reader.records():
+        if kind == KIND_AGENT:
+            agents.append(reader.agent(start))
+        else:
+            tasks.append(reader.task(start, end))
+    return agents, tasks
+
+
+def save_binary_state(filename: str, agents, tasks):
+    data = encode_state(agents, tasks)
+    if isinstance(tasks, LazyTaskMap) and MAPPED_FILES_LOCKED and tasks.reader.maps(filename):
+        # Undecoded tasks move to memory, or replacing the mapped file would fail
+        tasks.reader.detach()
+    write_atomic(filename, data)
+
+
+def load_binary_state(filename: str) -> Tuple[List, List[Task]]:
+    with open(filename, 'rb') as f:
+        return decode_state(f.read())
+
+
+class LazyTaskMap(MutableMapping):
+    """`{task_id: Task}` over a memory-mapped state file, decoding each task on first access.
+
+    Opening only reads the task ids, so it costs one short read per record.
+    A Task is built the first time it is looked up, and its results stay
+    encoded (LazyResults) until they are used. Tasks added or replaced later
+    are kept as ordinary objects.
+    """
+
+    def __init__(self, reader: "StateReader", index: Dict[str, Tuple[int, int]]):
+        self.reader = reader
+        self._entries: Dict[str, Any] = dict(index)  # task_id -> Task, or (start, end) while not decoded
+
+    @property
+    def decoded_count(self) -> int:
+        return sum(1 for entry in self._entries.values() if isinstance(entry, Task))
+
+    def entries_for_copy(self, encoder: Encoder) -> Iterator:
+        """Tasks for saving: raw record bytes for undecoded tasks when the file layout still matches, else Task objects."""
+        reader = self.reader
+        copyable = encoder.can_copy_from(reader) and reader.task_fields == TASK_META_FIELDS
+        for task_id, entry in self._entries.items():
+            if isinstance(entry, Task):
+                yield entry
+            elif copyable:
+                yield bytes(reader.buffer[entry[0]:entry[1]])
+            else:
+                yield self[task_id]
+
+    def __getitem__(self, task_id: str) -> Task:
+        entry = self._entries[task_id]
+        if not isinstance(entry, Task):
+            entry = self.reader.task(entry[0], entry[1], lazy_results=True)
+            self._entries[task_id] = entry
+        return entry
+
+    def __setitem__(self, task_id: str, task: Task):
+        self._entries[task_id] = task
+
+    def __delitem__(self, task_id: str):
+        del self._entries[task_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, task_id) -> bool:
+        return task_id in self._entries
+
+    def __repr__(self) -> str:
+        return f"LazyTaskMap({len(self)} tasks, {self.decoded_count} decoded)"
+
+
+def open_binary_state_lazy(filename: str) -> Tuple[List, LazyTaskMap]:
+    """Memory-map `filename`, decode the agents and index the tasks by id.
+
+    The mapping stays open while any task still needs it. Saving over the same
+    file name replaces the file with os.replace, which leaves the mapping valid
+    on POSIX; Windows refuses to replace a mapped file, so there
+    save_binary_state first copies the mapping into memory and closes it.
+    """
+    with open(filename, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    reader = StateReader(mapping, filename)
+    agents, index = [], {}
+    for kind, start, end in reader.records():
+        if kind == KIND_AGENT:
+            agents.append(reader.agent(start))
+        else:
+            index[reader.task_id(start)] = (start, end)
+    return agents, LazyTaskMap(reader, index)
+
+
+def convert_json_to_binary(source: str, target: str) -> Tuple[int, int]:
+    """Rewrite a JSON state file (from save_all) in the binary format; returns (agents, tasks) counts."""
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    agents, tasks, _blobs = state_from_dict(data)
+    save_binary_state(target, agents, tasks)
+    return len(agents), len(tasks)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Użycie: python binstate.py stan.json stan.aio")
+        sys.exit(1)
+    agent_count, task_count = convert_json_to_binary(sys.argv[1], sys.argv[2])
+    print(f"Skonwertowano {agent_count} agentów i {task_count} tasków do {sys.argv[2]}")
@@ -0,0 +1,83 @@
+import hashlib
+import threading
+from typing import Any, Dict
+
+BLOB_MIN_CHARS = 512  # Shorter strings are cheaper to keep inline than to reference
+BLOB_REF = "$blob"
+
+
+def blob_key(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and BLOB_REF in value
+
+
+class BlobStore:
+    """Content-addressed store of large strings (task results, code, reports).
+
+    `intern()` returns one shared instance per distinct text. A result reused
+    as another task's description, or the same report produced by several
+    agents, is then held in memory once. When state is saved, `ref()` replaces
+    a large string with `{"$blob": sha256}` and the texts are written once in
+    a blobs table (`table()`). `resolve()` turns references back into text.
+    """
+
+    def __init__(self, min_chars: int = BLOB_MIN_CHARS):
+        self.min_chars = min_chars
+        self._blobs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.references = 0
+
+    @classmethod
+    def from_table(cls, table: Dict[str, str], min_chars: int = BLOB_MIN_CHARS) -> "BlobStore":
+        store = cls(min_chars)
+        store._blobs.update(table)
+        return store
+
+    def _is_large(self, value) -> bool:
+        return isinstance(value, str) and len(value) >= self.min_chars
+
+    def put(self, text: str) -> str:
+        key = blob_key(text)
+        with self._lock:
+            self._blobs.setdefault(key, text)
+            self.references += 1
+        return key
+
+    def get(self, key: str) -> str:
+        return self._blobs[key]
+
+    def intern(self, value):
+        """The shared copy of a large string (other values are returned unchanged)."""
+        if not self._is_large(value):
+            return value
+        return self._blobs[self.put(value)]
+
+    def ref(self, value) -> Any:
+        """Reference to a large string for serialization (other values unchanged)."""
+        if not self._is_large(value):
+            return value
+        return {BLOB_REF: self.put(value)}
+
+    def resolve(self, value) -> Any:
+        if is_blob_ref(value):
+            return self._blobs[value[BLOB_REF]]
+        return value
+
+    def table(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._blobs)
+
+    def __contains__(self, key) -> bool:
+        return key in self._blobs
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = sum(len(text) for text in self._blobs.values())
+            return {"blobs": len(self._blobs), "chars": stored, "references": self.references}
+
@@ -0,0 +1,133 @@
+import asyncio
+import heapq
+import os
+import threading
+import time
+
+
+class RealClock:
+    """Wall-clock time; artificial delays really sleep."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.perf_counter()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class AcceleratedClock(RealClock):
+    """Time runs `factor` times faster: delays are divided by it, timestamps scaled up."""
+
+    def __init__(self, factor: float = 10.0):
+        if factor <= 0:
+            raise ValueError("factor must be positive")
+        self.factor = factor
+        self._wall_start = time.time()
+        self._mono_start = time.perf_counter()
+
+    def time(self) -> float:
+        return self._wall_start + (time.time() - self._wall_start) * self.factor
+
+    def monotonic(self) -> float:
+        return self._mono_start + (time.perf_counter() - self._mono_start) * self.factor
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds / self.factor)
+
+
+class VirtualClock:
+    """Simulated time: delays complete instantly and advance the clock instead.
+
+    Sleepers wait in a heap ordered by deadline. Once every other task on the
+    event loop is waiting, the clock jumps to the earliest deadline and wakes
+    the sleepers due then, in the order they went to sleep. Agents that sleep
+    concurrently therefore overlap in simulated time, sequential sleeps add up,
+    and each sleeper wakes at its own deadline.
+    """
+
+    def __init__(self, start: float = None):
+        self._now = time.time() if start is None else start
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._sleepers = {}  # event loop -> heap of (deadline, seq, future)
+        self._drivers = {}  # event loop -> task advancing the clock for that loop's sleepers
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self._now += max(0.0, seconds)
+
+    async def sleep(self, seconds: float):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            deadline = self._now + max(0.0, seconds)
+            heapq.heappush(self._sleepers.setdefault(loop, []), (deadline, self._seq, future))
+            self._seq += 1
+            if loop not in self._drivers:
+                self._drivers[loop] = loop.create_task(self._drive(loop))
+        await future
+
+    async def _drive(self, loop):
+        while True:
+            await _settle(loop)
+            with self._lock:
+                sleepers = self._sleepers[loop]
+                while sleepers and sleepers[0][2].done():
+                    heapq.heappop(sleepers)  # Cancelled sleep
+                if not sleepers:
+                    del self._sleepers[loop]
+                    del self._drivers[loop]
+                    return
+                self._now = max(self._now, sleepers[0][0])
+                while sleepers and sleepers[0][0] <= self._now:
+                    future = heapq.heappop(sleepers)[2]
+                    if not future.done():
+                        future.set_result(None)
+
+
+SETTLE_MAX_YIELDS = 50
+
+
+async def _settle(loop):
+    """Yield until no other callback is ready to run, i.e. every other task is waiting.
+
+    Uses the loop's ready queue where it is exposed (asyncio's own loops); elsewhere
+    it just yields SETTLE_MAX_YIELDS times.
+    """
+    ready = getattr(loop, "_ready", None)
+    for _ in range(SETTLE_MAX_YIELDS):
+        await asyncio.sleep(0)
+        if ready is not None and not ready:
+            return
+
+
+DEFAULT_CLOCK = RealClock()
+
+
+def make_clock(mode: str = None, factor: float = 10.0):
+    """Build a clock from a mode name: 'real', 'accelerated' or 'virtual'.
+
+    Without a mode, AIOFFICE_CLOCK (and AIOFFICE_CLOCK_FACTOR) decide; default is real time.
+    """
+    mode = (mode or os.environ.get("AIOFFICE_CLOCK", "real")).lower()
+    if mode == "real":
+        return RealClock()
+    if mode == "accelerated":
+        return AcceleratedClock(float(os.environ.get("AIOFFICE_CLOCK_FACTOR", factor)))
+    if mode == "virtual":
+        return VirtualClock()
+    raise ValueError(f"Unknown clock mode: {mode}")
+
+
+def clock_of(office):
+    """Clock used by `office`, falling back to real time for offices without one."""
+    return getattr(office, "clock", None) or DEFAULT_CLOCK
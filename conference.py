@@ -0,0 +1,81 @@
+import asyncio
+from typing import List, Optional
+
+from clock import clock_of
+from metrics import metrics_of
+
+REPLY_DELAY = 0.5  # Simulated time colleagues need to answer (once per round, not per colleague)
+
+
+def conference_members(agent, office) -> list:
+    """Colleagues relevant to `agent`: its collaborators, the agents it receives work from and its manager."""
+    member_ids = list(agent.collaborators) + list(agent.receives_from)
+    if agent.reports_to:
+        member_ids.append(agent.reports_to)
+    members, seen = [], {agent.id}
+    for member_id in member_ids:
+        if member_id in seen or member_id not in office.agents:
+            continue
+        seen.add(member_id)
+        members.append(office.agents[member_id])
+    return members
+
+
+class ConferenceRoom:
+    """Discussion about one task between its host agent and the host's team.
+
+    All questions go out at once, the room waits once for the answers, and the
+    answers are posted as a single digest. The cost of a round grows with the
+    host's team size, not with the size of the office.
+    """
+
+    def __init__(self, topic: str, host, members: List, office):
+        self.topic = topic
+        self.host = host
+        self.members = members
+        self.office = office
+
+    @classmethod
+    def for_task(cls, host, task, office) -> "ConferenceRoom":
+        return cls(task.title, host, conference_members(host, office), office)
+
+    def _post(self, message: str):
+        if self.office.gui:
+            self.office.gui.update_conference_room(message)
+
+    async def _ask(self, member, task) -> Optional[object]:
+        content = self.host._create_team_message(task, member)
+        if not content:
+            return None
+        self._post(f"<talk {self.host.name} to {member.name}> {content}")
+        await self.host.send_message(member, content, task.id, self.office)
+        return member
+
+    async def discuss(self, task) -> List[tuple]:
+        """Run one question/answer round; returns [(member, reply), ...]."""
+        if not self.members:
+            return []
+        with metrics_of(self.office).span("conference.round", role=self.host.role, host=self.host.name,
+                                          task=task.id, members=len(self.members)) as span:
+            replies = await self._round(task)
+            span.labels["replies"] = len(replies)
+        return replies
+
+    async def _round(self, task) -> List[tuple]:
+        asked = await asyncio.gather(*(self._ask(member, task) for member in self.members))
+        asked = [member for member in asked if member is not None]
+        if not asked:
+            return []
+        # Simulate the colleagues answering in parallel
+        await clock_of(self.office).sleep(REPLY_DELAY)
+        replies = []
+        for member in asked:
+            response = member._create_response_message(task, self.host)
+            if response:
+                replies.append((member, response))
+        if replies:
+            digest = "\n".join(f"    <talk {member.name} to {self.host.name}> {response}" for member, response in replies)
+            self._post(f"<digest '{self.topic}' for {self.host.name}: {len(replies)} replies>\n{digest}")
+            await asyncio.gather(*(member.send_message(self.host, response, task.id, self.office)
+                                   for member, response in replies))
+        return replies
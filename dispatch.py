@@ -0,0 +1,173 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from officelog import get_logger
+from tasks import TaskStatus
+
+log = get_logger("dispatch")
+
+
+class AgentWorkerPool:
+    """Runs queued tasks on agents, each agent working on up to `slots` tasks at once.
+
+    A task leaves the office's TaskQueue only when one of its capable agents has
+    a free slot: the pool takes the first task in priority order that can start
+    now and skips tasks whose agents are all busy. So a backlog for one busy
+    role never holds up tasks for idle agents. The pool looks at the queue again
+    whenever a task is put or a slot is freed.
+    """
+
+    def __init__(self, office, default_slots: int = 1, slots: Optional[Dict[str, int]] = None):
+        self.office = office
+        self.default_slots = max(1, default_slots)
+        self.slots: Dict[str, int] = dict(slots or {})
+        self.busy: Dict[str, int] = {}
+        self.completed = 0
+        self._slot_freed: Optional[asyncio.Event] = None
+
+    def slots_for(self, agent_id: str) -> int:
+        return max(1, self.slots.get(agent_id, self.default_slots))
+
+    def set_slots(self, agent_id: str, count: int):
+        self.slots[agent_id] = max(1, count)
+
+    def total_slots(self) -> int:
+        return sum(self.slots_for(agent_id) for agent_id in self.office.agents)
+
+    def utilization(self) -> Dict[str, Any]:
+        agents = {
+            agent.name: {"busy": self.busy.get(agent_id, 0), "slots": self.slots_for(agent_id)}
+            for agent_id, agent in self.office.agents.items()
+        }
+        busy = sum(entry["busy"] for entry in agents.values())
+        total = sum(entry["slots"] for entry in agents.values())
+        return {"busy": busy, "slots": total, "ratio": busy / total if total else 0.0, "agents": agents}
+
+    def _utilization_line(self) -> str:
+        usage = self.utilization()
+        return f"{usage['busy']}/{usage['slots']} slots busy"
+
+    def _free_agent(self, candidates: List) -> Optional[object]:
+        for agent in candidates:
+            if self.busy.get(agent.id, 0) < self.slots_for(agent.id):
+                return agent
+        return None
+
+    def _take(self, agent_id: str):
+        # Called with the lock held
+        self.busy[agent_id] = self.busy.get(agent_id, 0) + 1
+
+    def _release(self, agent_id: str):
+        with self._lock:
+            self.busy[agent_id] -= 1
+            self.released += 1
+            waiters, self._release_waiters = self._release_waiters, []
+        for waiter in waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                pass  # Waiter's event loop is closed
+
+    async def wait_for_release(self, seen_released: int):
+        """Wait until a slot is freed after `released` was `seen_released` (returns at once if one already was)."""
+        with self._lock:
+            if self.released != seen_released:
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._release_waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+
+    @asynccontextmanager
+    async def slot(self, agent):
+        """Hold one of `agent`'s slots, waiting until one is free."""
+        while True:
+            with self._lock:
+                if self.busy.get(agent.id, 0) < self.slots_for(agent.id):
+                    self._take(agent.id)
+                    break
+                seen = self.released
+            await self.wait_for_release(seen)
+        try:
+            yield
+        finally:
+            self._release(agent.id)
+
+    def _next_task(self):
+        """Pop the first queued task that can start now: (task, agent), or (task, None) for one to drop."""
+        office = self.office
+        chosen = []
+
+        def accept(capability) -> bool:
+            # Tasks are bucketed by office.task_capability, so this runs once per bucket, not per task
+            candidates = office.agents_for_capability(capability)
+            agent = self._free_agent(candidates) if candidates else None
+            chosen.append(agent)
+            return agent is not None or not candidates
+
+        with self._lock:
+            task_id = office.task_queue.pop_first(accept)
+            if task_id is None:
+                return None
+            task = office.tasks.get(task_id)
+            if task is None or task.status != TaskStatus.PENDING:
+                return None, None  # Removed or already handled
+            agent = chosen[-1]
+            if agent is not None:
+                self._take(agent.id)
+            return task, agent
+
+    async def _run_task(self, task, agent):
+        try:
+            await self.office.run_assigned_task(task, agent, utilization=self._utilization_line())
+            self.completed += 1
+        finally:
+            self._release(agent.id)
+
+    @staticmethod
+    def _finished(running, future):
+        running.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            log.error("Task failed in worker pool: %r", future.exception())
+
+    async def run(self, workers: Optional[int] = None):
+        """Process the office's queue forever, running at most `workers` tasks at once (default: all slots)."""
+        office = self.office
+        running = set()
+        try:
+            while True:
+                seen, seen_released = office.task_queue.enqueued, self.released
+                while len(running) < (workers or max(1, self.total_slots())):
+                    picked = self._next_task()
+                    if picked is None:
+                        break
+                    task, agent = picked
+                    if task is None:
+                        continue  # Removed or already handled
+                    if agent is None:
+                        office.report_unassignable(task)
+                        continue
+                    future = asyncio.ensure_future(self._run_task(task, agent))
+                    running.add(future)
+                    future.add_done_callback(lambda done: self._finished(running, done))
+                # Sleep until a new task arrives or a running one frees its slot
+                put = asyncio.ensure_future(office.task_queue.wait_for_put(seen))
+                freed = asyncio.ensure_future(self.wait_for_release(seen_released))
+                try:
+                    await asyncio.wait({put, freed}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    put.cancel()
+                    freed.cancel()
+        finally:
+            for future in list(running):
+                future.cancel()
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
@@ -0,0 +1,197 @@
+"""Stand-in for the Ollama server: answers /api/generate without a model.
+
+    python fake_ollama.py --port 11434 --latency 0.2 --tokens-per-second 50 --error-rate 0.05
+
+Speaks the parts of the Ollama HTTP API the office uses: POST /api/generate,
+streaming (NDJSON chunks, then a final "done" object) and non-streaming, plus
+GET /api/tags. Each request waits `latency` seconds (+- `jitter`) before the
+first token and then produces tokens at `tokens_per_second`. Every answer is
+`max_tokens` long ("done_reason": "stop") unless the request's
+options.num_predict cuts it short ("done_reason": "length"). With probability
+`error_rate` a request fails with HTTP 500 instead.
+
+In tests and benchmarks run it in-process:
+
+    with FakeOllama(latency=0.1) as server:
+        configure_llm_client(base_url=server.url)
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL = "qwen3:0.6b"
+DEFAULT_MAX_TOKENS = 200
+WORDS = ("the", "website", "layout", "section", "client", "design", "menu", "contact", "page", "responsive",
+         "color", "content", "brand", "header", "footer", "gallery", "button", "form", "mobile", "team")
+
+
+class FakeOllama:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 tokens_per_second: float = 0.0, error_rate: float = 0.0, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second  # 0 = no delay between tokens
+        self.error_rate = error_rate
+        self.max_tokens = max_tokens  # Natural length of an answer
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.tokens = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "tokens": self.tokens}
+
+    # Generation
+
+    def _plan(self, payload):
+        """(fail?, first-token delay, tokens, done_reason) for one request."""
+        options = payload.get("options") or {}
+        count = min(int(options.get("num_predict") or self.max_tokens), self.max_tokens)
+        done_reason = "length" if count < self.max_tokens else "stop"
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            tokens = [self._random.choice(WORDS) + " " for _ in range(count)]
+        return fail, delay, tokens, done_reason
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _count_tokens(self, count: int):
+        with self._lock:
+            self.tokens += count
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real server
+
+            def log_message(self, format, *args):
+                pass  # Quiet: benchmarks send thousands of requests
+
+            def _send_json(self, status, data):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": MODEL, "model": MODEL}]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": "invalid JSON"})
+                    return
+                if self.path != "/api/generate":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                fail, delay, tokens, done_reason = fake._plan(payload)
+                time.sleep(delay)
+                if fail:
+                    self._send_json(500, {"error": "fake_ollama: injected failure"})
+                    return
+                started = time.perf_counter()
+                if payload.get("stream", True):
+                    self._stream(payload, tokens, started, delay, done_reason)
+                else:
+                    time.sleep(fake._token_delay() * len(tokens))
+                    fake._count_tokens(len(tokens))
+                    self._send_json(200, self._final(payload, "".join(tokens), len(tokens), started, delay,
+                                                            done_reason))
+
+            def _final(self, payload, response, count, started, delay, done_reason):
+                return {"model": payload.get("model", MODEL), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                        "response": response, "done": True, "done_reason": done_reason,
+                        "total_duration": int((time.perf_counter() - started + delay) * 1e9),
+                        "prompt_eval_count": len(str(payload.get("prompt", "")).split()),
+                        "eval_count": count, "eval_duration": int((time.perf_counter() - started) * 1e9)}
+
+            def _stream(self, payload, tokens, started, delay, done_reason):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                token_delay = fake._token_delay()
+                for token in tokens:
+                    if token_delay:
+                        time.sleep(token_delay)
+                    self._chunk({"model": payload.get("model", MODEL), "response": token, "done": False})
+                fake._count_tokens(len(tokens))
+                self._chunk(self._final(payload, "", len(tokens), started, delay, done_reason))
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _chunk(self, data):
+                line = json.dumps(data).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+- seconds added to the latency")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="0 = as fast as possible")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS, help="length of every answer")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    server = FakeOllama(args.host, args.port, args.latency, args.jitter, args.tokens_per_second,
+                        args.error_rate, args.max_tokens, args.seed)
+    print(f"Fake Ollama listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+        print(server.stats())
+
+
+if __name__ == "__main__":
+    main()
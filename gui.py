@@ -2,30 +2,74 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 import asyncio
 import threading
-try:
-    import matplotlib.pyplot as plt
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    import matplotlib.animation as animation
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    print("Matplotlib nie jest zainstalowany. Wykresy będą wyłączone.")
-    MATPLOTLIB_AVAILABLE = False
-from collections import defaultdict
+from collections import defaultdict, deque
+import datetime
+import logging
+import math
+import os
 import time
+from ringlog import RingLog, DEFAULT_LOG_DIR, DEFAULT_MAX_LINES
+from officelog import get_logger, fields
+from lazyimport import module_available
+
+# Wykresy (matplotlib + backend Tk) ładowane dopiero przy pierwszym otwarciu okna wykresu
+MATPLOTLIB_AVAILABLE = module_available("matplotlib")
+plt = None
+FigureCanvasTkAgg = None
+
+
+def _load_matplotlib():
+    global plt, FigureCanvasTkAgg
+    if plt is None:
+        import matplotlib.pyplot
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as canvas_class
+        plt, FigureCanvasTkAgg = matplotlib.pyplot, canvas_class
+
+chart_log = get_logger("gui.charts")
+work_log = get_logger("gui.worktime")
+comm_log = get_logger("gui.comm")
+code_log = get_logger("gui.code")
+
 
 class TaskListFrame(ttk.Frame):
+    """Task list that only shows (materializes) the rows that fit on screen.
+
+    The frame keeps the order of all task ids and renders a window of them
+    starting at `offset`; the scrollbar and mouse wheel move that window.
+    Each refresh asks the office which tasks changed since the last one
+    (office.task_changes) and rewrites only those rows, if visible.
+    """
+
+    STATUS_ICONS = {
+        "PENDING": "⏳",
+        "IN_PROGRESS": "🔄",
+        "COMPLETED": "✅",
+        "FAILED": "❌",
+        "BLOCKED": "🚫"
+    }
+    MIN_VISIBLE_ROWS = 8
+
     def __init__(self, parent, office_simulation):
         super().__init__(parent)
         self.office_simulation = office_simulation
+        self.order = []  # Ids of all tasks, in office order
+        self.positions = {}  # task_id -> index in self.order
+        self.offset = 0  # Index of the first rendered task
+        self.rows = {}  # task_id -> values of the rendered row (only for visible tasks)
+        self.version = -1  # Office task version already shown
         self.setup_ui()
         
     def setup_ui(self):
         # Header
         ttk.Label(self, text="Task List", font=("Arial", 12, "bold")).pack(pady=5)
         
+        # Scrollbar (moves the window of rendered rows)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
         # Treeview for tasks
         columns = ("ID", "Title", "Status", "Agent", "Priority")
-        self.task_tree = ttk.Treeview(self, columns=columns, show="headings", height=8)
+        self.task_tree = ttk.Treeview(self, columns=columns, show="headings", height=self.MIN_VISIBLE_ROWS)
         
         # Column configuration
         self.task_tree.heading("ID", text="ID")
@@ -41,11 +85,10 @@ class TaskListFrame(ttk.Frame):
         self.task_tree.column("Priority", width=100)
         
         self.task_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.task_tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.task_tree.configure(yscrollcommand=scrollbar.set)
+        self.task_tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.task_tree.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+        self.task_tree.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self.task_tree.bind("<Configure>", lambda event: self._render_window())
         
         # Automatyczne odświeżanie listy zadań co 1 sekundę
         def auto_refresh_task_list():
@@ -53,35 +96,124 @@ class TaskListFrame(ttk.Frame):
             self.master.after(1000, auto_refresh_task_list)
         auto_refresh_task_list()
     
+    def visible_rows(self):
+        try:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            row_height = 20
+        header = 25
+        return max(self.MIN_VISIBLE_ROWS, (self.task_tree.winfo_height() - header) // row_height)
+    
+    def _row_values(self, task):
+        agent_name = "None"
+        if task.assignee_id and task.assignee_id in self.office_simulation.agents:
+            agent_name = self.office_simulation.agents[task.assignee_id].name
+        status_display = f"{self.STATUS_ICONS.get(task.status.name, '❓')} {task.status.name}"
+        return (task.id[:8] + "...", task.title, status_display, agent_name, task.priority.name)
+    
+    def _reload_order(self):
+        self.order = list(self.office_simulation.tasks)
+        self.positions = {task_id: index for index, task_id in enumerate(self.order)}
+    
     def refresh_tasks(self):
-        # Clear the list
-        for item in self.task_tree.get_children():
-            self.task_tree.delete(item)
+        tasks = self.office_simulation.tasks
+        version, changed = self.office_simulation.task_changes.since(self.version)
+        self.version = version
+        if changed is None or len(tasks) < len(self.order):
+            # Task set replaced (e.g. state loaded) - redraw from scratch
+            self._reload_order()
+            self.rows.clear()
+            self._render_window(force=True)
+            return
+        if len(tasks) > len(self.order):
+            # New tasks are appended to the office dict, so only the tail is new
+            for task_id in list(tasks)[len(self.order):]:
+                self.positions[task_id] = len(self.order)
+                self.order.append(task_id)
+        for task_id in changed:
+            if task_id in self.rows and task_id in tasks:
+                values = self._row_values(tasks[task_id])
+                if values != self.rows[task_id]:
+                    self.rows[task_id] = values
+                    self.task_tree.item(task_id, values=values)
+        self._render_window()
+    
+    def _render_window(self, force=False):
+        # Materialize only the rows in [offset, offset + visible rows)
+        rows = self.visible_rows()
+        self.offset = max(0, min(self.offset, len(self.order) - rows))
+        wanted = self.order[self.offset:self.offset + rows]
+        if force or wanted != list(self.rows):
+            tasks = self.office_simulation.tasks
+            self.task_tree.delete(*self.task_tree.get_children())
+            rendered = {}
+            for task_id in wanted:
+                task = tasks.get(task_id)
+                if task is None:
+                    continue
+                rendered[task_id] = self.rows.get(task_id) or self._row_values(task)
+                self.task_tree.insert("", "end", iid=task_id, values=rendered[task_id])
+            self.rows = rendered
+        total = max(1, len(self.order))
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + rows) / total))
+    
+    def scroll_to(self, offset):
+        self.offset = max(0, offset)
+        self._render_window()
+    
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.order)))
+        elif action == "scroll":
+            step = self.visible_rows() if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+    
+    def _on_mousewheel(self, event):
+        self.scroll_to(self.offset - int(event.delta / 120) * 3)
+        return "break"
+
+class LogHistoryWindow:
+    """Pages back through log lines that no longer fit in the main window's panes."""
+
+    PAGE_SIZE = 200
+
+    def __init__(self, parent, logs):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Log History")
+        self.window.geometry("900x600")
+        self.logs = logs  # pane name -> RingLog
+        self.page = 0
         
-        # Add tasks
-        for task in self.office_simulation.tasks.values():
-            agent_name = "None"
-            if task.assignee_id and task.assignee_id in self.office_simulation.agents:
-                agent_name = self.office_simulation.agents[task.assignee_id].name
-            
-            # Status icons
-            status_icons = {
-                "PENDING": "⏳",
-                "IN_PROGRESS": "🔄", 
-                "COMPLETED": "✅",
-                "FAILED": "❌",
-                "BLOCKED": "🚫"
-            }
-            
-            status_display = f"{status_icons.get(task.status.name, '❓')} {task.status.name}"
-            
-            self.task_tree.insert("", "end", values=(
-                task.id[:8] + "...",
-                task.title,
-                status_display,
-                agent_name,
-                task.priority.name
-            ))
+        top = ttk.Frame(self.window)
+        top.pack(fill=tk.X, padx=10, pady=5)
+        self.log_combo = ttk.Combobox(top, values=list(logs), state="readonly", width=20)
+        self.log_combo.current(0)
+        self.log_combo.bind("<<ComboboxSelected>>", lambda event: self.show_page(0))
+        self.log_combo.pack(side=tk.LEFT, padx=5)
+        ttk.Button(top, text="◀ Older", command=lambda: self.show_page(self.page + 1)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top, text="Newer ▶", command=lambda: self.show_page(self.page - 1)).pack(side=tk.LEFT, padx=5)
+        self.page_label = ttk.Label(top, text="")
+        self.page_label.pack(side=tk.LEFT, padx=10)
+        ttk.Button(top, text="Close", command=self.window.destroy).pack(side=tk.RIGHT, padx=5)
+        
+        self.text_widget = scrolledtext.ScrolledText(self.window, wrap=tk.WORD, font=("Consolas", 9))
+        self.text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.show_page(0)
+    
+    def show_page(self, page):
+        if page < 0:
+            return
+        lines = self.logs[self.log_combo.get()].history(page, self.PAGE_SIZE)
+        if not lines and page > 0:
+            return  # Nie ma starszych wpisów
+        self.page = page
+        self.page_label.config(text=f"Page {page + 1} (older lines from disk)" if lines else "No older lines")
+        self.text_widget.config(state="normal")
+        self.text_widget.delete("1.0", tk.END)
+        self.text_widget.insert(tk.END, "\n".join(lines))
+        self.text_widget.config(state="disabled")
+        self.text_widget.see(tk.END)
+
 
 class ResultsWindow:
     def __init__(self, parent, office_simulation):
@@ -237,9 +369,7 @@ class CodeResultsWindow:
             if hasattr(self, 'js_text') and self.js_text.winfo_exists():
                 self.js_text.delete("1.0", tk.END)
             
-            # Debug info
-            print(f"DEBUG: show_code - task.results keys: {list(task.results.keys())}")
-            print(f"DEBUG: show_code - task.results: {task.results}")
+            code_log.debug("show_code task=%s results=%s", task.id, task.results.keys())
             
             # Szukaj kodu QWEN3 FINAL CODE od Integratora
             integrator_id = None
@@ -248,20 +378,19 @@ class CodeResultsWindow:
                     integrator_id = agent_id
                     break
             
-            print(f"DEBUG: show_code - integrator_id: {integrator_id}")
-            print(f"DEBUG: show_code - task.results keys: {list(task.results.keys())}")
+            code_log.debug("show_code integrator_id=%s", integrator_id)
             
             qwen3_code = None
             if integrator_id and integrator_id in task.results:
                 integrator_result = task.results[integrator_id]
-                print(f"DEBUG: show_code - Integrator result: {integrator_result[:500]}...")  # First 500 chars
+                code_log.debug("show_code integrator result: %.500s", integrator_result)
                 if "=== QWEN3 FINAL CODE ===" in integrator_result:
                     qwen3_code = integrator_result.split("=== QWEN3 FINAL CODE ===", 1)[1]
-                    print(f"DEBUG: show_code - Found QWEN3 code block: {qwen3_code[:200]}...")  # First 200 chars
+                    code_log.debug("show_code found QWEN3 code block: %.200s", qwen3_code)
                 else:
-                    print(f"DEBUG: show_code - No QWEN3 FINAL CODE block found in Integrator result")
+                    code_log.debug("show_code: no QWEN3 FINAL CODE block in integrator result")
             else:
-                print(f"DEBUG: show_code - No Integrator result found")
+                code_log.debug("show_code: no integrator result")
                 # Sprawdź czy Integrator ma inne ID
                 for agent_id, result in task.results.items():
                     if agent_id in self.office_simulation.agents:
@@ -269,10 +398,10 @@ class CodeResultsWindow:
                         if agent.role == "Integrator (Coordinator)":
                             integrator_id = agent_id
                             integrator_result = result
-                            print(f"DEBUG: show_code - Found Integrator with different ID: {integrator_id}")
+                            code_log.debug("show_code found integrator with different id: %s", integrator_id)
                             if "=== QWEN3 FINAL CODE ===" in integrator_result:
                                 qwen3_code = integrator_result.split("=== QWEN3 FINAL CODE ===", 1)[1]
-                                print(f"DEBUG: show_code - Found QWEN3 code block: {qwen3_code[:200]}...")
+                                code_log.debug("show_code found QWEN3 code block: %.200s", qwen3_code)
                             break
             if qwen3_code:
                 html = self._extract_qwen3_block(qwen3_code, "HTML CODE")
@@ -532,6 +661,18 @@ class CodeResultsWindow:
                 messagebox.showerror("Error", f"Could not save file: {e}")
 
 class OfficeGUI:
+    # Kanał aktualizacji z wątków symulacji: metody update_* tylko dopisują do
+    # kolejki (deque.append jest atomowe, bez blokad), a wątek Tk opróżnia ją
+    # co UPDATE_INTERVAL_MS - jeden zapis do każdego pola tekstowego na klatkę
+    UPDATE_INTERVAL_MS = 50
+    MAX_UPDATES_PER_FRAME = 5000
+    # Panele logów trzymają najwyżej tyle linii; starsze trafiają do plików w LOG_DIR
+    LOG_LINE_CAP = int(os.environ.get("AIOFFICE_LOG_LINES", DEFAULT_MAX_LINES))
+    LOG_DIR = os.environ.get("AIOFFICE_LOG_DIR", DEFAULT_LOG_DIR)
+    # Wykresy: najwyżej CHART_FPS przerysowań na sekundę i tylko gdy okno jest widoczne
+    CHART_FPS = 2
+    CHART_COLORS = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#a8e6cf', '#dcedc1', '#ffd3b6', '#ffaaa5', '#ff8b94']
+
     def __init__(self, master, office_simulation, Agent, TaskPriority, asyncio, TaskStatus):
         self.master = master
         self.master.title("AI Agents Company Simulation")
@@ -554,6 +695,14 @@ class OfficeGUI:
         self.code_results_window = None
         self.results_notebook = None  # Dodamy notebook na wyniki/kod
         
+        self._updates = deque()  # (kind, args) od dowolnego wątku
+        self._charts_dirty = False  # Wykresy przerysowywane najwyżej raz na klatkę
+        self._chart_drawn_at = {}  # chart -> time.monotonic() of the last draw
+        self.logs = {
+            name: RingLog(self.LOG_LINE_CAP, os.path.join(self.LOG_DIR, f"{name}.log"))
+            for name in ("communication", "conference", "status")
+        }
+        
         # Communication Log Frame - musi być przed setup_ui()
         self.communication_frame = ttk.LabelFrame(self.master, text="Communication Log")
         self.communication_frame.grid(row=2, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
@@ -584,11 +733,9 @@ class OfficeGUI:
         self.master.rowconfigure(5, weight=2) # Nowa linia dla notebook
         
         self.setup_ui()
-        if MATPLOTLIB_AVAILABLE:
-            self.setup_charts()
-            self.setup_task_status_chart() # Initialize the new chart window
-        else:
-            self.chart_window = None
+        # Okna wykresów powstają przy pierwszym "Show Charts" (wtedy też ładuje się matplotlib)
+        self.chart_window = None
+        self.task_status_chart_window = None
         
         # Add startup message to Communication Log
         self.update_communication_log("🚀 AI Agents Company program has been started")
@@ -597,10 +744,97 @@ class OfficeGUI:
         # Add startup message to Conference Room
         self.update_conference_room("🎤 Conference Room opened - agents can communicate here")
         self.update_conference_room("💬 Watch agents discuss tasks and collaborate in real-time")
+        
+        self._drain_updates()
+    
+    def _post(self, kind, *args):
+        """Queue a GUI update; safe to call from any thread."""
+        self._updates.append((kind, args))
+    
+    def _drain_updates(self):
+        try:
+            self._apply_updates()
+        except Exception as e:
+            print(f"Błąd podczas aktualizacji GUI: {e}")
+        self.master.after(self.UPDATE_INTERVAL_MS, self._drain_updates)
+    
+    def _apply_updates(self):
+        """Apply queued updates on the Tk thread, coalescing text per widget."""
+        lines = {"communication": [], "conference": [], "status": []}
+        for _ in range(min(len(self._updates), self.MAX_UPDATES_PER_FRAME)):
+            kind, args = self._updates.popleft()
+            if kind in lines:
+                lines[kind].append(args[0])
+            elif kind == "start_work":
+                self._start_agent_work(*args)
+            elif kind == "stop_work":
+                self._stop_agent_work(*args)
+            elif kind == "activity":
+                self.agent_activity[args[0]] += 1
+                self._start_agent_work(*args)
+        if lines["communication"]:
+            self._write_communication_log("".join(lines["communication"]))
+        if lines["conference"]:
+            self._write_conference_room("".join(lines["conference"]))
+        if lines["status"]:
+            self._write_task_status(lines["status"])
+        if self.working_agents:
+            self._charts_dirty = True  # Czas pracy rośnie, więc wykres kołowy się zmienia
+        if self._charts_dirty:
+            self._charts_dirty = not self._redraw_charts()
+    
+    def _chart_visible(self, window):
+        try:
+            return window is not None and bool(window.winfo_exists()) and window.state() != "withdrawn"
+        except tk.TclError:
+            return False
+    
+    def _chart_due(self, chart):
+        now = time.monotonic()
+        if now - self._chart_drawn_at.get(chart, 0.0) < 1.0 / self.CHART_FPS:
+            return False
+        self._chart_drawn_at[chart] = now
+        return True
+    
+    def _redraw_charts(self):
+        """Redraw the visible charts; False while one waits for its next frame (hidden ones are drawn when shown)."""
+        done = True
+        for chart, window, update in (
+            ("work", getattr(self, 'chart_window', None), lambda: self.update_charts(0)),
+            ("status", getattr(self, 'task_status_chart_window', None), self.update_task_status_chart),
+        ):
+            if not self._chart_visible(window):
+                continue
+            if self._chart_due(chart):
+                update()
+            else:
+                done = False
+        return done
+    
+    @staticmethod
+    def _blit(canvas, figure, background, artists):
+        """Draw only the changing artists over the saved background."""
+        canvas.restore_region(background)
+        for artist in artists:
+            figure.draw_artist(artist)
+        canvas.blit(figure.bbox)
+    
+    def _append_to_pane(self, name, widget, text):
+        """Insert text at the end of a log pane, keeping at most LOG_LINE_CAP lines in it."""
+        log = self.logs[name]
+        log.extend(text.rstrip("\n").split("\n"))
+        widget.config(state="normal")
+        widget.insert(tk.END, text)
+        excess = int(widget.index("end-1c").split(".")[0]) - 1 - log.max_lines
+        if excess > 0:
+            widget.delete("1.0", f"{excess + 1}.0")
+        widget.config(state="disabled")
+        widget.see(tk.END)
     
     def setup_charts(self):
         if not MATPLOTLIB_AVAILABLE:
             return
+        _load_matplotlib()
         # Charts window - initially hidden
         self.chart_window = tk.Toplevel(self.master)
         self.chart_window.title("Agent Work Time Distribution")
@@ -609,7 +843,12 @@ class OfficeGUI:
         self.fig, self.ax1 = plt.subplots(1, 1, figsize=(7, 6))
         self.canvas = FigureCanvasTkAgg(self.fig, self.chart_window)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        self.ani = animation.FuncAnimation(self.fig, self.update_charts, interval=2000, save_count=100)
+        # Zmienne elementy wykresu (animated) rysujemy przez blitting na zapamiętanym tle;
+        # pełne przerysowanie tylko gdy zmieni się lista agentów albo rozmiar okna
+        self._pie_names = None
+        self._pie_artists = []
+        self._pie_background = None
+        self.canvas.mpl_connect('draw_event', self._on_work_chart_draw)
         try:
             self.update_charts(0)
             self.master.update()
@@ -617,114 +856,165 @@ class OfficeGUI:
             print(f"Chart error: {e}")
         self.chart_window.withdraw()
 
+    def _on_work_chart_draw(self, event):
+        self._pie_background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._pie_artists:
+            self.fig.draw_artist(artist)
+
     def update_charts(self, frame):
         if not MATPLOTLIB_AVAILABLE or not hasattr(self, 'ax1'):
             return
         self.update_work_time()
-        self.ax1.clear()
         agent_names = list(self.agent_work_time.keys())
         agent_times = list(self.agent_work_time.values())
-        colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#a8e6cf', '#dcedc1', '#ffd3b6', '#ffaaa5', '#ff8b94']
         
-        # Debug info - tylko w terminalu, nie w Communication Log
-        debug_msg1 = f"DEBUG: update_charts - agent_names: {agent_names}"
-        debug_msg2 = f"DEBUG: update_charts - agent_times: {agent_times}"
-        debug_msg3 = f"DEBUG: update_charts - sum(agent_times): {sum(agent_times)}"
-        debug_msg4 = f"DEBUG: update_charts - working_agents: {self.working_agents}"
-        debug_msg5 = f"DEBUG: update_charts - agent_start_time: {self.agent_start_time}"
-        print(debug_msg1)
-        print(debug_msg2)
-        print(debug_msg3)
-        print(debug_msg4)
-        print(debug_msg5)
-        # Usuń logi debugów z Communication Log - tylko w terminalu
+        if chart_log.isEnabledFor(logging.DEBUG):
+            chart_log.debug("update_charts", extra=fields(agents=agent_names, times=agent_times, working=sorted(self.working_agents)))
         
-        if agent_names and sum(agent_times) > 0:
-            total_time = sum(agent_times)
-            wedges, texts, autotexts = self.ax1.pie(agent_times, labels=None, autopct='%1.1f%%', colors=colors[:len(agent_names)], startangle=90)
+        has_data = bool(agent_names) and sum(agent_times) > 0
+        if has_data and agent_names == self._pie_names and self._pie_background is not None:
+            self._update_work_chart(agent_times)
+            self._blit(self.canvas, self.fig, self._pie_background, self._pie_artists)
+        else:
+            self._draw_work_chart(agent_names if has_data else None, agent_times)
+
+    def _work_info_text(self, total_time):
+        return f'Total Work Time: {total_time / 60:.1f} min\nCurrently Working: {len(self.working_agents)} agents'
+
+    def _draw_work_chart(self, agent_names, agent_times):
+        """Full redraw of the pie chart (new agents, first draw, no data)."""
+        self.ax1.clear()
+        self._pie_artists = []
+        self._pie_names = agent_names
+        if agent_names:
+            wedges, texts, autotexts = self.ax1.pie(agent_times, labels=None, autopct='%1.1f%%', colors=self.CHART_COLORS[:len(agent_names)], startangle=90)
             self.ax1.set_title('Agent Work Time Distribution (%)', fontsize=14, fontweight='bold')
             self.ax1.legend(wedges, agent_names, title="Agents", loc="center left", bbox_to_anchor=(1, 0.5))
             for autotext in autotexts:
                 autotext.set_fontweight('bold')
-            total_minutes = total_time / 60
-            working_count = len(self.working_agents)
-            info_text = f'Total Work Time: {total_minutes:.1f} min\nCurrently Working: {working_count} agents'
-            self.ax1.text(0.02, 0.98, info_text, transform=self.ax1.transAxes, fontsize=10, verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+            info = self.ax1.text(0.02, 0.98, self._work_info_text(sum(agent_times)), transform=self.ax1.transAxes, fontsize=10, verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+            self._pie_wedges, self._pie_labels, self._pie_info = wedges, autotexts, info
+            self._pie_artists = [*wedges, *autotexts, info]
+            for artist in self._pie_artists:
+                artist.set_animated(True)
         else:
             self.ax1.text(0.5, 0.5, 'No agent work time yet', ha='center', va='center', transform=self.ax1.transAxes, fontsize=12)
             self.ax1.set_title('Agent Work Time Distribution (%)', fontsize=14, fontweight='bold')
         self.fig.tight_layout()
-        self.canvas.draw()
+        self.canvas.draw()  # draw_event zapamiętuje tło i rysuje zmienne elementy
+
+    def _update_work_chart(self, agent_times):
+        """Move the existing wedges and labels to the new shares (same layout as ax.pie)."""
+        total_time = sum(agent_times)
+        angle = 90.0  # startangle
+        for wedge, label, work_time in zip(self._pie_wedges, self._pie_labels, agent_times):
+            share = work_time / total_time
+            wedge.set_theta1(angle)
+            wedge.set_theta2(angle + 360 * share)
+            middle = math.radians(angle + 180 * share)
+            label.set_position((0.6 * math.cos(middle), 0.6 * math.sin(middle)))  # pctdistance=0.6
+            label.set_text(f'{share * 100:.1f}%')
+            angle += 360 * share
+        self._pie_info.set_text(self._work_info_text(total_time))
 
     def setup_task_status_chart(self):
         if not MATPLOTLIB_AVAILABLE:
             return
+        _load_matplotlib()
         self.task_status_chart_window = tk.Toplevel(self.master)
         self.task_status_chart_window.title("Task Status Distribution")
         self.task_status_chart_window.geometry("600x400")
         self.status_fig, self.status_ax = plt.subplots(1, 1, figsize=(7, 4))
         self.status_canvas = FigureCanvasTkAgg(self.status_fig, self.task_status_chart_window)
         self.status_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self._status_names = None
+        self._status_artists = []
+        self._status_background = None
+        self.status_canvas.mpl_connect('draw_event', self._on_status_chart_draw)
         self.update_task_status_chart()
         self.task_status_chart_window.withdraw()
 
+    def _on_status_chart_draw(self, event):
+        self._status_background = self.status_canvas.copy_from_bbox(self.status_fig.bbox)
+        for artist in self._status_artists:
+            self.status_fig.draw_artist(artist)
+
     def update_task_status_chart(self):
         if not MATPLOTLIB_AVAILABLE or not hasattr(self, 'status_ax'):
             return
-        self.status_ax.clear()
         status_names = list(self.task_status_counts.keys())
         status_counts = list(self.task_status_counts.values())
-        if status_names and sum(status_counts) > 0:
+        has_data = bool(status_names) and sum(status_counts) > 0
+        # W miejscu tylko gdy te same słupki mieszczą się w obecnej skali osi Y
+        if (has_data and status_names == self._status_names and self._status_background is not None
+                and max(status_counts) + 0.5 <= self.status_ax.get_ylim()[1]):
+            self._update_status_chart(status_counts)
+            self._blit(self.status_canvas, self.status_fig, self._status_background, self._status_artists)
+        else:
+            self._draw_status_chart(status_names if has_data else None, status_counts)
+
+    def _draw_status_chart(self, status_names, status_counts):
+        """Full redraw of the task status bars."""
+        self.status_ax.clear()
+        self._status_artists = []
+        self._status_names = status_names
+        if status_names:
             total_status = sum(status_counts)
-            percentages = [(count / total_status) * 100 for count in status_counts]
             bars = self.status_ax.bar(status_names, status_counts, color='#ff9999')
             self.status_ax.set_title('Task Status Distribution', fontsize=14, fontweight='bold')
             self.status_ax.set_ylabel('Number of Tasks', fontsize=12)
             self.status_ax.set_xlabel('Status', fontsize=12)
-            for i, (bar, percentage) in enumerate(zip(bars, percentages)):
+            labels = []
+            for bar, count in zip(bars, status_counts):
                 height = bar.get_height()
-                self.status_ax.text(bar.get_x() + bar.get_width()/2., height + 0.1, f'{percentage:.1f}%', ha='center', va='bottom', fontweight='bold')
+                labels.append(self.status_ax.text(bar.get_x() + bar.get_width()/2., height + 0.1, f'{count / total_status * 100:.1f}%', ha='center', va='bottom', fontweight='bold'))
             self.status_ax.tick_params(axis='x', rotation=45)
+            # Zapas na wzrost liczników bez zmiany skali (i bez pełnego przerysowania)
+            self.status_ax.set_ylim(0, max(status_counts) * 1.5 + 1)
+            self._status_bars, self._status_labels = bars, labels
+            self._status_artists = [*bars, *labels]
+            for artist in self._status_artists:
+                artist.set_animated(True)
         else:
             self.status_ax.text(0.5, 0.5, 'No tasks yet', ha='center', va='center', transform=self.status_ax.transAxes, fontsize=12)
             self.status_ax.set_title('Task Status Distribution', fontsize=14, fontweight='bold')
         self.status_fig.tight_layout()
         self.status_canvas.draw()
 
+    def _update_status_chart(self, status_counts):
+        total_status = sum(status_counts)
+        for bar, label, count in zip(self._status_bars, self._status_labels, status_counts):
+            bar.set_height(count)
+            label.set_position((bar.get_x() + bar.get_width()/2., count + 0.1))
+            label.set_text(f'{count / total_status * 100:.1f}%')
+
     def update_agent_activity(self, agent_name):
         """Aktualizuje licznik aktywności agenta i rozpoczyna liczenie czasu pracy"""
-        self.agent_activity[agent_name] += 1
-        self.start_agent_work(agent_name)
+        self._post("activity", agent_name, time.time())
     
     def start_agent_work(self, agent_name):
         """Start counting work time for an agent"""
+        self._post("start_work", agent_name, time.time())
+    
+    def stop_agent_work(self, agent_name):
+        """Stop counting work time for an agent"""
+        self._post("stop_work", agent_name, time.time())
+    
+    def _start_agent_work(self, agent_name, current_time):
         try:
-            current_time = time.time()
             self.agent_start_time[agent_name] = current_time
             self.working_agents.add(agent_name)
             
-            # Debug info
-            debug_msg1 = f"DEBUG: start_agent_work - {agent_name} added to working_agents: {self.working_agents}"
-            debug_msg2 = f"DEBUG: start_agent_work - agent_start_time: {self.agent_start_time}"
-            debug_msg3 = f"DEBUG: start_agent_work - agent_work_time: {self.agent_work_time}"
-            print(debug_msg1)
-            print(debug_msg2)
-            print(debug_msg3)
+            work_log.debug("start_agent_work %s working=%s", agent_name, self.working_agents)
             
-            # Update charts if available
-            if hasattr(self, 'update_charts'):
-                self.update_charts(0)
-            if hasattr(self, 'update_task_status_chart'):
-                self.update_task_status_chart()
+            self._charts_dirty = True
                 
         except Exception as e:
             print(f"Error starting agent work: {e}")
     
-    def stop_agent_work(self, agent_name):
-        """Stop counting work time for an agent"""
+    def _stop_agent_work(self, agent_name, end_time):
         try:
             if agent_name in self.agent_start_time:
-                end_time = time.time()
                 start_time = self.agent_start_time[agent_name]
                 work_duration = end_time - start_time
                 
@@ -736,19 +1026,10 @@ class OfficeGUI:
                 # Remove from working agents
                 self.working_agents.discard(agent_name)
                 
-                # Debug info
-                debug_msg1 = f"DEBUG: stop_agent_work - {agent_name} work duration: {work_duration:.2f}s"
-                debug_msg2 = f"DEBUG: stop_agent_work - Total work time for {agent_name}: {self.agent_work_time[agent_name]:.2f}s"
-                debug_msg3 = f"DEBUG: stop_agent_work - Working agents: {self.working_agents}"
-                print(debug_msg1)
-                print(debug_msg2)
-                print(debug_msg3)
+                work_log.debug("stop_agent_work %s duration=%.2fs total=%.2fs working=%s", agent_name,
+                               work_duration, self.agent_work_time[agent_name], self.working_agents)
                 
-                # Update charts if available
-                if hasattr(self, 'update_charts'):
-                    self.update_charts(0)
-                if hasattr(self, 'update_task_status_chart'):
-                    self.update_task_status_chart()
+                self._charts_dirty = True
                     
         except Exception as e:
             print(f"Error stopping agent work: {e}")
@@ -765,10 +1046,8 @@ class OfficeGUI:
         
         self.last_update_time = current_time
         
-        # Debug info
         if self.working_agents:
-            print(f"DEBUG: update_work_time - working_agents: {self.working_agents}")
-            print(f"DEBUG: update_work_time - agent_work_time: {self.agent_work_time}")
+            work_log.debug("update_work_time working=%s work_time=%s", self.working_agents, self.agent_work_time)
     
     def get_agent_work_time_percentage(self):
         """Oblicza procent czasu pracy każdego agenta"""
@@ -785,8 +1064,7 @@ class OfficeGUI:
     
     def update_task_status_counts(self):
         self.task_status_counts.clear()
-        for task in self.office_simulation.tasks.values():
-            self.task_status_counts[task.status.name] += 1
+        self.task_status_counts.update(self.office_simulation.task_status_counts())
     
     def get_agent_work_percentage(self):
         """Calculate percentage of work done by each agent"""
@@ -952,6 +1230,8 @@ class OfficeGUI:
         reset_btn.grid(row=0, column=5, padx=5)
         conference_clear_btn = ttk.Button(button_frame, text="Clear Conference Room", command=self.clear_conference_room)
         conference_clear_btn.grid(row=0, column=6, padx=5)
+        history_btn = ttk.Button(button_frame, text="Log History", command=self.show_log_history)
+        history_btn.grid(row=0, column=8, padx=5)
         self.master.columnconfigure(0, weight=1)
         self.master.columnconfigure(1, weight=1)
         self.master.rowconfigure(0, weight=0)
@@ -990,23 +1270,22 @@ class OfficeGUI:
     
     async def submit_task_async(self, title, description, priority):
         result = await self.office_simulation.submit_task(title, description, priority)
+        # Lista tasków odświeży się razem ze statusem (w wątku Tk)
         self.update_task_status(f"Task Submission Result: {result}")
-        # Odśwież listę tasków po dodaniu
-        self.task_list.refresh_tasks()
     
     def update_task_status(self, status):
-        # Enable text widget for editing
-        self.task_status_text.config(state="normal")
-        self.task_status_text.insert(tk.END, status + "\n")
-        # Dodaj graficzne podsumowanie pracy agentów, jeśli status dotyczy zakończonego zadania
-        if status.startswith("✅ Task") or status.startswith("\n=== FINAL REPORT ==="):
-            summary = self._generate_agents_summary()
-            if summary:
-                self.task_status_text.insert(tk.END, summary + "\n")
-        # Disable text widget to prevent user editing
-        self.task_status_text.config(state="disabled")
-        # Ensure we can see the latest text
-        self.task_status_text.see(tk.END)
+        self._post("status", status)
+    
+    def _write_task_status(self, statuses):
+        text = []
+        for status in statuses:
+            text.append(status + "\n")
+            # Dodaj graficzne podsumowanie pracy agentów, jeśli status dotyczy zakończonego zadania
+            if status.startswith("✅ Task") or status.startswith("\n=== FINAL REPORT ==="):
+                summary = self._generate_agents_summary()
+                if summary:
+                    text.append(summary + "\n")
+        self._append_to_pane("status", self.task_status_text, "".join(text))
         # Force update of scrollbar
         self._refresh_scrollbars()
         # Aktualizuj wykresy
@@ -1017,20 +1296,16 @@ class OfficeGUI:
         self.task_list.refresh_tasks()
         # Przewiń na dół
         self.task_status_text.yview_moveto(1.0)
-        # Odśwież wykresy
-        if hasattr(self, 'update_charts'):
-            self.update_charts(0)
-        if hasattr(self, 'update_task_status_chart'):
-            self.update_task_status_chart()
+        # Odśwież wykresy (raz na klatkę)
+        self._charts_dirty = True
 
     def _generate_agents_summary(self):
         """Tworzy krótkie, graficzne podsumowanie pracy agentów (RoboAssist)"""
         if not hasattr(self, 'office_simulation') or not self.office_simulation:
             return ""
-        completed_tasks = [task for task in self.office_simulation.tasks.values() if task.status.name == "COMPLETED"]
-        if not completed_tasks:
+        latest_task = self.office_simulation.latest_completed_task()
+        if not latest_task:
             return ""
-        latest_task = max(completed_tasks, key=lambda t: t.completed_at or 0)
         summary = "\n🤖 RoboAssist: Podsumowanie pracy zespołu:\n"
         agent_icons = {
             "Web Developer": "💻",
@@ -1064,31 +1339,27 @@ class OfficeGUI:
         self.master.after(200, lambda: self.task_status_text.config(bg=original_bg))
     
     def update_communication_log(self, message):
+        # Filtruj wiadomości - pokazuj tylko najważniejsze w Communication Log
+        if any(keyword in message for keyword in [
+            "💭", "<think>", "🚀", "✅", "🔄", "📋", "📝", "🎉", "🤖"
+        ]):
+            # To są ważne logi - pokaż w Communication Log (z timestampem nadania)
+            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+            self._post("communication", f"[{timestamp}] {message}\n")
+        else:
+            # To są debugi - tylko w logu
+            comm_log.debug("%s", message)
+    
+    def _write_communication_log(self, text):
         try:
             # Sprawdź czy widget istnieje
             if not hasattr(self, 'communication_text') or not self.communication_text.winfo_exists():
-                print(f"DEBUG: communication_text not available: {message}")
+                comm_log.warning("communication_text not available: %s", text)
                 return
-                
-            # Dodaj timestamp
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+            self._append_to_pane("communication", self.communication_text, text)
             
-            # Filtruj wiadomości - pokazuj tylko najważniejsze w Communication Log
-            if any(keyword in message for keyword in [
-                "💭", "<think>", "🚀", "✅", "🔄", "📋", "📝", "🎉", "🤖"
-            ]):
-                # To są ważne logi - pokaż w Communication Log
-                self.communication_text.config(state="normal")
-                self.communication_text.insert(tk.END, f"[{timestamp}] {message}\n")
-                self.communication_text.config(state="disabled")
-                self.communication_text.see(tk.END)
-                
-                # Animacja przy komunikacji
-                self.animate_communication()
-            else:
-                # To są debugi - pokaż tylko w terminalu
-                print(f"TERMINAL: {message}")
+            # Animacja przy komunikacji
+            self.animate_communication()
             
         except Exception as e:
             print(f"Błąd podczas aktualizacji Communication Log: {e}")
@@ -1105,11 +1376,8 @@ class OfficeGUI:
                     self.communication_frame.columnconfigure(0, weight=1)
                     self.communication_frame.rowconfigure(0, weight=1)
                     
-                    # Spróbuj ponownie dodać wiadomość
-                    self.communication_text.config(state="normal")
-                    self.communication_text.insert(tk.END, f"[{timestamp}] {message}\n")
-                    self.communication_text.config(state="disabled")
-                    self.communication_text.see(tk.END)
+                    # Spróbuj ponownie dodać wiadomości
+                    self._append_to_pane("communication", self.communication_text, text)
             except Exception as e2:
                 print(f"Nie udało się utworzyć communication_text: {e2}")
     
@@ -1120,30 +1388,30 @@ class OfficeGUI:
         self.master.after(300, lambda: self.communication_text.config(bg=original_bg))
 
     def update_conference_room(self, message):
-        print(f"DEBUG: update_conference_room wywołane z message: {message}")
+        comm_log.debug("update_conference_room: %s", message)
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        self._post("conference", f"[{timestamp}] {message}\n")
+    
+    def _write_conference_room(self, text):
         try:
             if not hasattr(self, 'conference_text') or not self.conference_text.winfo_exists():
-                print(f"DEBUG: conference_text not available: {message}")
+                comm_log.warning("conference_text not available: %s", text)
                 return
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-            self.conference_text.config(state="normal")
-            self.conference_text.insert(tk.END, f"[{timestamp}] {message}\n")
-            self.conference_text.config(state="disabled")
-            self.conference_text.see(tk.END)
+            self._append_to_pane("conference", self.conference_text, text)
         except Exception as e:
             print(f"Błąd podczas aktualizacji Conference Room: {e}")
 
     def save_state(self):
-        filename = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        filename = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json"), ("Binary state", "*.aio")])
         if filename:
             self.office_simulation.save_all(filename)
             self.update_task_status(f"Stan zapisany do pliku: {filename}")
 
     def load_state(self):
-        filename = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+        filename = filedialog.askopenfilename(filetypes=[("JSON files", "*.json"), ("Binary state", "*.aio"), ("All files", "*.*")])
         if filename:
-            self.office_simulation.load_all(filename)
+            # Pliki binarne są mapowane do pamięci, wyniki tasków wczytują się dopiero przy podglądzie
+            self.office_simulation.load_all(filename, lazy=True)
             self.update_task_status(f"Stan wczytany z pliku: {filename}")
             # Odśwież info o agentach
             agent_info = "\n".join([f"{agent.name} ({agent.role}): {agent.skills}" for agent in self.office_simulation.agents.values()])
@@ -1153,17 +1421,24 @@ class OfficeGUI:
     
     def show_results(self):
         # Show window with results of the latest completed task
-        completed_tasks = [task for task in self.office_simulation.tasks.values() if task.status == self.TaskStatus.COMPLETED]
-        if completed_tasks:
-            latest_task = max(completed_tasks, key=lambda t: t.completed_at or 0)
+        latest_task = self.office_simulation.latest_completed_task()
+        if latest_task:
             if not self.results_window:
                 self.results_window = ResultsWindow(self.master, self.office_simulation)
             self.results_window.show_results(latest_task)
         else:
             messagebox.showinfo("No Results", "There are no completed tasks yet.")
     
+    def _charts_unavailable(self):
+        if MATPLOTLIB_AVAILABLE:
+            return False
+        self.update_task_status("📉 Matplotlib nie jest zainstalowany - wykresy są wyłączone (pip install matplotlib)")
+        return True
+
     def show_charts(self):
         # Show activity charts window
+        if self._charts_unavailable():
+            return
         if not self.chart_window or not self.chart_window.winfo_exists():
             self.setup_charts()
         self.chart_window.deiconify()
@@ -1173,6 +1448,8 @@ class OfficeGUI:
             self.update_charts(0)
 
     def show_task_status_chart(self):
+        if self._charts_unavailable():
+            return
         if not self.task_status_chart_window or not self.task_status_chart_window.winfo_exists():
             self.setup_task_status_chart()
         self.task_status_chart_window.deiconify()
@@ -1180,28 +1457,10 @@ class OfficeGUI:
 
     def show_code(self):
         # Show window with code generated by CODER agents
-        completed_tasks = [task for task in self.office_simulation.tasks.values() if task.status == self.TaskStatus.COMPLETED]
-        if completed_tasks:
-            # Szukaj taska z Integratorem (ma blok QWEN3 FINAL CODE)
-            integrator_task = None
-            for task in completed_tasks:
-                for agent_id, result in task.results.items():
-                    if '=== QWEN3 FINAL CODE ===' in result:
-                        integrator_task = task
-                        break
-                if integrator_task:
-                    break
-            
-            # Jeśli nie ma taska z Integratorem, weź najnowszy
-            if not integrator_task:
-                integrator_task = max(completed_tasks, key=lambda t: t.completed_at or 0)
-            
-            # DEBUG: sprawdź wszystkie completed tasks
-            print(f"DEBUG: show_code - Wszystkie completed tasks:")
-            for task in completed_tasks:
-                print(f"DEBUG: show_code - Task {task.id}: {task.title} | results keys: {list(task.results.keys())}")
-            print(f"DEBUG: show_code - Wybrany integrator_task: {integrator_task.id} | {integrator_task.title}")
-            print(f"DEBUG: show_code - Integrator task results keys: {list(integrator_task.results.keys())}")
+        # Task z Integratorem (ma blok QWEN3 FINAL CODE), a jeśli go nie ma - najnowszy ukończony
+        integrator_task = self.office_simulation.final_code_task()
+        if integrator_task:
+            code_log.debug("show_code selected task %s | %s results=%s", integrator_task.id, integrator_task.title, integrator_task.results.keys())
             # Twórz nowe okno jeśli nie istnieje lub zostało zamknięte
             if not self.code_results_window or not self.code_results_window.html_text.winfo_exists():
                 self.code_results_window = CodeResultsWindow(self.master, self.office_simulation)
@@ -1211,9 +1470,8 @@ class OfficeGUI:
 
     def show_results_in_main(self):
         # Pokazuje wyniki w zakładce "Wyniki" (bez dodatkowego okna)
-        completed_tasks = [task for task in self.office_simulation.tasks.values() if task.status == self.TaskStatus.COMPLETED]
-        if completed_tasks:
-            latest_task = max(completed_tasks, key=lambda t: t.completed_at or 0)
+        latest_task = self.office_simulation.latest_completed_task()
+        if latest_task:
             self.results_text.config(state="normal")
             self.results_text.delete("1.0", tk.END)
             results_text = f"=== TASK RESULTS: {latest_task.title} ===\n\n"
@@ -1232,18 +1490,8 @@ class OfficeGUI:
 
     def show_code_in_main(self):
         # Pokazuje kod w zakładkach HTML/CSS/JS (bez dodatkowego okna)
-        completed_tasks = [task for task in self.office_simulation.tasks.values() if task.status == self.TaskStatus.COMPLETED]
-        if completed_tasks:
-            integrator_task = None
-            for task in completed_tasks:
-                for agent_id, result in task.results.items():
-                    if '=== QWEN3 FINAL CODE ===' in result:
-                        integrator_task = task
-                        break
-                if integrator_task:
-                    break
-            if not integrator_task:
-                integrator_task = max(completed_tasks, key=lambda t: t.completed_at or 0)
+        integrator_task = self.office_simulation.final_code_task()
+        if integrator_task:
             # Szukaj kodu QWEN3 FINAL CODE
             qwen3_code = None
             for agent_id, result in integrator_task.results.items():
@@ -1275,11 +1523,10 @@ class OfficeGUI:
         self.working_agents.clear()
         self.agent_start_time.clear()
         self.last_update_time = time.time()
-        self.update_task_status("⏰ Work time reset for all agents.")
-        if hasattr(self, 'update_charts'):
-            self.update_charts(0)  # Update charts to reflect reset
-        if hasattr(self, 'update_task_status_chart'):
-            self.update_task_status_chart()
+        self.update_task_status("⏰ Work time reset for all agents.")  # Wykresy odświeżą się w następnej klatce
+
+    def show_log_history(self):
+        LogHistoryWindow(self.master, self.logs)
 
     def clear_conference_room(self):
         """Clear conference room messages"""
@@ -1287,6 +1534,7 @@ class OfficeGUI:
             self.conference_text.config(state="normal")
             self.conference_text.delete("1.0", tk.END)
             self.conference_text.config(state="disabled")
+            self.logs["conference"].clear()
             self.update_communication_log("🗑️ Conference Room cleared")
         except Exception as e:
             print(f"Error clearing conference room: {e}")
@@ -1330,10 +1578,7 @@ class OfficeGUI:
     def _get_ceo_report(self, agent):
         """Return Integrator/CEO coordination work as text"""
         text = "\n=== Integrator Coordination Work ===\n\n"
-        integrator_work = []
-        for task in self.office_simulation.tasks.values():
-            if task.creator_id == agent.id or agent.id in task.results:
-                integrator_work.append(task)
+        integrator_work = self.office_simulation.tasks_involving(agent.id)
         if integrator_work:
             for task in integrator_work:
                 text += f"📋 PROJECT: {task.title}\n"
@@ -1350,10 +1595,7 @@ class OfficeGUI:
     def _get_regular_agent_report(self, agent):
         """Return regular agent tasks as text"""
         text = "\n=== Agent Tasks ===\n\n"
-        agent_tasks = []
-        for task in self.office_simulation.tasks.values():
-            if task.assignee_id == agent.id:
-                agent_tasks.append(task)
+        agent_tasks = self.office_simulation.tasks_for_assignee(agent.id)
         if agent_tasks:
             for task in agent_tasks:
                 text += f"Task: {task.title}\n"
@@ -0,0 +1,175 @@
+"""Run project briefs through the office without the GUI (servers, CI, benchmarks).
+
+    python headless.py briefs.jsonl --out results.jsonl --concurrency 4
+    echo "Bakery website with menu and contact form" | python headless.py -
+
+Briefs are read from a file or stdin ("-"), one per line: either a JSON object
+{"title": ..., "description": ..., "priority": "HIGH"} or plain text used as the
+description (the title is then taken from its first words). Blank lines and
+lines starting with "#" are skipped. Invalid briefs (bad JSON, not an object,
+unknown priority, no text) are reported on stderr and skipped, and the exit
+status is then 1. Each brief goes through
+OfficeSimulation.submit_task; at most --concurrency run at once. Results are
+written as JSON Lines (stdout by default) and a throughput summary goes to stderr.
+Nothing here imports gui.py, tkinter or matplotlib.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from tasks import TaskPriority
+
+TITLE_WORDS = 6
+
+
+class BriefError(ValueError):
+    pass
+
+
+def parse_brief(line: str, index: int) -> Optional[Dict[str, Any]]:
+    """One brief from one input line, None for blank and comment lines; raises BriefError for invalid ones."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith(("{", "[")):
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise BriefError(f"invalid JSON: {e}") from None
+        if not isinstance(data, dict):
+            raise BriefError(f"expected a JSON object, got {type(data).__name__}")
+        for field in ("title", "description", "priority"):
+            if not isinstance(data.get(field, ""), str):
+                raise BriefError(f"{field} must be a string")
+        description = data.get("description") or data.get("title", "")
+        title = data.get("title") or " ".join(description.split()[:TITLE_WORDS])
+        priority = data.get("priority", "MEDIUM")
+    else:
+        description, title, priority = line, " ".join(line.split()[:TITLE_WORDS]), "MEDIUM"
+    if not description.strip():
+        raise BriefError("no title or description")
+    if priority.upper() not in TaskPriority.__members__:
+        raise BriefError(f"unknown priority {priority!r} (one of {', '.join(TaskPriority.__members__)})")
+    return {"index": index, "title": title, "description": description, "priority": TaskPriority[priority.upper()]}
+
+
+def read_briefs(source, errors: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Valid briefs of `source`; invalid ones are skipped and described in `errors` (with line numbers)."""
+    briefs = []
+    for line_number, line in enumerate(source, 1):
+        try:
+            brief = parse_brief(line, len(briefs))
+        except BriefError as e:
+            if errors is None:
+                raise
+            errors.append(f"line {line_number}: {e}")
+            continue
+        if brief:
+            briefs.append(brief)
+    return briefs
+
+
+async def run_briefs(office, briefs: List[Dict[str, Any]], concurrency: int, out) -> List[Dict[str, Any]]:
+    """Submit all briefs (at most `concurrency` at a time) and write one JSON line per finished brief."""
+    semaphore = asyncio.Semaphore(concurrency)
+    records = []
+
+    async def run_one(brief):
+        async with semaphore:
+            started = time.perf_counter()
+            record = {"index": brief["index"], "title": brief["title"], "priority": brief["priority"].name}
+            try:
+                record["result"] = await office.submit_task(brief["title"], brief["description"], brief["priority"])
+                record["ok"] = True
+            except Exception as e:
+                record["ok"] = False
+                record["error"] = f"{type(e).__name__}: {e}"
+            record["elapsed"] = round(time.perf_counter() - started, 3)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            records.append(record)
+
+    bus_task = asyncio.create_task(office.bus.start())
+    process_task_task = asyncio.create_task(office.process_tasks())
+    try:
+        await asyncio.gather(*(run_one(brief) for brief in briefs))
+    finally:
+        bus_task.cancel()
+        process_task_task.cancel()
+        await asyncio.gather(bus_task, process_task_task, return_exceptions=True)
+    return records
+
+
+def summarize(records: List[Dict[str, Any]], wall_time: float, task_count: int) -> str:
+    latencies = sorted(record["elapsed"] for record in records)
+    ok = sum(1 for record in records if record["ok"])
+    lines = [
+        f"Projects: {len(records)} ({ok} ok, {len(records) - ok} failed) in {wall_time:.2f}s",
+        f"Throughput: {len(records) / wall_time * 60 if wall_time else 0.0:.1f} projects/min, {task_count} tasks created",
+    ]
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        lines.append(f"Latency: mean {sum(latencies) / len(latencies):.2f}s, p50 {p50:.2f}s, max {latencies[-1]:.2f}s")
+    return "\n".join(lines)
+
+
+def summarize_spans(metrics) -> str:
+    """Where the time went: total seconds per span type, slowest first."""
+    totals: Dict[str, List[float]] = {}
+    for entry in metrics.summary():
+        total = totals.setdefault(entry["name"], [0, 0.0])
+        total[0] += entry["count"]
+        total[1] += entry["total"]
+    lines = ["Time by span:"] + [f"  {name:<18} {count:>6}x {seconds:>9.2f}s"
+                                 for name, (count, seconds) in sorted(totals.items(), key=lambda item: -item[1][1])]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("briefs", help="file with briefs, or - for stdin")
+    parser.add_argument("--out", default="-", help="JSON Lines output file (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=4, help="projects running at the same time")
+    parser.add_argument("--metrics", help="write latency histograms here (Prometheus text format)")
+    parser.add_argument("--trace", help="write spans here as Chrome trace JSON (chrome://tracing, Perfetto)")
+    parser.add_argument("--clock", choices=["real", "accelerated", "virtual"], default=None,
+                        help="simulated-work clock (default: AIOFFICE_CLOCK or real)")
+    args = parser.parse_args(argv)
+
+    from clock import make_clock
+    from main import build_default_office
+
+    errors: List[str] = []
+    if args.briefs == "-":
+        briefs = read_briefs(sys.stdin, errors)
+    else:
+        with open(args.briefs, 'r', encoding='utf-8') as f:
+            briefs = read_briefs(f, errors)
+    for error in errors:
+        print(f"Skipped brief, {error}", file=sys.stderr)
+    office = build_default_office(make_clock(args.clock))
+    tasks_before = len(office.tasks)
+    out = sys.stdout if args.out == "-" else open(args.out, 'w', encoding='utf-8')
+    try:
+        started = time.perf_counter()
+        records = asyncio.run(run_briefs(office, briefs, max(1, args.concurrency), out))
+        wall_time = time.perf_counter() - started
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(summarize(records, wall_time, len(office.tasks) - tasks_before), file=sys.stderr)
+    print(summarize_spans(office.metrics), file=sys.stderr)
+    if args.metrics:
+        office.metrics.write_prometheus(args.metrics)
+    if args.trace:
+        office.metrics.write_chrome_trace(args.trace)
+    if errors:
+        print(f"{len(errors)} invalid brief(s) skipped", file=sys.stderr)
+    return 0 if not errors and all(record["ok"] for record in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
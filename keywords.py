@@ -0,0 +1,71 @@
+import re
+from typing import Dict, FrozenSet, Iterable, Set
+
+
+class KeywordClassifier:
+    """Finds every keyword category present in a text in a single regex pass.
+
+    Works like the `any(word in text.lower() for word in keywords)` checks it
+    replaces, so keywords match anywhere, including inside longer words. All
+    keywords are compiled into one alternation inside a lookahead, so a match is
+    tried at every position of the text. Longer keywords come first. A keyword
+    also carries the categories of every shorter keyword contained in it, so
+    overlapping matches (e.g. "website" also matching "web" and "site") are not
+    lost.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories: Dict[str, FrozenSet[str]] = {
+            name: frozenset(word.lower() for word in words) for name, words in categories.items()
+        }
+        owners: Dict[str, Set[str]] = {}
+        for name, words in self.categories.items():
+            for word in words:
+                owners.setdefault(word, set()).add(name)
+        self._keyword_categories: Dict[str, FrozenSet[str]] = {
+            word: frozenset(name for other, names in owners.items() if other in word for name in names)
+            for word in owners
+        }
+        alternatives = sorted(owners, key=lambda word: (-len(word), word))
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(word) for word in alternatives) + "))") if alternatives else None
+
+    def classify(self, text: str) -> Set[str]:
+        """Names of all categories with at least one keyword in `text`."""
+        found: Set[str] = set()
+        if self._pattern is None or not text:
+            return found
+        total = len(self.categories)
+        for match in self._pattern.finditer(text.lower()):
+            found |= self._keyword_categories[match.group(1)]
+            if len(found) == total:
+                break
+        return found
+
+    def matches(self, text: str, category: str) -> bool:
+        return category in self.classify(text)
+
+
+# Routing of queued tasks to agent types (OfficeSimulation.find_capable_agents)
+ROUTING = KeywordClassifier({
+    "coding": ["kod", "code", "program", "website", "web", "html", "css", "javascript", "react", "vue", "app", "application", "site", "strona"],
+    "analysis": ["analiz", "data", "dane", "statistics", "statystyki", "report", "raport", "dashboard", "analytics"],
+    "image": ["obraz", "image", "picture", "photo", "graphic", "design", "logo", "banner", "mockup"],
+    "text": ["tekst", "text", "content", "copy", "writing", "article", "blog", "seo", "copywriting"],
+    "website": ["website", "web", "site"],
+})
+
+# What an agent decides to do with a task (AgentBase.decide)
+DECISIONS = KeywordClassifier({
+    "coding": ["code", "kod", "program", "website", "web", "html", "css", "javascript", "app", "application", "site", "strona"],
+    "analyzing": ["analyze", "data", "analiz"],
+    "generating image": ["image", "picture", "obraz"],
+    "analyzing text": ["text", "tekst", "content"],
+})
+
+# Requirements the CEO plans and delegates (OfficeSimulation._create_task_plan / _delegate_to_team)
+PLANNING = KeywordClassifier({
+    "code": ["kod", "code", "webpage", "strona", "menu"],
+    "data": ["analiz", "dane", "data", "statystyki"],
+    "image": ["obraz", "image", "picture", "zdjęcia", "pictures"],
+    "text": ["tekst", "text", "artykuł", "article", "content"],
+})
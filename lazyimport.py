@@ -0,0 +1,48 @@
+import importlib
+import importlib.util
+import threading
+from typing import Optional
+
+
+def module_available(name: str) -> bool:
+    """True if `name` can be imported; finds the module without executing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    `requests = lazy_module("requests")` costs a spec lookup at import time;
+    `requests.Session` then imports the real module (once, thread-safe) and
+    every later access goes straight to it.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{' (loaded)' if self.loaded else ''}>"
+
+
+def lazy_module(name: str) -> Optional[LazyModule]:
+    """Lazy stand-in for `name`, or None when it is not installed (for `X_AVAILABLE` flags)."""
+    return LazyModule(name) if module_available(name) else None
@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache")
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+
+
+class ResponseCache:
+    """Two-tier cache for model responses, keyed by a hash of model, prompt and options.
+
+    Tier 1 is an in-memory LRU limited by entry count; tier 2 is one JSON file per
+    key under `directory`, limited by total size (least recently used files are
+    evicted first). Entries older than `ttl` seconds count as misses in both tiers.
+    Pass `directory=None` for a memory-only cache. Coroutines use aget()/aput(),
+    which do the file I/O on a worker thread instead of the event loop.
+    """
+
+    def __init__(self, directory: Optional[str] = DEFAULT_CACHE_DIR, max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_bytes: int = DEFAULT_DISK_BYTES, ttl: Optional[float] = DEFAULT_TTL):
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created_at, response)
+        self._disk_index: Optional[Dict[str, list]] = None  # key -> [size, last_used]
+        self._disk_bytes = 0
+        self._lock = threading.Lock()  # Memory tier and counters
+        self._disk_lock = threading.Lock()  # Disk index and files; held during file I/O
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        raw = json.dumps({"model": model, "prompt": prompt, "options": options or {}}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_disk_index(self):
+        # Built lazily on first disk access, so creating a cache costs nothing; called with self._disk_lock held
+        if self._disk_index is not None:
+            return
+        self._disk_index = {}
+        self._disk_bytes = 0
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                self._disk_index[name[:-5]] = [stat.st_size, stat.st_mtime]
+                self._disk_bytes += stat.st_size
+
+    def _remember(self, key: str, created_at: float, response: str):
+        # Called with self._lock held
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _drop_disk_entry(self, key: str):
+        # Called with self._disk_lock held
+        size, _ = self._disk_index.pop(key, (0, 0))
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    # Memory tier: cheap enough for the event loop
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+            return None
+
+    def _put_memory(self, key: str, created_at: float, response: str):
+        with self._lock:
+            self._remember(key, created_at, response)
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+
+    # Disk tier: blocking file I/O, run on a worker thread by aget()/aput()
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        with self._disk_lock:
+            self._load_disk_index()
+            if key not in self._disk_index:
+                return None
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                record = None
+            if record is None or self._expired(record.get("created_at", 0)):
+                self._drop_disk_entry(key)
+                return None
+            self._disk_index[key][1] = time.time()
+        with self._lock:
+            self._remember(key, record["created_at"], record["response"])
+            self.disk_hits += 1
+        return record["response"]
+
+    def _put_disk(self, key: str, created_at: float, response: str):
+        if not self.directory:
+            return
+        with self._disk_lock:
+            self._load_disk_index()
+            path = self._path(key)
+            data = json.dumps({"created_at": created_at, "response": response}, ensure_ascii=False).encode("utf-8")
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError:
+                return
+            if key in self._disk_index:
+                self._disk_bytes -= self._disk_index[key][0]
+            self._disk_index[key] = [len(data), created_at]
+            self._disk_bytes += len(data)
+            self._evict_disk()
+
+    def get(self, key: str) -> Optional[str]:
+        response = self._get_memory(key)
+        if response is None:
+            response = self._get_disk(key)
+            if response is None:
+                self._miss()
+        return response
+
+    def put(self, key: str, response: str):
+        created_at = time.time()
+        self._put_memory(key, created_at, response)
+        self._put_disk(key, created_at, response)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() for coroutines: memory lookups stay on the loop, disk reads go to a worker thread."""
+        response = self._get_memory(key)
+        if response is None and self.directory:
+            response = await asyncio.to_thread(self._get_disk, key)
+        if response is None:
+            self._miss()
+        return response
+
+    async def aput(self, key: str, response: str):
+        """put() for coroutines: the disk write runs on a worker thread."""
+        created_at = time.time()
+        self._put_memory(key, created_at, response)
+        if self.directory:
+            await asyncio.to_thread(self._put_disk, key, created_at, response)
+
+    def _evict_disk(self):
+        # Called with self._disk_lock held
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        for key, _ in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._drop_disk_entry(key)
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.directory:
+            with self._disk_lock:
+                self._load_disk_index()
+                for key in list(self._disk_index):
+                    self._drop_disk_entry(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes if self._disk_index is not None else None,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_enabled = os.environ.get("AIOFFICE_LLM_CACHE", "1") != "0"
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the cache shared by every agent (None when caching is disabled)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None and _cache_enabled:
+            _cache = ResponseCache()
+        return _cache
+
+
+def configure_response_cache(enabled: bool = True, **kwargs) -> Optional[ResponseCache]:
+    """Replace the shared cache; keyword arguments go to ResponseCache."""
+    global _cache, _cache_enabled
+    with _cache_lock:
+        _cache_enabled = enabled
+        _cache = ResponseCache(**kwargs) if enabled else None
+        return _cache
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Optional
+
+from lazyimport import lazy_module
+
+# Optional HTTP backend (same dependency as the Ollama integration in agents.py),
+# imported on the first request rather than at startup
+requests = lazy_module("requests")
+REQUESTS_AVAILABLE = requests is not None
+
+OLLAMA_URL = os.environ.get("AIOFFICE_OLLAMA_URL", "http://localhost:11434")  # e.g. a fake_ollama.py server
+DEFAULT_MAX_CONCURRENCY = 4
+
+_STREAM_END = object()
+
+
+class OllamaClient:
+    """Shared async client for the Ollama HTTP API.
+
+    `requests` is blocking, so calls run on a dedicated thread pool instead of the
+    event loop. The pool size is the limit on concurrent requests, and all calls go
+    through one `requests.Session`, which keeps TCP connections alive between calls.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_URL, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self._session = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="ollama")
+        self.requests_sent = 0
+        self.in_flight = 0
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                # One connection per worker thread, all kept alive between calls
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _post_blocking(self, path: str, payload: Dict[str, Any], timeout: float):
+        session = self._get_session()
+        with self._lock:
+            self.in_flight += 1
+            self.requests_sent += 1
+        try:
+            return session.post(f"{self.base_url}{path}", json=payload, timeout=timeout)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    async def post(self, path: str, payload: Dict[str, Any], timeout: float = 60):
+        """POST `payload` as JSON without blocking the running event loop.
+
+        Returns the `requests.Response`; transport errors (timeouts, refused
+        connections) propagate as the usual `requests.exceptions`.
+        """
+        if not REQUESTS_AVAILABLE:
+            raise RuntimeError("Requests is not installed. Use: pip install requests")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._post_blocking, path, payload, timeout)
+
+    async def generate(self, payload: Dict[str, Any], timeout: float = 60):
+        return await self.post("/api/generate", payload, timeout)
+
+    def _stream_blocking(self, path: str, payload: Dict[str, Any], timeout: float, loop, queue, cancelled):
+        def emit(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # Event loop already closed - nobody is listening any more
+                cancelled.set()
+
+        session = self._get_session()
+        with self._lock:
+            self.in_flight += 1
+            self.requests_sent += 1
+        try:
+            with session.post(f"{self.base_url}{path}", json=payload, timeout=timeout, stream=True) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"Ollama API error: {response.status_code}")
+                # Ollama streams one JSON object per line (NDJSON)
+                for line in response.iter_lines():
+                    if cancelled.is_set():
+                        break
+                    if line:
+                        emit(json.loads(line))
+        except Exception as e:
+            emit(e)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            emit(_STREAM_END)
+
+    async def stream(self, payload: Dict[str, Any], timeout: float = 60) -> AsyncIterator[Dict[str, Any]]:
+        """Yield Ollama's NDJSON chunks as they arrive.
+
+        The HTTP read happens on the client's thread pool; chunks are handed to the
+        event loop one by one. Closing the iterator early stops the read.
+        """
+        if not REQUESTS_AVAILABLE:
+            raise RuntimeError("Requests is not installed. Use: pip install requests")
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        payload = dict(payload, stream=True)
+        loop.run_in_executor(self._executor, self._stream_blocking, "/api/generate", payload, timeout, loop, queue, cancelled)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+
+    def close(self, wait: bool = False):
+        """Stop accepting requests; with `wait`, let the running ones finish before closing the session."""
+        self._executor.shutdown(wait=wait)
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def close_when_idle(self) -> threading.Thread:
+        """Close in a background thread once the requests already running have finished."""
+        thread = threading.Thread(target=self.close, kwargs={"wait": True}, name="ollama-close", daemon=True)
+        thread.start()
+        return thread
+
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> OllamaClient:
+    """Return the client shared by every agent, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+        return _client
+
+
+def configure_llm_client(base_url: str = OLLAMA_URL, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> OllamaClient:
+    """Replace the shared client, e.g. to raise the concurrency limit.
+
+    New requests go to the new client at once; the old one is closed in the
+    background after its running requests finish, so those are not cut off.
+    """
+    global _client
+    with _client_lock:
+        old, _client = _client, OllamaClient(base_url=base_url, max_concurrency=max_concurrency)
+        client = _client
+    if old is not None:
+        old.close_when_idle()
+    return client
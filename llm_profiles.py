@@ -0,0 +1,164 @@
+import math
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_ROLE = "*"
+CHARS_PER_TOKEN = 3  # Rough prompt size estimate (Qwen3 tokenizer, mixed code and prose)
+MAX_NUM_CTX = 32768  # Qwen3 0.6B context length
+MIN_TIMEOUT = 30.0  # Leaves room for Ollama reloading an unloaded model
+TRUNCATION_GROWTH = 1.5  # A truncated answer counts as this much longer than its budget
+# Options that only set how much the model may generate; they change as the budget adapts
+BUDGET_OPTIONS = ("num_predict", "num_ctx")
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Ollama generation options of one role: token budget, timeout, stop sequences, context size.
+
+    `num_predict` is the starting budget; tuning keeps it within min_predict..max_predict.
+    """
+    num_predict: int = 200
+    timeout: float = 60.0
+    num_ctx: int = 2048
+    stop: Tuple[str, ...] = ()
+    temperature: float = 0.3
+    min_predict: int = 64
+    max_predict: int = 512
+
+    def options(self) -> Dict[str, Any]:
+        options = {"temperature": self.temperature, "num_predict": self.num_predict, "num_ctx": self.num_ctx}
+        if self.stop:
+            options["stop"] = list(self.stop)
+        return options
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"num_predict": self.num_predict, "timeout": self.timeout, "num_ctx": self.num_ctx,
+                "stop": list(self.stop), "temperature": self.temperature}
+
+
+# Starting profiles; roles not listed use DEFAULT_ROLE
+DEFAULT_PROFILES: Dict[str, GenerationProfile] = {
+    DEFAULT_ROLE: GenerationProfile(),
+    "AI Chatbot": GenerationProfile(num_predict=128, timeout=30.0, num_ctx=1024, stop=("\nUser:",),
+                                    min_predict=32, max_predict=256),
+    "AI Graphic Designer": GenerationProfile(num_predict=384, timeout=90.0, min_predict=128, max_predict=768),
+    "Web Developer": GenerationProfile(num_predict=768, timeout=120.0, num_ctx=4096, min_predict=256, max_predict=1536),
+    # Full HTML + CSS + JS page from a long template prompt
+    "Integrator (Coordinator)": GenerationProfile(num_predict=1536, timeout=240.0, num_ctx=8192,
+                                                  min_predict=512, max_predict=3072),
+}
+
+
+class _RoleStats:
+    __slots__ = ("samples", "tokens", "seconds_per_token", "first_token", "truncated")
+
+    def __init__(self):
+        self.samples = 0
+        self.tokens = 0.0
+        self.seconds_per_token = 0.0
+        self.first_token = 0.0
+        self.truncated = 0
+
+
+class GenerationBudget:
+    """Per-role generation profiles, tuned from the lengths of earlier answers.
+
+    After `min_samples` answers of a role its token budget becomes `headroom` x the
+    moving average of answer lengths (rounded up to `step` tokens), and its timeout
+    `timeout_margin` x the expected generation time. Answers cut off by the budget
+    count as longer than they were, so the budget grows until they fit. The
+    context size is raised when prompt + budget would not fit. The budget options
+    are left out of response cache keys (see cache_options), so an adapted budget
+    still finds answers cached under an earlier one.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, GenerationProfile]] = None, adaptive: bool = True,
+                 headroom: float = 1.5, step: int = 32, alpha: float = 0.2, min_samples: int = 3,
+                 timeout_margin: float = 3.0):
+        self.profiles = dict(DEFAULT_PROFILES if profiles is None else profiles)
+        self.adaptive = adaptive
+        self.headroom = headroom
+        self.step = step
+        self.alpha = alpha  # Weight of the newest answer in the moving averages
+        self.min_samples = min_samples
+        self.timeout_margin = timeout_margin
+        self._stats: Dict[str, _RoleStats] = {}
+        self._lock = threading.Lock()
+
+    def base_profile(self, role: str) -> GenerationProfile:
+        return self.profiles.get(role) or self.profiles.get(DEFAULT_ROLE) or GenerationProfile()
+
+    def profile(self, role: str, prompt: str = "") -> GenerationProfile:
+        """Profile for the next request of `role`."""
+        base = self.base_profile(role)
+        num_predict, timeout = base.num_predict, base.timeout
+        with self._lock:
+            stats = self._stats.get(role)
+            if self.adaptive and stats is not None and stats.samples >= self.min_samples:
+                target = math.ceil(stats.tokens * self.headroom / self.step) * self.step
+                num_predict = max(base.min_predict, min(base.max_predict, target))
+                if stats.seconds_per_token > 0:
+                    expected = stats.first_token + num_predict * stats.seconds_per_token
+                    timeout = float(math.ceil(max(MIN_TIMEOUT, min(base.timeout * 4, expected * self.timeout_margin))))
+        num_ctx = base.num_ctx
+        needed = len(prompt) // CHARS_PER_TOKEN + num_predict
+        while num_ctx < needed and num_ctx < MAX_NUM_CTX:
+            num_ctx *= 2
+        return replace(base, num_predict=num_predict, timeout=timeout, num_ctx=num_ctx)
+
+    def observe(self, role: str, profile: GenerationProfile, tokens: int, seconds: float = 0.0,
+                first_token: float = 0.0, truncated: bool = False):
+        """Record one answer of `role` generated with `profile`."""
+        if tokens <= 0:
+            return
+        length = profile.num_predict * TRUNCATION_GROWTH if truncated else tokens
+        seconds_per_token = max(0.0, seconds - first_token) / tokens
+        with self._lock:
+            stats = self._stats.setdefault(role, _RoleStats())
+            if stats.samples == 0:
+                stats.tokens, stats.seconds_per_token, stats.first_token = length, seconds_per_token, first_token
+            else:
+                a = self.alpha
+                stats.tokens += a * (length - stats.tokens)
+                stats.seconds_per_token += a * (seconds_per_token - stats.seconds_per_token)
+                stats.first_token += a * (first_token - stats.first_token)
+            stats.samples += 1
+            stats.truncated += 1 if truncated else 0
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {role: {"samples": s.samples, "avg_tokens": round(s.tokens, 1), "truncated": s.truncated,
+                           "seconds_per_token": s.seconds_per_token, "first_token": s.first_token}
+                    for role, s in self._stats.items()}
+
+
+def cache_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """The options that decide what the answer is (model sampling), for the response cache key."""
+    return {name: value for name, value in options.items() if name not in BUDGET_OPTIONS}
+
+
+_budget: Optional[GenerationBudget] = None
+_budget_lock = threading.Lock()
+
+
+def get_generation_budget() -> GenerationBudget:
+    """Return the budget shared by every agent (tuning off with AIOFFICE_LLM_ADAPTIVE=0)."""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = GenerationBudget(adaptive=os.environ.get("AIOFFICE_LLM_ADAPTIVE", "1") != "0")
+        return _budget
+
+
+def configure_generation_budget(**kwargs) -> GenerationBudget:
+    """Replace the shared budget; keyword arguments go to GenerationBudget."""
+    global _budget
+    with _budget_lock:
+        _budget = GenerationBudget(**kwargs)
+        return _budget
@@ -2,15 +2,29 @@ import logging
 import asyncio
 from agents import AgentBase, AgentType, Message
 from tasks import Task, TaskStatus, TaskPriority
-from storage import save_state, load_state
-from gui import run_gui
+from storage import save_state, load_state, state_to_dict, state_from_dict
+from blobstore import BlobStore
+from persistence import PersistenceEngine
+from task_store import TaskStore, FINAL_CODE_MARKER
+from binstate import BINARY_EXTENSION, is_binary_state, save_binary_state, load_binary_state, open_binary_state_lazy
+from pipeline import Stage, PipelineScheduler, critical_path
+from clock import RealClock
+from dispatch import AgentWorkerPool
+from registry import AgentRegistry
+from keywords import ROUTING, PLANNING
+from officelog import get_logger, fields
+from metrics import Metrics
 import uuid
 import time
-from typing import Dict, Any, Optional
+import os
+from typing import Dict, Any, Optional, List, Tuple
 import heapq
+import threading
+from collections import deque, OrderedDict
 
 # Logging configuration - disable terminal logs
 logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(message)s')
+log = get_logger("office")  # Debug output of the simulation (AIOFFICE_LOG_LEVEL=DEBUG)
 
 class CommunicationBus:
     def __init__(self, office):
@@ -19,7 +33,10 @@ class CommunicationBus:
         self.running = False
 
     async def publish(self, message: Message):
-        await self.queue.put(message)
+        # Publish time travels with the message, so delivery latency covers the queue wait
+        await self.queue.put((message, time.perf_counter()))
+        if self.office.task_store:
+            self.office.task_store.record_message(message, self.office.clock.time())
         if self.office.gui:
             sender = self.office.agents[message.sender_id].name
             recipient = self.office.agents[message.recipient_id].name
@@ -28,41 +45,359 @@ class CommunicationBus:
     async def start(self):
         self.running = True
         while self.running:
-            message = await self.queue.get()
+            message, published_at = await self.queue.get()
             recipient = self.office.agents.get(message.recipient_id)
             if recipient:
                 await recipient.receive_message(message, self.office)
+            self.office.metrics.record("bus.message", published_at, time.perf_counter(), kind="delivered" if recipient else "dropped",
+                                       sender=message.sender_id, agent=message.recipient_id, task=message.task_id)
             self.queue.task_done()
 
 class TaskQueue:
-    def __init__(self):
-        self._queue = []  # (priority, time, task_id)
+    """Priority queue of task ids that consumers can await.
+
+    `get_wait()` sleeps until work arrives; `put()` wakes a waiting consumer at
+    once, also when it is called from another thread or event loop (the GUI
+    runs projects in its own thread). Higher priority comes out first, and
+    tasks with equal priority come out in creation order.
+
+    `bucket_of(task)` (optional) sorts each task into a bucket when it is put,
+    e.g. by the agents that can take it; every bucket is its own heap, so
+    `pop_first()` looks at one head per bucket instead of the whole queue.
+    """
+
+    def __init__(self, clock=None, bucket_of=None):
+        self._buckets: Dict[Any, list] = {}  # bucket -> heap of (-priority, created_at, counter, task_id, enqueued_at)
+        self._bucket_of = bucket_of
+        self._size = 0
         self._counter = 0
+        self._lock = threading.Lock()
+        self._waiters = deque()  # futures of consumers blocked in get_wait()
+        self._clock = clock or RealClock()
+        # Metrics
+        self.enqueued = 0
+        self.dequeued = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _push(self, task: Task, bucket, now: float):
+        # CRITICAL has the highest enum value, so negate it to pop it first from the min-heap
+        entry = (-task.priority.value, task.created_at, self._counter, task.id, now)
+        heapq.heappush(self._buckets.setdefault(bucket, []), entry)
+        self._counter += 1
+        self._size += 1
+        self.enqueued += 1
+
+    def _wake_waiters(self, count: int):
+        # Called with the lock held
+        while count > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            try:
+                waiter.get_loop().call_soon_threadsafe(_resolve_waiter, waiter)
+                count -= 1
+            except RuntimeError:
+                pass  # Consumer's event loop is closed
 
     def put(self, task: Task):
-        # Im wyższy priorytet, tym niższa wartość (CRITICAL=1, LOW=4)
-        heapq.heappush(self._queue, (task.priority.value, task.created_at, task.id))
-        self._counter += 1
+        self.put_many([task])
+
+    def put_many(self, tasks):
+        tasks = list(tasks)
+        # Classify outside the lock, once per task
+        buckets = [self._bucket_of(task) if self._bucket_of else None for task in tasks]
+        now = self._clock.monotonic()
+        with self._lock:
+            for task, bucket in zip(tasks, buckets):
+                self._push(task, bucket, now)
+            self.max_depth = max(self.max_depth, self._size)
+            self._wake_waiters(len(tasks))
+
+    def _pop(self, now: float) -> str:
+        # Bucket whose head comes first; there are only a few buckets
+        bucket = min(self._buckets, key=lambda key: self._buckets[key][0])
+        return self._pop_bucket(bucket, now)
+
+    def _pop_bucket(self, bucket, now: float) -> str:
+        heap = self._buckets[bucket]
+        entry = heapq.heappop(heap)
+        if not heap:
+            del self._buckets[bucket]
+        self._size -= 1
+        wait = now - entry[4]
+        self.dequeued += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return entry[3]
 
     def get(self):
-        if self._queue:
-            return heapq.heappop(self._queue)[2]  # Zwraca task_id
+        """Pop the next task id, or None when the queue is empty (never blocks)."""
+        now = self._clock.monotonic()
+        with self._lock:
+            if self._size:
+                return self._pop(now)  # Zwraca task_id
+        return None
+
+    def get_many(self, max_items: int):
+        """Pop up to `max_items` task ids in priority order (never blocks)."""
+        now = self._clock.monotonic()
+        with self._lock:
+            return [self._pop(now) for _ in range(min(max_items, self._size))]
+
+    def pop_first(self, accept) -> Optional[str]:
+        """Pop the first task id in priority order whose bucket `accept(bucket)` takes (never blocks).
+
+        `accept` is called at most once per bucket, in the order of the bucket heads.
+        """
+        now = self._clock.monotonic()
+        with self._lock:
+            for bucket in sorted(self._buckets, key=lambda key: self._buckets[key][0]):
+                if accept(bucket):
+                    return self._pop_bucket(bucket, now)
         return None
 
+    async def wait_for_put(self, seen_enqueued: int):
+        """Wait until a task is put after `enqueued` was `seen_enqueued` (returns at once if one already was)."""
+        with self._lock:
+            if self.enqueued != seen_enqueued:
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+
+    async def get_wait(self) -> str:
+        """Wait until a task id is available and pop it."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._size:
+                    return self._pop(self._clock.monotonic())
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if not waiter.done():
+                    waiter.cancel()
+
     def empty(self):
-        return len(self._queue) == 0
+        return self._size == 0
+
+    def __len__(self):
+        return self._size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "depth": self._size,
+                "max_depth": self.max_depth,
+                "waiting_consumers": sum(1 for waiter in self._waiters if not waiter.done()),
+                "enqueued": self.enqueued,
+                "dequeued": self.dequeued,
+                "avg_wait": self.total_wait / self.dequeued if self.dequeued else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+def _resolve_waiter(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+class TaskChangeTracker:
+    """Version counter plus the ids of recently changed tasks, for views that refresh incrementally.
+
+    `since(version)` returns the current version and the tasks changed after
+    `version`. It returns None instead of ids when the caller is too far
+    behind (older entries were trimmed) or the task set was replaced; the
+    caller should then redraw everything.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.version = 0
+        self._changed: "OrderedDict[str, int]" = OrderedDict()
+        self._floor = 0  # Changes at or before this version are no longer listed
+        self._lock = threading.Lock()
+
+    def mark(self, task_id: str):
+        with self._lock:
+            self.version += 1
+            self._changed[task_id] = self.version
+            self._changed.move_to_end(task_id)
+            while len(self._changed) > self.max_entries:
+                _, self._floor = self._changed.popitem(last=False)
+
+    def reset(self):
+        with self._lock:
+            self.version += 1
+            self._changed.clear()
+            self._floor = self.version
+
+    def since(self, version: int):
+        with self._lock:
+            if version < self._floor:
+                return self.version, None
+            changed = []
+            for task_id, changed_at in reversed(self._changed.items()):
+                if changed_at <= version:
+                    break
+                changed.append(task_id)
+            changed.reverse()
+            return self.version, changed
+
+# Website project: stages run as soon as their dependencies are done, so the four
+# creative stages run in parallel, and DevOps, Mobile Testing and the Chatbot all
+# start right after the Integrator.
+WEBSITE_PIPELINE = [
+    # 1. Client Advisor analyzes and creates a brief/spec
+    Stage("brief", "Client Advisor", "Client Brief"),
+    # 2. Project Manager plans and splits tasks
+    Stage("plan", "Project Manager", "Project Plan", depends_on=("brief",), inputs=("brief",), creator="brief"),
+    # 3. Subtasks for Web Dev, UX/UI, Copywriter, Graphic Designer (parallel)
+    Stage("skeleton", "Web Developer", "Website Skeleton", depends_on=("plan",), inputs=("plan",), parent="plan", creator="plan", optional=True,
+          title_format="{stage} for: {title}"),
+    Stage("layout", "UX/UI Designer", "UI/UX Layout", depends_on=("plan",), inputs=("plan",), parent="plan", creator="plan", optional=True,
+          title_format="{stage} for: {title}"),
+    Stage("content", "Copywriter", "Website Content", depends_on=("plan",), inputs=("plan",), parent="plan", creator="plan", optional=True,
+          title_format="{stage} for: {title}"),
+    Stage("graphics", "AI Graphic Designer", "Website Graphics", depends_on=("plan",), inputs=("plan",), parent="plan", creator="plan", optional=True,
+          title_format="{stage} for: {title}"),
+    # 4. Integrator collects, tests, and publishes
+    Stage("integration", "Integrator (Coordinator)", "Integration & Testing", depends_on=("skeleton", "layout", "content", "graphics"),
+          inputs=("skeleton", "layout", "content", "graphics"), parent="plan", creator="plan"),
+    # 4.5 Hosting/DevOps Agent
+    Stage("devops", "Hosting/DevOps", "Hosting & Deployment", depends_on=("integration",), inputs=("integration",), parent="integration", creator="integration"),
+    # 5. Mobile Responsiveness & Testing Agent
+    Stage("mobile", "Mobile Responsiveness & Testing Agent", "Mobile Testing", depends_on=("integration",), inputs=("integration",), parent="integration", creator="integration"),
+    # 6. Feedback & QA Agent
+    Stage("feedback", "Feedback & QA Agent", "Feedback & QA", depends_on=("mobile",), inputs=("mobile",), parent="mobile", creator="mobile"),
+    # 7. Marketing Strategist plans and monitors campaign
+    Stage("marketing", "Marketing Strategist", "Marketing Campaign", depends_on=("feedback",), inputs=("feedback",), parent="feedback", creator="feedback"),
+    # 8. Data Analyst analyzes effectiveness
+    Stage("data", "Data Analyst", "Data Analysis", depends_on=("marketing",), inputs=("marketing",), parent="marketing", creator="marketing"),
+    # 9. AI Chatbot is ready to answer questions (simulate deployment)
+    Stage("chatbot", "AI Chatbot", "Chatbot Deployment", depends_on=("integration",), text="The website is live. Start answering visitor questions!",
+          parent="integration", creator="integration"),
+]
 
 class OfficeSimulation:
-    def __init__(self):
-        self.agents: Dict[str, AgentBase] = {}
+    def __init__(self, clock=None):
+        # Source of time for timestamps and simulated work delays (see clock.py)
+        self.clock = clock or RealClock()
+        # Agents by id, indexed by role, type and skill (see registry.py)
+        self.agents: AgentRegistry = AgentRegistry()
         self.tasks: Dict[str, Task] = {}
+        # Which tasks changed since a given version (for the GUI task list)
+        self.task_changes = TaskChangeTracker()
+        # Spans and latency histograms of stages, LLM calls, conference rounds and bus messages
+        self.metrics = Metrics()
         self.gui = None
         self.boss_agent_id: Optional[str] = None
         self.bus = CommunicationBus(self)
-        self.task_queue = TaskQueue()
+        self.task_queue = TaskQueue(self.clock, bucket_of=self.task_capability)
+        self.worker_pool = AgentWorkerPool(self)
+        self.last_stage_timings: Dict[str, Dict[str, Any]] = {}
+        # Write-ahead log of task/agent changes, if enabled (see persistence.py)
+        self.persistence: Optional[PersistenceEngine] = None
+        # Large result texts shared between tasks instead of copied (see blobstore.py)
+        self.blobs = BlobStore()
+        # Indexed SQLite copy of tasks/results/messages for queries, if enabled (see task_store.py)
+        self.task_store: Optional[TaskStore] = None
+
+    def enable_persistence(self, directory: str, **kwargs) -> PersistenceEngine:
+        """Recover saved state from `directory` and log every change there from now on"""
+        engine = PersistenceEngine(directory, **kwargs)
+        engine.attach(self)
+        self.task_changes.reset()
+        # Start from a fresh snapshot holding the recovered state and the current roster
+        engine.snapshot()
+        logging.info(f"Persistence enabled in {directory} ({len(self.tasks)} tasks recovered)")
+        return engine
+
+    def enable_task_store(self, path: str = ":memory:") -> TaskStore:
+        """Mirror tasks, results and messages into SQLite and answer task queries from its indexes"""
+        self.task_store = TaskStore(path)
+        self.task_store.replace_all(self.tasks.values())
+        logging.info(f"Task store enabled: {path}")
+        return self.task_store
+
+    def intern_results(self, task: Task):
+        """Replace the task's large description and results with their shared copies"""
+        task.description = self.blobs.intern(task.description)
+        for agent_id, result in task.results.items():
+            task.results[agent_id] = self.blobs.intern(result)
+
+    def notify_task_changed(self, task: Task):
+        self.task_changes.mark(task.id)
+        if self.persistence:
+            self.persistence.record_task(task)
+        if self.task_store:
+            self.task_store.upsert_task(task)
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        task = self.tasks.get(task_id)
+        if task is None and self.task_store:
+            task = self.task_store.get_task(task_id)
+        return task
+
+    def _tasks_by_ids(self, task_ids) -> List[Task]:
+        return [task for task in (self.get_task(task_id) for task_id in task_ids) if task is not None]
+
+    def completed_tasks(self) -> List[Task]:
+        return [task for task in self.tasks.values() if task.status == TaskStatus.COMPLETED]
+
+    def latest_completed_task(self) -> Optional[Task]:
+        """Most recently completed task (the one the results views show)"""
+        if self.task_store:
+            task_id = self.task_store.latest_completed_task_id()
+            return self.get_task(task_id) if task_id else None
+        completed = self.completed_tasks()
+        return max(completed, key=lambda t: t.completed_at or 0) if completed else None
+
+    def final_code_task(self) -> Optional[Task]:
+        """First completed task holding the Integrator's final code, else the latest completed one"""
+        if self.task_store:
+            found = self._tasks_by_ids(self.task_store.final_code_task_ids()[:1])
+        else:
+            found = [task for task in self.completed_tasks()
+                     if any(FINAL_CODE_MARKER in str(result) for result in task.results.values())][:1]
+        return found[0] if found else self.latest_completed_task()
+
+    def tasks_for_assignee(self, agent_id: str) -> List[Task]:
+        if self.task_store:
+            return self._tasks_by_ids(self.task_store.task_ids_for_assignee(agent_id))
+        return [task for task in self.tasks.values() if task.assignee_id == agent_id]
+
+    def tasks_involving(self, agent_id: str) -> List[Task]:
+        """Tasks created by the agent or holding its result"""
+        if self.task_store:
+            return self._tasks_by_ids(self.task_store.task_ids_involving(agent_id))
+        return [task for task in self.tasks.values() if task.creator_id == agent_id or agent_id in task.results]
+
+    def task_status_counts(self) -> Dict[str, int]:
+        if self.task_store:
+            return self.task_store.status_counts()
+        counts: Dict[str, int] = {}
+        for task in self.tasks.values():
+            counts[task.status.name] = counts.get(task.status.name, 0) + 1
+        return counts
+
+    def notify_agent_changed(self, agent: AgentBase):
+        """Call after changing an agent's role, type or skills: updates the registry indexes and the log"""
+        if self.agents.get(agent.id) is agent:
+            self.agents.reindex(agent.id)
+        if self.persistence:
+            self.persistence.record_agent(agent)
 
     def add_agent(self, agent: AgentBase, is_boss: bool = False):
         self.agents[agent.id] = agent
+        self.notify_agent_changed(agent)
         if is_boss:
             self.boss_agent_id = agent.id
         if self.gui:
@@ -72,8 +407,10 @@ class OfficeSimulation:
         logging.info(f"Added agent: {agent.name} ({agent.role})")
 
     def create_task(self, title: str, description: str, creator_id: str, priority: TaskPriority = TaskPriority.MEDIUM) -> Task:
-        task = Task(title=title, description=description, creator_id=creator_id, priority=priority)
+        now = self.clock.time()
+        task = Task(title=title, description=description, creator_id=creator_id, priority=priority, created_at=now, updated_at=now)
         self.tasks[task.id] = task
+        self.notify_task_changed(task)
         self.task_queue.put(task)
         if self.gui:
             self.gui.update_task_status(f"📝 Created task: {title} (priority: {priority.name})")
@@ -86,7 +423,8 @@ class OfficeSimulation:
         if task_id in self.tasks and agent_id in self.agents:
             self.tasks[task_id].assignee_id = agent_id
             self.tasks[task_id].status = TaskStatus.IN_PROGRESS
-            self.tasks[task_id].updated_at = time.time()
+            self.tasks[task_id].updated_at = self.clock.time()
+            self.notify_task_changed(self.tasks[task_id])
             agent_name = self.agents[agent_id].name
             task_title = self.tasks[task_id].title
             if self.gui:
@@ -97,136 +435,23 @@ class OfficeSimulation:
         return False
 
     def _find_agent_by_role(self, role: str) -> Optional[AgentBase]:
-        for agent in self.agents.values():
-            if agent.role.lower() == role.lower():
-                return agent
-        return None
+        return self.agents.find_by_role(role)
 
     async def submit_task(self, title: str, description: str, priority: TaskPriority = TaskPriority.MEDIUM) -> str:
-        debug_msg = f"DEBUG: submit_task - Tworzenie taska: {title} | {description} | {priority}"
-        print(debug_msg)
-        # 1. Client Advisor analyzes and creates a brief/spec
-        client_advisor = self._find_agent_by_role("Client Advisor")
-        brief_task = Task(title=f"Client Brief: {title}", description=description, creator_id="user", priority=priority)
-        self.tasks[brief_task.id] = brief_task
-        self.assign_task(brief_task.id, client_advisor.id)
-        if self.gui:
-            self.gui.start_agent_work(client_advisor.name)
-        brief_result = await client_advisor.process_task(brief_task, office=self)
-        if self.gui:
-            self.gui.stop_agent_work(client_advisor.name)
-
-        # 2. Project Manager plans and splits tasks
-        pm = self._find_agent_by_role("Project Manager")
-        pm_task = Task(title=f"Project Plan: {title}", description=brief_result.results[client_advisor.id], creator_id=client_advisor.id, priority=priority)
-        self.tasks[pm_task.id] = pm_task
-        self.assign_task(pm_task.id, pm.id)
-        if self.gui:
-            self.gui.start_agent_work(pm.name)
-        pm_result = await pm.process_task(pm_task, office=self)
-        if self.gui:
-            self.gui.stop_agent_work(pm.name)
-
-        # 3. Subtasks for Web Dev, UX/UI, Copywriter, Graphic Designer (parallel)
-        sub_results = {}
-        creative_roles = [
-            ("Web Developer", "Website Skeleton"),
-            ("UX/UI Designer", "UI/UX Layout"),
-            ("Copywriter", "Website Content"),
-            ("AI Graphic Designer", "Website Graphics")
-        ]
-        for role, sub_title in creative_roles:
-            agent = self._find_agent_by_role(role)
-            if agent:
-                sub_task = Task(title=f"{sub_title} for: {title}", description=pm_result.results[pm.id], creator_id=pm.id, parent_task_id=pm_task.id, priority=priority)
-                self.tasks[sub_task.id] = sub_task
-                self.assign_task(sub_task.id, agent.id)
-                if self.gui:
-                    self.gui.start_agent_work(agent.name)
-                result = await agent.process_task(sub_task, office=self)
-                if self.gui:
-                    self.gui.stop_agent_work(agent.name)
-                sub_results[agent.id] = result.results[agent.id]
-
-        # 4. Integrator collects, tests, and publishes
-        integrator = self._find_agent_by_role("Integrator (Coordinator)")
-        integration_task = Task(title=f"Integration & Testing: {title}", description=str(sub_results), creator_id=pm.id, parent_task_id=pm_task.id, priority=priority)
-        self.tasks[integration_task.id] = integration_task
-        self.assign_task(integration_task.id, integrator.id)
-        if self.gui:
-            self.gui.start_agent_work(integrator.name)
-        integration_result = await integrator.process_task(integration_task, office=self)
-        if self.gui:
-            self.gui.stop_agent_work(integrator.name)
-
-        # 4.5 Hosting/DevOps Agent
-        devops = self._find_agent_by_role("Hosting/DevOps")
-        devops_task = Task(title=f"Hosting & Deployment: {title}", description=integration_result.results[integrator.id], creator_id=integrator.id, parent_task_id=integration_task.id, priority=priority)
-        self.tasks[devops_task.id] = devops_task
-        self.assign_task(devops_task.id, devops.id)
-        if self.gui:
-            self.gui.start_agent_work(devops.name)
-        devops_result = await devops.process_task(devops_task, office=self)
-        if self.gui:
-            self.gui.stop_agent_work(devops.name)
-
-        # 5. Mobile Responsiveness & Testing Agent
-        mobile = self._find_agent_by_role("Mobile Responsiveness & Testing Agent")
-        mobile_task = Task(title=f"Mobile Testing: {title}", description=integration_result.results[integrator.id], creator_id=integrator.id, parent_task_id=integration_task.id, priority=priority)
-        self.tasks[mobile_task.id] = mobile_task
-        self.assign_task(mobile_task.id, mobile.id)
-        if self.gui:
-            self.gui.start_agent_work(mobile.name)
-        mobile_result = await mobile.process_task(mobile_task, office=self)
-        if self.gui:
-            self.gui.stop_agent_work(mobile.name)
-
-                # 6. Feedback & QA Agent
-        feedback = self._find_agent_by_role("Feedback & QA Agent")
-        feedback_task = Task(title=f"Feedback & QA: {title}", description=mobile_result.results[mobile.id], creator_id=mobile.id, parent_task_id=mobile_task.id, priority=priority)
-        self.tasks[feedback_task.id] = feedback_task
-        self.assign_task(feedback_task.id, feedback.id)
-        if self.gui:
-            self.gui.start_agent_work(feedback.name)
-        feedback_result = await feedback.process_task(feedback_task, office=self)
-        if self.gui:
-            self.gui.stop_agent_work(feedback.name)
-
-        # 7. Marketing Strategist plans and monitors campaign
-        marketing = self._find_agent_by_role("Marketing Strategist")
-        marketing_task = Task(title=f"Marketing Campaign: {title}", description=feedback_result.results[feedback.id], creator_id=feedback.id, parent_task_id=feedback_task.id, priority=priority)
-        self.tasks[marketing_task.id] = marketing_task
-        self.assign_task(marketing_task.id, marketing.id)
-        if self.gui:
-            self.gui.start_agent_work(marketing.name)
-        marketing_result = await marketing.process_task(marketing_task, office=self)
-        if self.gui:
-            self.gui.stop_agent_work(marketing.name)
-
-        # 8. Data Analyst analyzes effectiveness
-        data_analyst = self._find_agent_by_role("Data Analyst")
-        data_task = Task(title=f"Data Analysis: {title}", description=marketing_result.results[marketing.id], creator_id=marketing.id, parent_task_id=marketing_task.id, priority=priority)
-        self.tasks[data_task.id] = data_task
-        self.assign_task(data_task.id, data_analyst.id)
-        if self.gui:
-            self.gui.start_agent_work(data_analyst.name)
-        data_result = await data_analyst.process_task(data_task, office=self)
-        if self.gui:
-            self.gui.stop_agent_work(data_analyst.name)
-
-        # 9. AI Chatbot is ready to answer questions (simulate deployment)
-        chatbot = self._find_agent_by_role("AI Chatbot")
-        chatbot_task = Task(title=f"Chatbot Deployment: {title}", description="The website is live. Start answering visitor questions!", creator_id=integrator.id, parent_task_id=integration_task.id, priority=priority)
-        self.tasks[chatbot_task.id] = chatbot_task
-        self.assign_task(chatbot_task.id, chatbot.id)
-        if self.gui:
-            self.gui.start_agent_work(chatbot.name)
-        chatbot_result = await chatbot.process_task(chatbot_task, office=self)
+        log.debug("submit_task", extra=fields(title=title, priority=priority.name, description=description))
+        runs = await PipelineScheduler(self).run(WEBSITE_PIPELINE, title, description, priority)
+        self.last_stage_timings = {
+            name: {"agent": run.agent.name if run.agent else None, "wait": run.wait, "duration": run.duration}
+            for name, run in runs.items()
+        }
+        path, path_time = critical_path(runs)
         if self.gui:
-            self.gui.stop_agent_work(chatbot.name)
+            timings = ", ".join(f"{name} {timing['duration']:.1f}s" for name, timing in self.last_stage_timings.items())
+            self.gui.update_task_status(f"⏱️ Stage timings: {timings}")
+            self.gui.update_task_status(f"⏱️ Critical path ({path_time:.1f}s): {' -> '.join(path)}")
 
         # Final summary (Integrator + all results)
-        final_summary = f"=== FINAL PRODUCT ===\n\n{integration_result.results[integrator.id]}\n\n=== HOSTING & DEPLOYMENT ===\n{devops_result.results[devops.id]}\n\n=== MOBILE TESTING ===\n{mobile_result.results[mobile.id]}\n\n=== FEEDBACK & QA ===\n{feedback_result.results[feedback.id]}\n\n=== MARKETING CAMPAIGN ===\n{marketing_result.results[marketing.id]}\n\n=== DATA ANALYSIS ===\n{data_result.results[data_analyst.id]}\n\n=== CHATBOT STATUS ===\n{chatbot_result.results[chatbot.id]}"
+        final_summary = f"=== FINAL PRODUCT ===\n\n{runs['integration'].result}\n\n=== HOSTING & DEPLOYMENT ===\n{runs['devops'].result}\n\n=== MOBILE TESTING ===\n{runs['mobile'].result}\n\n=== FEEDBACK & QA ===\n{runs['feedback'].result}\n\n=== MARKETING CAMPAIGN ===\n{runs['marketing'].result}\n\n=== DATA ANALYSIS ===\n{runs['data'].result}\n\n=== CHATBOT STATUS ===\n{runs['chatbot'].result}"
         return final_summary
 
     async def _create_task_plan(self, task: Task, boss: AgentBase) -> str:
@@ -235,7 +460,7 @@ class OfficeSimulation:
             self.gui.update_task_status(f"📝 {boss.name} analyzing task requirements...")
             self.gui.update_communication_log(f"[{boss.name}] 📝 Analyzing task: {task.title}")
         
-        description_lower = task.description.lower()
+        needs = PLANNING.classify(task.description)
         plan = f"=== TASK PLAN BY {boss.name.upper()} ===\n\n"
         plan += f"Project: {task.title}\n"
         plan += f"Description: {task.description}\n"
@@ -243,26 +468,26 @@ class OfficeSimulation:
         
         # Requirements analysis
         requirements = []
-        if any(word in description_lower for word in ["kod", "code", "webpage", "strona", "menu"]):
+        if "code" in needs:
             requirements.append("✅ Website development (HTML/CSS/JavaScript)")
-        if any(word in description_lower for word in ["analiz", "dane", "data", "statystyki"]):
+        if "data" in needs:
             requirements.append("✅ Data analysis and reporting")
-        if any(word in description_lower for word in ["obraz", "image", "picture", "zdjęcia", "pictures"]):
+        if "image" in needs:
             requirements.append("✅ Image generation and DALL-E prompts")
-        if any(word in description_lower for word in ["tekst", "text", "artykuł", "article", "content"]):
+        if "text" in needs:
             requirements.append("✅ Content creation and articles")
         
         plan += "REQUIREMENTS ANALYSIS:\n" + "\n".join(requirements) + "\n\n"
         
         # Team assignment plan
         plan += "TEAM ASSIGNMENT PLAN:\n"
-        if any(word in description_lower for word in ["kod", "code", "webpage", "strona", "menu"]):
+        if "code" in needs:
             plan += "👨‍💻 Jan Nowak (Web Developer) - HTML/CSS/JavaScript coding\n"
-        if any(word in description_lower for word in ["analiz", "dane", "data", "statystyki"]):
+        if "data" in needs:
             plan += "📊 Anna Kowalska (Data Analyst) - Data analysis and programming\n"
-        if any(word in description_lower for word in ["obraz", "image", "picture", "zdjęcia", "pictures"]):
+        if "image" in needs:
             plan += "🎨 Piotr Malinowski (AI Image Generator) - DALL-E prompts and graphics\n"
-        if any(word in description_lower for word in ["tekst", "text", "artykuł", "article", "content"]):
+        if "text" in needs:
             plan += "📝 Katarzyna Wiśniewska (Text Analyst) - Content creation\n"
         
         plan += "\nEXECUTION STRATEGY:\n"
@@ -289,10 +514,10 @@ class OfficeSimulation:
             self.gui.update_communication_log(f"[{boss.name}] 👥 Coordinating team for task: {task.title}")
         
         # Analyze task description and find appropriate agents
-        description_lower = task.description.lower()
+        needs = PLANNING.classify(task.description)
         
         # Delegate to programmer if coding is needed
-        if any(word in description_lower for word in ["kod", "code", "webpage", "strona", "menu"]):
+        if "code" in needs:
             coder = self._find_agent_by_type(AgentType.CODER)
             if coder:
                 coder_task = Task(
@@ -318,7 +543,7 @@ class OfficeSimulation:
                     self.gui.update_agent_activity(coder.name)
         
         # Delegate to data analyst
-        if any(word in description_lower for word in ["analiz", "dane", "data", "statystyki"]):
+        if "data" in needs:
             analyst = self._find_agent_by_type(AgentType.ANALYST)
             if analyst:
                 analyst_task = Task(
@@ -344,7 +569,7 @@ class OfficeSimulation:
                     self.gui.update_agent_activity(analyst.name)
         
         # Delegate to image generator
-        if any(word in description_lower for word in ["obraz", "image", "picture", "zdjęcia", "pictures"]):
+        if "image" in needs:
             image_gen = self._find_agent_by_type(AgentType.IMAGE_GEN)
             if image_gen:
                 image_task = Task(
@@ -370,7 +595,7 @@ class OfficeSimulation:
                     self.gui.update_agent_activity(image_gen.name)
         
         # Delegate to text analyst
-        if any(word in description_lower for word in ["tekst", "text", "artykuł", "article", "content"]):
+        if "text" in needs:
             text_analyst = self._find_agent_by_type(AgentType.TEXT_ANALYST)
             if text_analyst:
                 text_task = Task(
@@ -403,34 +628,22 @@ class OfficeSimulation:
 
     def _find_agent_by_type(self, agent_type: AgentType) -> Optional[AgentBase]:
         """Find agent by type"""
-        for agent in self.agents.values():
-            if agent.agent_type == agent_type:
-                return agent
-        return None
+        return self.agents.find_by_type(agent_type)
 
     async def _consolidate_results(self, task: Task, team_results: Dict[str, str], boss: AgentBase) -> str:
-        debug_msg = f"DEBUG: _consolidate_results - Konsolidacja wyników przez {boss.name}"
-        print(debug_msg)
+        log.debug("_consolidate_results by %s (role=%s, id=%s)", boss.name, boss.role, boss.id)
         if self.gui:
             self.gui.update_task_status(f"📊 {boss.name} consolidating team results...")
             self.gui.update_communication_log(f"[{boss.name}] 📊 Consolidating team results...")
             self.gui.start_agent_work(boss.name)
         
-        # DEBUG: sprawdź czy boss to Integrator
-        debug_msg1 = f"DEBUG: _consolidate_results - Boss role: {boss.role}"
-        debug_msg2 = f"DEBUG: _consolidate_results - Boss id: {boss.id}"
-        print(debug_msg1)
-        print(debug_msg2)
-        
         final_report = await boss.process_task(task, office=self)
-        debug_msg = f"DEBUG: _consolidate_results - Wynik Integratora: {final_report[:200]}..."
-        print(debug_msg)
-        
-        # DEBUG: sprawdź czy wynik jest w task.results
-        debug_msg1 = f"DEBUG: _consolidate_results - task.results keys: {list(task.results.keys())}"
-        debug_msg2 = f"DEBUG: _consolidate_results - Integrator wynik w task.results: {'=== QWEN3 FINAL CODE ===' in task.results[boss.id]}" if boss.id in task.results else "DEBUG: _consolidate_results - Integrator wynik NIE w task.results"
-        print(debug_msg1)
-        print(debug_msg2)
+        log.debug("_consolidate_results report: %.200s", final_report)
+        # Czy wynik Integratora (z blokiem kodu) trafił do task.results
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("_consolidate_results", extra=fields(
+                results=list(task.results), in_results=boss.id in task.results,
+                final_code=boss.id in task.results and FINAL_CODE_MARKER in task.results[boss.id]))
         
         if self.gui:
             self.gui.stop_agent_work(boss.name)
@@ -443,102 +656,114 @@ class OfficeSimulation:
     async def handle_message(self, message: Message):
         await self.bus.publish(message)
 
-    def save_all(self, filename: str):
-        data = {
-            'agents': [agent.__dict__ for agent in self.agents.values()],
-            'tasks': [task.__dict__ for task in self.tasks.values()]
-        }
-        save_state(filename, data)
+    def save_all(self, filename: str, format: Optional[str] = None):
+        """Save agents and tasks as 'json' or 'binary' (default: binary for *.aio files, else JSON)"""
+        if format is None:
+            format = "binary" if filename.endswith(BINARY_EXTENSION) else "json"
+        if format == "binary":
+            save_binary_state(filename, self.agents.values(), self.tasks)
+        elif format == "json":
+            save_state(filename, state_to_dict(self.agents.values(), self.tasks.values()))
+        else:
+            raise ValueError(f"Unknown state format: {format}")
         logging.info(f"Zapisano stan do pliku {filename}")
 
-    def load_all(self, filename: str):
-        data = load_state(filename)
-        # Odtwarzanie agentów i tasków (uproszczone)
-        self.agents = {a['id']: AgentBase(**a) for a in data['agents']}
-        self.tasks = {t['id']: Task(**t) for t in data['tasks']}
+    def load_all(self, filename: str, lazy: bool = False):
+        """Load agents and tasks; with `lazy`, binary files are memory-mapped and task results decoded on first access.
+
+        Offices with persistence or a task store always load eagerly: both copy every task right away.
+        """
+        lazy = lazy and not (self.persistence or self.task_store)
+        # Format rozpoznawany po nagłówku pliku (binarny lub JSON)
+        if is_binary_state(filename) and lazy:
+            agents, self.tasks = open_binary_state_lazy(filename)
+            self.blobs = BlobStore()
+        elif is_binary_state(filename):
+            agents, tasks = load_binary_state(filename)
+            self.tasks = {task.id: task for task in tasks}
+            self.blobs = BlobStore()
+            for task in tasks:
+                self.intern_results(task)
+        else:
+            agents, tasks, self.blobs = state_from_dict(load_state(filename))
+            self.tasks = {task.id: task for task in tasks}
+        self.agents = AgentRegistry(agents)
+        self.task_changes.reset()
+        if self.persistence:
+            self.persistence.snapshot(self)
+        if self.task_store:
+            self.task_store.replace_all(self.tasks.values())
         logging.info(f"Wczytano stan z pliku {filename}")
 
     async def process_tasks(self):
-        while True:
-            if self.task_queue.empty():
-                await asyncio.sleep(0.5)
-                continue
-            task_id = self.task_queue.get()
-            task = self.tasks[task_id]
-            if task.status != TaskStatus.PENDING:
-                continue
-            # Automatyczne przydzielanie do agenta
-            agent = self.find_suitable_agent(task)
-            if agent:
-                self.assign_task(task.id, agent.id)
-                if self.gui:
-                    self.gui.update_task_status(f"📋 Assigned task {task.title} to agent {agent.name}")
-                    self.gui.update_agent_activity(agent.name)  # Update agent activity
-                    self.gui.update_communication_log(f"👤 {agent.name} starting work on task: {task.title}")
-                    self.gui.start_agent_work(agent.name)
-                updated_task = await agent.process_task(task, office=self)
-                self.tasks[task.id] = updated_task
-                if self.gui:
-                    self.gui.stop_agent_work(agent.name)  # Stop counting work time
-                    self.gui.update_task_status(f"✅ Task {task.title} completed by {agent.name}")
-                    self.gui.update_communication_log(f"✅ {agent.name} completed task: {task.title}")
-                self.show_final_report(updated_task)
-            else:
-                if self.gui:
-                    self.gui.update_task_status(f"❌ No suitable agent for task {task.title}")
-                    self.gui.update_communication_log(f"❌ No suitable agent found for: {task.title}")
-                logging.warning(f"No suitable agent for task {task.title}")
+        # Automatyczne przydzielanie do agentów - równolegle, według wolnych slotów agentów
+        await self.worker_pool.run()
+
+    async def run_assigned_task(self, task: Task, agent: AgentBase, utilization: str = "") -> Task:
+        """Assign a queued task to `agent`, run it and report the result"""
+        self.assign_task(task.id, agent.id)
+        if self.gui:
+            self.gui.update_task_status(f"📋 Assigned task {task.title} to agent {agent.name}" + (f" ({utilization})" if utilization else ""))
+            self.gui.update_agent_activity(agent.name)  # Update agent activity
+            self.gui.update_communication_log(f"👤 {agent.name} starting work on task: {task.title}")
+            self.gui.start_agent_work(agent.name)
+        try:
+            updated_task = await agent.process_task(task, office=self)
+        finally:
+            if self.gui:
+                self.gui.stop_agent_work(agent.name)  # Stop counting work time
+        self.tasks[task.id] = updated_task
+        self.notify_task_changed(updated_task)
+        if self.gui:
+            self.gui.update_task_status(f"✅ Task {task.title} completed by {agent.name}")
+            self.gui.update_communication_log(f"✅ {agent.name} completed task: {task.title}")
+        self.show_final_report(updated_task)
+        return updated_task
+
+    def report_unassignable(self, task: Task):
+        if self.gui:
+            self.gui.update_task_status(f"❌ No suitable agent for task {task.title}")
+            self.gui.update_communication_log(f"❌ No suitable agent found for: {task.title}")
+        logging.warning(f"No suitable agent for task {task.title}")
 
     def find_suitable_agent(self, task: Task) -> Optional[AgentBase]:
-        # More flexible selection: by keyword in description and task type
-        description_lower = task.description.lower()
-        title_lower = task.title.lower()
-        
-        # Check for coding-related keywords
-        coding_keywords = ["kod", "code", "program", "website", "web", "html", "css", "javascript", "react", "vue", "app", "application", "site", "strona"]
-        if any(keyword in description_lower or keyword in title_lower for keyword in coding_keywords):
-            for agent in self.agents.values():
-                if agent.agent_type == AgentType.CODER:
-                    return agent
-        
-        # Check for analysis-related keywords
-        analysis_keywords = ["analiz", "data", "dane", "statistics", "statystyki", "report", "raport", "dashboard", "analytics"]
-        if any(keyword in description_lower or keyword in title_lower for keyword in analysis_keywords):
-            for agent in self.agents.values():
-                if agent.agent_type == AgentType.ANALYST:
-                    return agent
+        candidates = self.find_capable_agents(task)
+        return candidates[0] if candidates else None
+
+    def find_capable_agents(self, task: Task) -> List[AgentBase]:
+        """Agents that can take the task, best match first"""
+        return self.agents_for_capability(self.task_capability(task))
+
+    def task_capability(self, task: Task) -> Tuple[frozenset, bool]:
+        """What the task needs, by keyword in title and description: (categories, website in description).
+
+        The task queue computes it once per task, when the task is put.
+        """
+        description_found = ROUTING.classify(task.description)
+        found = description_found | ROUTING.classify(task.title)
+        return frozenset(found), "website" in description_found
+
+    def agents_for_capability(self, capability: Tuple[frozenset, bool]) -> List[AgentBase]:
+        """Agents for a task_capability() result, best match first"""
+        found, website = capability
+        of_type = self.agents.by_type
         
-        # Check for image-related keywords
-        image_keywords = ["obraz", "image", "picture", "photo", "graphic", "design", "logo", "banner", "mockup"]
-        if any(keyword in description_lower or keyword in title_lower for keyword in image_keywords):
-            for agent in self.agents.values():
-                if agent.agent_type == AgentType.IMAGE_GEN:
-                    return agent
-        
-        # Check for text-related keywords
-        text_keywords = ["tekst", "text", "content", "copy", "writing", "article", "blog", "seo", "copywriting"]
-        if any(keyword in description_lower or keyword in title_lower for keyword in text_keywords):
-            for agent in self.agents.values():
-                if agent.agent_type == AgentType.TEXT_ANALYST:
-                    return agent
+        for category, agent_type in (("coding", AgentType.CODER), ("analysis", AgentType.ANALYST),
+                                     ("image", AgentType.IMAGE_GEN), ("text", AgentType.TEXT_ANALYST)):
+            if category in found and of_type(agent_type):
+                return of_type(agent_type)
         
         # Default: try to find any available agent based on task type
         # For website-related tasks, prefer CODER
-        if "website" in description_lower or "web" in description_lower or "site" in description_lower:
-            for agent in self.agents.values():
-                if agent.agent_type == AgentType.CODER:
-                    return agent
+        if website and of_type(AgentType.CODER):
+            return of_type(AgentType.CODER)
         
         # For general tasks, prefer BOSS type agents
-        for agent in self.agents.values():
-            if agent.agent_type == AgentType.BOSS:
-                return agent
-        
-        # If no specific match, return the first available agent
-        if self.agents:
-            return list(self.agents.values())[0]
+        if of_type(AgentType.BOSS):
+            return of_type(AgentType.BOSS)
         
-        return None
+        # If no specific match, any available agent
+        return list(self.agents.values())
 
     def show_final_report(self, task: Task):
         report = f"\n=== FINAL REPORT ===\nTask: {task.title}\nDescription: {task.description}\nStatus: {task.status.name}\nResults:\n"
@@ -552,9 +777,9 @@ class OfficeSimulation:
 
 office = None
 
-async def main():
-    global office
-    office = OfficeSimulation()
+def build_default_office(clock=None) -> OfficeSimulation:
+    """The office with the website team; AIOFFICE_STATE_DIR / AIOFFICE_TASK_DB enable persistence and the task store"""
+    office = OfficeSimulation(clock)
     # New company agents (ENGLISH, matching business descriptions)
     web_dev = AgentBase(
         id="web_dev1",
@@ -700,6 +925,22 @@ async def main():
     office.add_agent(integrator, is_boss=True)
     office.add_agent(mobile)
     office.add_agent(feedback)
+    
+    # Opcjonalny zapis stanu w dzienniku (AIOFFICE_STATE_DIR=katalog)
+    state_dir = os.environ.get("AIOFFICE_STATE_DIR")
+    if state_dir:
+        office.enable_persistence(state_dir)
+    # Opcjonalna baza SQLite z indeksami do zapytań o taski (AIOFFICE_TASK_DB=plik lub :memory:)
+    task_db = os.environ.get("AIOFFICE_TASK_DB")
+    if task_db:
+        office.enable_task_store(task_db)
+    return office
+
+async def main():
+    global office
+    # GUI (tkinter, matplotlib) importowane dopiero tutaj - headless.py działa bez niego
+    from gui import run_gui
+    office = build_default_office()
     bus_task = asyncio.create_task(office.bus.start())
     process_task_task = asyncio.create_task(office.process_tasks())
     office.gui = run_gui(office, AgentBase, TaskPriority, asyncio, TaskStatus)
@@ -0,0 +1,164 @@
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DEFAULT_MAX_SPANS = 100000
+# Labels that split histograms; the others (task, agent, ...) only go into the trace
+HISTOGRAM_LABELS = ("stage", "role", "outcome", "kind")
+METRIC_NAME = "aioffice_span_seconds"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: upper bound of the bucket holding it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Span:
+    """Timing of one operation; use as a context manager, labels may be added inside."""
+
+    def __init__(self, metrics: "Metrics", name: str, labels: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and "outcome" not in self.labels:
+            self.labels["outcome"] = "cancelled" if exc_type.__name__ == "CancelledError" else "error"
+        self.metrics.record(self.name, self.start, time.perf_counter(), **self.labels)
+        return False
+
+
+class Metrics:
+    """Spans (for a trace) and latency histograms (for Prometheus) of one office.
+
+    `span(name, **labels)` times a block; `record()` adds a span whose start and
+    end were measured elsewhere. Times are wall clock (perf_counter), also under a
+    simulated clock, since the point is to see where real time goes. Only the
+    last `max_spans` spans are kept; histograms count everything.
+    """
+
+    def __init__(self, max_spans: int = DEFAULT_MAX_SPANS, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.origin = time.perf_counter()
+        self.spans = deque(maxlen=max_spans)  # (name, start, end, labels, thread id)
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **labels) -> Span:
+        return Span(self, name, labels)
+
+    def record(self, name: str, start: float, end: float, **labels):
+        key = (name, tuple((label, str(labels[label])) for label in HISTOGRAM_LABELS if label in labels))
+        with self._lock:
+            self.spans.append((name, start, end, labels, threading.get_ident()))
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(end - start)
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.histograms.clear()
+            self.origin = time.perf_counter()
+
+    # Export
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per histogram: name, labels, count, total, mean, p50 and p99 (bucket bounds)."""
+        with self._lock:
+            items = list(self.histograms.items())
+        return [{
+            "name": name, "labels": dict(labels), "count": histogram.count, "total": histogram.sum,
+            "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+            "p50": histogram.quantile(0.5), "p99": histogram.quantile(0.99),
+        } for (name, labels), histogram in sorted(items)]
+
+    def to_prometheus(self) -> str:
+        """Histograms in the Prometheus text exposition format."""
+        lines = [f"# HELP {METRIC_NAME} Duration of office operations (stages, LLM calls, conference rounds, bus messages).",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            items = sorted(self.histograms.items())
+            for (name, labels), histogram in items:
+                base = ",".join([f'span="{_escape(name)}"'] + [f'{label}="{_escape(value)}"' for label, value in labels])
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{METRIC_NAME}_bucket{{{base},le="{le}"}} {cumulative}')
+                lines.append(f"{METRIC_NAME}_sum{{{base}}} {histogram.sum!r}")
+                lines.append(f"{METRIC_NAME}_count{{{base}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Spans as Chrome trace events (chrome://tracing, Perfetto); one lane per agent."""
+        with self._lock:
+            spans = list(self.spans)
+        lanes: Dict[str, int] = {}
+        events = []
+        for name, start, end, labels, thread_id in spans:
+            lane = str(labels.get("agent") or labels.get("host") or name.split(".")[0])
+            tid = lanes.setdefault(lane, len(lanes) + 1)
+            events.append({
+                "name": labels.get("stage") or name, "cat": name, "ph": "X", "pid": 1, "tid": tid,
+                "ts": round((start - self.origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1),
+                "args": dict({key: _json_value(value) for key, value in labels.items()}, thread=thread_id),
+            })
+        metadata = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": lane}}
+                    for lane, tid in lanes.items()]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def write_prometheus(self, filename: str):
+        from storage import write_atomic
+        write_atomic(filename, self.to_prometheus())
+
+    def write_chrome_trace(self, filename: str):
+        from storage import write_atomic
+        write_atomic(filename, json.dumps(self.to_chrome_trace(), ensure_ascii=False))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _json_value(value):
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+
+DEFAULT_METRICS = Metrics()
+
+
+def metrics_of(office) -> Metrics:
+    """Metrics of `office`, falling back to a process-wide instance for offices without them."""
+    return getattr(office, "metrics", None) or DEFAULT_METRICS
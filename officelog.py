@@ -0,0 +1,132 @@
+"""Leveled, structured logging for the office (replaces the DEBUG/TERMINAL prints).
+
+    from officelog import get_logger
+    log = get_logger("gui.charts")
+    log.debug("update_charts agents=%s", names)                 # formatted only if emitted
+    log.debug("stage done", extra=fields(stage=name, secs=t))  # structured fields
+
+Loggers live under the "aioffice" namespace, one per subsystem. Configuration
+comes from the environment the first time a logger is requested:
+
+    AIOFFICE_LOG_LEVEL   DEBUG / INFO / WARNING (default) / ...
+    AIOFFICE_LOG_FORMAT  text (default) or json - one JSON object per line
+    AIOFFICE_LOG_RATE    max records per second per subsystem (default 20, 0 = no limit)
+
+With the default level a disabled debug call costs one cached level check;
+arguments are never formatted. The rate limit drops the excess of a chatty
+subsystem and reports how many records it dropped on the next one it lets through.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+ROOT = "aioffice"
+DEFAULT_LEVEL = "WARNING"
+DEFAULT_RATE = 20.0
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def fields(**values) -> Dict[str, Any]:
+    """`extra=` argument carrying structured fields of a record."""
+    return {"fields": values}
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per subsystem: `rate` records per second with bursts of `burst`."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: Optional[float] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._buckets: Dict[str, list] = {}  # logger name -> [tokens, last time, dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True  # Warnings and errors are never dropped
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(record.name, [self.burst, now, 0])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+def _subsystem(record: logging.LogRecord) -> str:
+    return record.name[len(ROOT) + 1:] if record.name.startswith(ROOT + ".") else record.name
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s [%(levelname)s] %(subsystem)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.subsystem = _subsystem(record)
+        line = super().format(record)
+        extra = getattr(record, "fields", None)
+        if extra:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in extra.items())
+        if getattr(record, "suppressed", 0):
+            line += f" (+{record.suppressed} suppressed)"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, subsystem, msg, fields, suppressed."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "subsystem": _subsystem(record),
+            "msg": record.getMessage(),
+        }
+        extra = getattr(record, "fields", None)
+        if extra:
+            entry["fields"] = extra
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure(level: Optional[str] = None, json_format: Optional[bool] = None,
+              rate: Optional[float] = None, stream=None):
+    """(Re)configure the office loggers; unset arguments come from the environment."""
+    global _configured
+    level = (level or os.environ.get("AIOFFICE_LOG_LEVEL", DEFAULT_LEVEL)).upper()
+    if json_format is None:
+        json_format = os.environ.get("AIOFFICE_LOG_FORMAT", "text").lower() == "json"
+    if rate is None:
+        rate = float(os.environ.get("AIOFFICE_LOG_RATE", DEFAULT_RATE))
+    with _configure_lock:
+        root = logging.getLogger(ROOT)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(JsonFormatter() if json_format else TextFormatter())
+        handler.addFilter(RateLimitFilter(rate))
+        root.addHandler(handler)
+        root.setLevel(level)
+        root.propagate = False
+        _configured = True
+    return root
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    if not _configured:
+        configure()
+    return logging.getLogger(f"{ROOT}.{subsystem}")
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage import write_atomic, task_to_dict, task_from_dict, agent_to_dict, agent_from_dict, state_to_dict
+from blobstore import BlobStore
+
+SNAPSHOT_FILE = "snapshot.json"
+LOG_FILE = "wal.jsonl"
+DEFAULT_COMPACT_EVERY = 1000  # Log records between automatic snapshots
+
+
+class PersistenceEngine:
+    """Write-ahead log plus periodic snapshots of an office's agents and tasks.
+
+    Every mutation is appended to `wal.jsonl` as one JSON line holding the full
+    record that changed, so a save costs the size of the change. After
+    `compact_every` records the whole state is written to `snapshot.json`
+    (atomically) and the log is truncated. Each record carries a sequence number
+    and the snapshot remembers the last one it includes. Recovery loads the
+    snapshot and replays only the log records after it. A torn last line from a
+    crash is ignored. Large texts are logged once as 'blob' records and
+    referenced by key from the task records (see blobstore.py).
+    """
+
+    def __init__(self, directory: str, compact_every: int = DEFAULT_COMPACT_EVERY, fsync: bool = False):
+        self.directory = directory
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.office = None
+        self.seq = 0
+        self.records_since_snapshot = 0
+        self._lock = threading.Lock()
+        self._log = None
+        self._logged_blobs = set()  # Blob keys already in the snapshot or the current log
+        os.makedirs(directory, exist_ok=True)
+
+    # Recovery
+
+    def recover(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """State on disk as ({agent_id: dict}, {task_id: dict}, {blob_key: text}): snapshot plus log tail."""
+        agents: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, Dict[str, Any]] = {}
+        blobs: Dict[str, str] = {}
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot.get('seq', 0)
+            agents = {a['id']: a for a in snapshot.get('agents', [])}
+            tasks = {t['id']: t for t in snapshot.get('tasks', [])}
+            blobs = dict(snapshot.get('blobs', {}))
+        self.seq = snapshot_seq
+        self.records_since_snapshot = 0
+        for record in self._read_log():
+            if record['seq'] <= snapshot_seq:
+                continue  # Already in the snapshot (crash between snapshot and truncation)
+            op = record['op']
+            if op == 'task':
+                tasks[record['data']['id']] = record['data']
+            elif op == 'agent':
+                agents[record['data']['id']] = record['data']
+            elif op == 'blob':
+                blobs[record['key']] = record['text']
+            elif op == 'remove_task':
+                tasks.pop(record['id'], None)
+            elif op == 'remove_agent':
+                agents.pop(record['id'], None)
+            self.seq = record['seq']
+            self.records_since_snapshot += 1
+        self._logged_blobs = set(blobs)
+        return agents, tasks, blobs
+
+    def _read_log(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.log_path):
+            return []
+        records = []
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # Torn write at the end of the log
+        return records
+
+    def attach(self, office):
+        """Load the saved state into `office` and log its changes from now on.
+
+        Recovered agents and tasks are merged by id into what the office already
+        has, so roster agents missing from the saved state (e.g. new ones) stay.
+        """
+        agents, tasks, blobs = self.recover()
+        for data in agents.values():
+            office.agents[data['id']] = agent_from_dict(data)
+        blob_store = BlobStore.from_table(blobs)
+        office.tasks.update({task_id: task_from_dict(data, blob_store) for task_id, data in tasks.items()})
+        self.office = office
+        office.persistence = self
+        return office
+
+    # Logging
+
+    def _append(self, record: Dict[str, Any], blobs: Optional[Dict[str, str]] = None):
+        # `blobs` referenced by the record are logged first unless already on disk; both
+        # go out under one lock, so a compaction cannot fall between them
+        with self._lock:
+            if self._log is None:
+                self._log = open(self.log_path, 'a', encoding='utf-8')
+            records = [{'op': 'blob', 'key': key, 'text': text}
+                       for key, text in (blobs or {}).items() if key not in self._logged_blobs]
+            records.append(record)
+            for entry in records:
+                self.seq += 1
+                entry['seq'] = self.seq
+                self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self._logged_blobs.update(blobs or ())
+            self.records_since_snapshot += len(records)
+            compact = self.office is not None and self.records_since_snapshot >= self.compact_every
+        if compact:
+            self.snapshot()
+
+    def record_task(self, task):
+        refs = BlobStore()
+        data = task_to_dict(task, refs)
+        self._append({'op': 'task', 'data': data}, refs.table())
+
+    def record_agent(self, agent):
+        self._append({'op': 'agent', 'data': agent_to_dict(agent)})
+
+    def record_task_removed(self, task_id: str):
+        self._append({'op': 'remove_task', 'id': task_id})
+
+    def record_agent_removed(self, agent_id: str):
+        self._append({'op': 'remove_agent', 'id': agent_id})
+
+    # Compaction
+
+    def snapshot(self, office=None):
+        """Write the whole state atomically and start a fresh log."""
+        office = office or self.office
+        with self._lock:
+            data = state_to_dict(list(office.agents.values()), list(office.tasks.values()))
+            data['seq'] = self.seq
+            write_atomic(self.snapshot_path, json.dumps(data, ensure_ascii=False))
+            if self._log is not None:
+                self._log.close()
+            self._log = open(self.log_path, 'w', encoding='utf-8')
+            self.records_since_snapshot = 0
+            self._logged_blobs = set(data['blobs'])
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
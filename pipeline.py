@@ -0,0 +1,173 @@
+import asyncio
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from tasks import Task, TaskPriority
+from clock import clock_of
+from metrics import metrics_of
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of a project pipeline, handled by the agent with `role`.
+
+    The stage's task description is the project description (no `inputs`), the
+    result of its single input stage, `str({agent_id: result})` of several input
+    stages, or the fixed `text`. `parent` and `creator` name the stages whose task
+    and agent become the new task's parent and creator. The task's title is
+    `title_format` filled with the stage title and the project title.
+    """
+    name: str
+    role: str
+    title: str
+    depends_on: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    text: Optional[str] = None
+    parent: Optional[str] = None
+    creator: Optional[str] = None
+    optional: bool = False  # Skip the stage (instead of failing) when nobody has the role
+    title_format: str = "{stage}: {title}"
+
+
+@dataclass
+class StageRun:
+    stage: Stage
+    agent: Optional[object] = None
+    task: Optional[Task] = None
+    ready_at: float = 0.0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def result(self):
+        if self.task is None or self.agent is None:
+            return None
+        return self.task.results.get(self.agent.id)
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+    @property
+    def wait(self) -> float:
+        # Time between the stage becoming runnable and actually starting
+        return self.started_at - self.ready_at
+
+
+def topological_order(stages: List[Stage]) -> List[Stage]:
+    """Order stages so every stage comes after its dependencies; reject cycles."""
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.depends_on:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+    ordered, state = [], {}
+
+    def visit(stage: Stage):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Dependency cycle at stage '{stage.name}'")
+        state[stage.name] = "visiting"
+        for dep in stage.depends_on:
+            visit(by_name[dep])
+        state[stage.name] = "done"
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+class PipelineScheduler:
+    """Runs a stage graph on an office, starting each stage as soon as its dependencies finish.
+
+    A stage starts once its agent also has a free slot in the office's worker
+    pool, so it never runs alongside more queued tasks or other projects'
+    stages than the agent's slots allow.
+    """
+
+    def __init__(self, office):
+        self.office = office
+
+    async def run(self, stages: List[Stage], title: str, description: str,
+                  priority: TaskPriority = TaskPriority.MEDIUM) -> Dict[str, StageRun]:
+        runs: Dict[str, StageRun] = {}
+        futures: Dict[str, asyncio.Task] = {}
+        for stage in topological_order(stages):
+            runs[stage.name] = StageRun(stage)
+            deps = [futures[dep] for dep in stage.depends_on]
+            futures[stage.name] = asyncio.ensure_future(
+                self._run_stage(stage, deps, runs, title, description, priority))
+        try:
+            await asyncio.gather(*futures.values())
+        except BaseException:
+            for future in futures.values():
+                future.cancel()
+            raise
+        return runs
+
+    def _describe(self, stage: Stage, runs: Dict[str, StageRun], description: str) -> str:
+        if stage.text is not None:
+            return stage.text
+        if not stage.inputs:
+            return description
+        inputs = [runs[name] for name in stage.inputs if runs[name].task is not None]
+        if len(stage.inputs) == 1:
+            return inputs[0].result if inputs else ""
+        return str({run.agent.id: run.result for run in inputs})
+
+    async def _run_stage(self, stage: Stage, deps, runs: Dict[str, StageRun], title: str,
+                         description: str, priority: TaskPriority):
+        if deps:
+            await asyncio.gather(*deps)
+        office = self.office
+        clock = clock_of(office)
+        run = runs[stage.name]
+        run.ready_at = clock.monotonic()
+        agent = office._find_agent_by_role(stage.role)
+        if agent is None:
+            if stage.optional:
+                run.started_at = run.finished_at = run.ready_at
+                return run
+            raise RuntimeError(f"No agent with role '{stage.role}' for stage '{stage.name}'")
+        pool = getattr(office, "worker_pool", None)
+        async with pool.slot(agent) if pool is not None else nullcontext():
+            parent = runs[stage.parent].task if stage.parent else None
+            creator = runs[stage.creator].agent if stage.creator else None
+            now = clock.time()
+            task_description = self._describe(stage, runs, description)
+            blobs = getattr(office, "blobs", None)
+            if blobs is not None:
+                task_description = blobs.intern(task_description)
+            task = Task(title=stage.title_format.format(stage=stage.title, title=title), description=task_description,
+                        creator_id=creator.id if creator else "user",
+                        parent_task_id=parent.id if parent else None, priority=priority,
+                        created_at=now, updated_at=now)
+            office.tasks[task.id] = task
+            office.assign_task(task.id, agent.id)
+            run.agent, run.task = agent, task
+            run.started_at = clock.monotonic()
+            if office.gui:
+                office.gui.start_agent_work(agent.name)
+            try:
+                with metrics_of(office).span("stage", stage=stage.name, role=agent.role, agent=agent.name, task=task.id):
+                    await agent.process_task(task, office=office)
+            finally:
+                run.finished_at = clock.monotonic()
+                if office.gui:
+                    office.gui.stop_agent_work(agent.name)
+        return run
+
+
+def critical_path(runs: Dict[str, StageRun]) -> Tuple[List[str], float]:
+    """Longest chain of stage durations through the graph (what bounds project latency)."""
+    best: Dict[str, Tuple[float, List[str]]] = {}
+    for stage in topological_order([run.stage for run in runs.values()]):
+        length, path = max((best[dep] for dep in stage.depends_on), default=(0.0, []), key=lambda item: item[0])
+        best[stage.name] = (length + runs[stage.name].duration, path + [stage.name])
+    if not best:
+        return [], 0.0
+    length, path = max(best.values(), key=lambda item: item[0])
+    return path, length
@@ -0,0 +1,69 @@
+"""Import cost of the office's modules, measured in a fresh interpreter (-X importtime).
+
+    python profile_startup.py                    # headless runner: import headless, main
+    python profile_startup.py --modules gui      # the GUI
+    python profile_startup.py --top 30 --all     # include stdlib / third-party modules
+
+Prints the slowest imports by cumulative time (the module plus everything it
+pulls in) and by self time, then the wall time of a cold `headless.py --help`.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def project_modules():
+    return {name[:-3] for name in os.listdir(HERE) if name.endswith(".py")}
+
+
+def import_times(modules):
+    """[(module, self_us, cumulative_us, depth)] from `python -X importtime`."""
+    code = "import " + ", ".join(modules)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=HERE,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise SystemExit(completed.stderr)
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def cold_start():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(HERE, "headless.py"), "--help"], cwd=HERE,
+                   capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default="headless,main", help="modules to import, comma separated")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    parser.add_argument("--all", action="store_true", help="list every module, not only this project's")
+    args = parser.parse_args()
+
+    rows = import_times(args.modules.split(","))
+    ours = project_modules()
+    listed = rows if args.all else [row for row in rows if row[0] in ours]
+    total = sum(row[1] for row in rows)
+    print(f"Imported {len(rows)} modules in {total / 1000:.1f} ms ({args.modules})\n")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for name, self_us, cumulative_us, _depth in sorted(listed, key=lambda row: -row[2])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+    print(f"\n{'self ms':>8}  module (slowest on their own)")
+    for name, self_us, _cumulative_us, _depth in sorted(rows, key=lambda row: -row[1])[:args.top]:
+        print(f"{self_us / 1000:>8.1f}  {name}")
+    print(f"\nCold start of headless.py --help: {cold_start() * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class AgentRegistry(MutableMapping):
+    """Agents by id, with hash indexes by role and agent type.
+
+    Behaves like the plain `{agent_id: agent}` dict it replaces, and keeps the
+    indexes up to date on every insert and delete. Role lookups are
+    case-insensitive. If an agent's role or type change after it was added,
+    call `reindex(agent_id)` (OfficeSimulation.notify_agent_changed does).
+    """
+
+    def __init__(self, agents: Iterable = ()):
+        self._agents: Dict[str, object] = {}
+        self._by_role: Dict[str, List] = {}
+        self._by_type: Dict[object, List] = {}
+        # agent_id -> (role key, type key) it is indexed under, so stale keys can be removed
+        self._keys: Dict[str, Tuple[str, object]] = {}
+        for agent in agents:
+            self[agent.id] = agent
+
+    @staticmethod
+    def _index_add(index: Dict, key, agent):
+        index.setdefault(key, []).append(agent)
+
+    @staticmethod
+    def _index_remove(index: Dict, key, agent):
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket[:] = [other for other in bucket if other is not agent]
+        if not bucket:
+            del index[key]
+
+    def _index(self, agent_id: str, agent):
+        role, agent_type = self._keys[agent_id] = (agent.role.lower(), agent.agent_type)
+        self._index_add(self._by_role, role, agent)
+        self._index_add(self._by_type, agent_type, agent)
+
+    def _unindex(self, agent_id: str, agent):
+        # The keys it was indexed under, even if its role or type changed since
+        role, agent_type = self._keys.pop(agent_id)
+        self._index_remove(self._by_role, role, agent)
+        self._index_remove(self._by_type, agent_type, agent)
+
+    def __getitem__(self, agent_id: str):
+        return self._agents[agent_id]
+
+    def __setitem__(self, agent_id: str, agent):
+        old = self._agents.get(agent_id)
+        if old is not None:
+            self._unindex(agent_id, old)
+        self._agents[agent_id] = agent
+        self._index(agent_id, agent)
+
+    def __delitem__(self, agent_id: str):
+        agent = self._agents.pop(agent_id)
+        self._unindex(agent_id, agent)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._agents)
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __contains__(self, agent_id) -> bool:
+        return agent_id in self._agents
+
+    def __repr__(self) -> str:
+        return f"AgentRegistry({list(self._agents)})"
+
+    def reindex(self, agent_id: str):
+        """Move one agent's index entries after its role or type changed."""
+        agent = self._agents[agent_id]
+        if self._keys[agent_id] != (agent.role.lower(), agent.agent_type):
+            self._unindex(agent_id, agent)
+            self._index(agent_id, agent)
+
+    def find_by_role(self, role: str) -> Optional[object]:
+        bucket = self._by_role.get(role.lower())
+        return bucket[0] if bucket else None
+
+    def find_by_type(self, agent_type) -> Optional[object]:
+        bucket = self._by_type.get(agent_type)
+        return bucket[0] if bucket else None
+
+    def by_role(self, role: str) -> List:
+        return list(self._by_role.get(role.lower(), ()))
+
+    def by_type(self, agent_type) -> List:
+        return list(self._by_type.get(agent_type, ()))
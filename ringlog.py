@@ -0,0 +1,95 @@
+import os
+import threading
+from collections import deque
+from typing import Iterable, List, Optional
+
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".logs")
+DEFAULT_MAX_LINES = 2000
+DEFAULT_SPILL_BYTES = 4 * 1024 * 1024
+DEFAULT_SPILL_BACKUPS = 3
+
+
+class RingLog:
+    """Last `max_lines` lines of a log pane in memory; older lines spill to disk.
+
+    Lines pushed out of the ring are appended to `spill_path`. When that file
+    reaches `max_spill_bytes` it is rotated (`name.1`, `name.2`, ... up to
+    `backups` files) so the disk use is bounded too. `history()` pages back
+    through the spilled lines, newest first. Pass `spill_path=None` to drop
+    old lines instead.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, spill_path: Optional[str] = None,
+                 max_spill_bytes: int = DEFAULT_SPILL_BYTES, backups: int = DEFAULT_SPILL_BACKUPS):
+        self.max_lines = max_lines
+        self.spill_path = spill_path
+        self.max_spill_bytes = max_spill_bytes
+        self.backups = backups
+        self._lines = deque()
+        self._lock = threading.Lock()
+        self.spilled = 0  # Lines written to disk in this session
+
+    def extend(self, lines: Iterable[str]) -> int:
+        """Add lines (without trailing newlines); returns how many old lines left the ring."""
+        with self._lock:
+            self._lines.extend(lines)
+            evicted = [self._lines.popleft() for _ in range(max(0, len(self._lines) - self.max_lines))]
+            if evicted and self.spill_path:
+                self._spill(evicted)
+            return len(evicted)
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            return list(self._lines)
+
+    def clear(self):
+        with self._lock:
+            self._lines.clear()
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def _spill(self, lines: List[str]):
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+            size = f.tell()
+        self.spilled += len(lines)
+        if size >= self.max_spill_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        for index in range(self.backups, 0, -1):
+            source = self.spill_path if index == 1 else f"{self.spill_path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.spill_path}.{index}")
+        if not self.backups and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def _spill_files(self) -> List[str]:
+        """Spill files from newest to oldest."""
+        if not self.spill_path:
+            return []
+        names = [self.spill_path] + [f"{self.spill_path}.{index}" for index in range(1, self.backups + 1)]
+        return [name for name in names if os.path.exists(name)]
+
+    def history(self, page: int = 0, page_size: int = 200) -> List[str]:
+        """Page `page` of the spilled lines (0 = just before the ring), oldest line first."""
+        skip = page * page_size
+        collected: List[str] = []
+        with self._lock:
+            for name in self._spill_files():
+                with open(name, 'r', encoding='utf-8') as f:
+                    file_lines = f.read().splitlines()
+                # This file holds older lines than the ones already seen
+                end = len(file_lines)
+                if skip >= end:
+                    skip -= end
+                    continue
+                end -= skip
+                skip = 0
+                take = min(page_size - len(collected), end)
+                collected = file_lines[end - take:end] + collected
+                if len(collected) >= page_size:
+                    break
+        return collected
@@ -1,9 +1,30 @@
 import json
-from typing import Any
+import os
+from collections.abc import Mapping
+from dataclasses import fields
+from enum import Enum
+from typing import Any, Dict
+
+from tasks import Task, TaskStatus, TaskPriority
+
+
+def write_atomic(filename: str, data):
+    """Write `data` (str or bytes) to a temporary file next to `filename`, then swap it in.
+
+    A crash mid-write leaves the previous file intact instead of a truncated one.
+    """
+    tmp_name = f"{filename}.tmp"
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    with open(tmp_name, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_name, filename)
+
 
 def save_state(filename: str, data: Any):
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_atomic(filename, json.dumps(data, ensure_ascii=False, indent=2))
 
 def load_state(filename: str) -> Any:
     try:
@@ -17,4 +38,77 @@ def load_state(filename: str) -> Any:
         return {'agents': [], 'tasks': []}
     except Exception as e:
         print(f"Błąd podczas wczytywania {filename}: {e}")
-        return {'agents': [], 'tasks': []} 
\ No newline at end of file
+        return {'agents': [], 'tasks': []}
+
+
+# Konwersja obiektów na słowniki JSON (enumy po nazwie, zbiory jako posortowane listy)
+
+def _to_json_value(value):
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, Mapping):
+        return dict(value)
+    return value
+
+
+def task_to_dict(task: Task, blobs=None) -> Dict[str, Any]:
+    """With a BlobStore, a large description and large results become {"$blob": key} references."""
+    data = {f.name: _to_json_value(getattr(task, f.name)) for f in fields(Task)}
+    if blobs is not None:
+        data['description'] = blobs.ref(data['description'])
+        data['results'] = {agent_id: blobs.ref(result) for agent_id, result in data['results'].items()}
+    return data
+
+
+def task_from_dict(data: Dict[str, Any], blobs=None) -> Task:
+    known = {f.name for f in fields(Task)}
+    data = {key: value for key, value in data.items() if key in known}
+    if blobs is not None:
+        if 'description' in data:
+            data['description'] = blobs.resolve(data['description'])
+        if 'results' in data:
+            data['results'] = {agent_id: blobs.resolve(result) for agent_id, result in data['results'].items()}
+    if isinstance(data.get('status'), str):
+        data['status'] = TaskStatus[data['status']]
+    if isinstance(data.get('priority'), str):
+        data['priority'] = TaskPriority[data['priority']]
+    if 'dependencies' in data:
+        data['dependencies'] = set(data['dependencies'])
+    return Task(**data)
+
+
+def agent_to_dict(agent) -> Dict[str, Any]:
+    return {f.name: _to_json_value(getattr(agent, f.name)) for f in fields(agent)}
+
+
+def agent_from_dict(data: Dict[str, Any]):
+    from agents import AgentBase, AgentType
+    known = {f.name for f in fields(AgentBase)}
+    data = {key: value for key, value in data.items() if key in known}
+    if isinstance(data.get('agent_type'), str):
+        data['agent_type'] = AgentType[data['agent_type']]
+    return AgentBase(**data)
+
+
+def state_to_dict(agents, tasks) -> Dict[str, Any]:
+    """JSON-ready state; each large text is stored once in 'blobs' and referenced from the tasks."""
+    from blobstore import BlobStore
+    blobs = BlobStore()
+    return {
+        'agents': [agent_to_dict(agent) for agent in agents],
+        'tasks': [task_to_dict(task, blobs) for task in tasks],
+        'blobs': blobs.table(),
+    }
+
+
+def state_from_dict(data: Dict[str, Any]):
+    """(agents, tasks, blobs) from state_to_dict() output, or from older files without blobs."""
+    from blobstore import BlobStore
+    blobs = BlobStore.from_table(data.get('blobs', {}))
+    agents = [agent_from_dict(a) for a in data.get('agents', [])]
+    tasks = [task_from_dict(t, blobs) for t in data.get('tasks', [])]
+    return agents, tasks, blobs
@@ -0,0 +1,226 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from tasks import Task, TaskStatus, TaskPriority
+
+FINAL_CODE_MARKER = "=== QWEN3 FINAL CODE ==="
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    creator_id TEXT,
+    assignee_id TEXT,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    parent_task_id TEXT,
+    created_at REAL,
+    updated_at REAL,
+    completed_at REAL,
+    dependencies TEXT NOT NULL DEFAULT '[]',
+    subtasks TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, completed_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee ON tasks (assignee_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_creator ON tasks (creator_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_parent ON tasks (parent_task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed_at ON tasks (completed_at);
+
+CREATE TABLE IF NOT EXISTS results (
+    task_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    result TEXT,
+    has_final_code INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (task_id, agent_id)
+);
+CREATE INDEX IF NOT EXISTS idx_results_agent ON results (agent_id);
+CREATE INDEX IF NOT EXISTS idx_results_final_code ON results (task_id) WHERE has_final_code = 1;
+
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    sender_id TEXT,
+    recipient_id TEXT,
+    task_id TEXT,
+    content TEXT,
+    created_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_task ON messages (task_id, created_at);
+"""
+
+
+class TaskStore:
+    """Embedded SQLite copy of the office's tasks, results and messages.
+
+    The office keeps working on its in-memory Task objects and mirrors every
+    change here (see OfficeSimulation.notify_task_changed). The indexes on
+    status, assignee, parent and completion time let the GUI find e.g. the
+    latest completed task without scanning all tasks. Queries return task ids.
+    The connection is shared between the GUI thread and the project threads,
+    guarded by a lock.
+
+    Writes are visible to queries at once but committed in batches: after
+    `commit_every` writes or `commit_interval` seconds after the first
+    uncommitted one, on a timer thread, so the event loop does not wait for a
+    commit on every task change. `commit_interval=0` commits every write.
+    A crash loses at most the last batch; the store is a copy of the office's
+    tasks and is refilled when a state is loaded.
+    """
+
+    def __init__(self, path: str = ":memory:", commit_interval: float = 0.5, commit_every: int = 200):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        self._pending = 0  # Writes since the last commit
+        self._timer: Optional[threading.Timer] = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")  # With WAL: fsync at checkpoints, not every commit
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def flush(self):
+        """Commit the writes of the current batch now."""
+        with self._lock:
+            self._commit()
+
+    def _commit(self):
+        # Called with the lock held
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    def _written(self):
+        # Called with the lock held, after each write
+        self._pending += 1
+        if self.commit_interval <= 0 or self._pending >= self.commit_every:
+            self._commit()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.commit_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # Writes
+
+    def upsert_task(self, task: Task):
+        with self._lock:
+            self._upsert(task)
+            self._written()
+
+    def _upsert(self, task: Task):
+        results = [
+            (task.id, agent_id, result if isinstance(result, str) else str(result),
+             1 if isinstance(result, str) and FINAL_CODE_MARKER in result else 0)
+            for agent_id, result in task.results.items()
+        ]
+        # Update in place: INSERT OR REPLACE would delete the row and insert it again, rewriting every index
+        self._conn.execute(
+            "INSERT INTO tasks (id, title, description, creator_id, assignee_id, status, priority,"
+            " parent_task_id, created_at, updated_at, completed_at, dependencies, subtasks)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (id) DO UPDATE SET title = excluded.title, description = excluded.description,"
+            " creator_id = excluded.creator_id, assignee_id = excluded.assignee_id, status = excluded.status,"
+            " priority = excluded.priority, parent_task_id = excluded.parent_task_id,"
+            " created_at = excluded.created_at, updated_at = excluded.updated_at,"
+            " completed_at = excluded.completed_at, dependencies = excluded.dependencies,"
+            " subtasks = excluded.subtasks",
+            (task.id, task.title, task.description, task.creator_id, task.assignee_id, task.status.name,
+             task.priority.name, task.parent_task_id, task.created_at, task.updated_at, task.completed_at,
+             json.dumps(sorted(task.dependencies)), json.dumps(task.subtasks)))
+        self._conn.execute("DELETE FROM results WHERE task_id = ?", (task.id,))
+        self._conn.executemany(
+            "INSERT INTO results (task_id, agent_id, result, has_final_code) VALUES (?, ?, ?, ?)", results)
+
+    def delete_task(self, task_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self._conn.execute("DELETE FROM results WHERE task_id = ?", (task_id,))
+            self._written()
+
+    def replace_all(self, tasks):
+        """Drop every stored task and result and store `tasks` instead (after loading a saved state)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM tasks")
+            self._conn.execute("DELETE FROM results")
+            for task in tasks:
+                self._upsert(task)
+            self._pending += 1
+            self._commit()  # One transaction for the whole state
+
+    def record_message(self, message, created_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO messages (id, sender_id, recipient_id, task_id, content, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO NOTHING",
+                (message.id, message.sender_id, message.recipient_id, message.task_id, message.content, created_at))
+            self._written()
+
+    # Reads
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        rows = self._query(
+            "SELECT id, title, description, creator_id, assignee_id, status, priority, parent_task_id,"
+            " created_at, updated_at, completed_at, dependencies, subtasks FROM tasks WHERE id = ?", (task_id,))
+        if not rows:
+            return None
+        (id_, title, description, creator_id, assignee_id, status, priority, parent_task_id,
+         created_at, updated_at, completed_at, dependencies, subtasks) = rows[0]
+        results = dict(self._query("SELECT agent_id, result FROM results WHERE task_id = ?", (task_id,)))
+        return Task(id=id_, title=title, description=description, creator_id=creator_id, assignee_id=assignee_id,
+                    status=TaskStatus[status], priority=TaskPriority[priority], parent_task_id=parent_task_id,
+                    created_at=created_at, updated_at=updated_at, completed_at=completed_at,
+                    dependencies=set(json.loads(dependencies)), subtasks=json.loads(subtasks), results=results)
+
+    def latest_completed_task_id(self) -> Optional[str]:
+        rows = self._query("SELECT id FROM tasks WHERE status = ? ORDER BY completed_at DESC LIMIT 1",
+                           (TaskStatus.COMPLETED.name,))
+        return rows[0][0] if rows else None
+
+    def final_code_task_ids(self) -> List[str]:
+        """Completed tasks with an integrator's final code block, oldest first."""
+        rows = self._query(
+            "SELECT t.id FROM results r JOIN tasks t ON t.id = r.task_id"
+            " WHERE r.has_final_code = 1 AND t.status = ? GROUP BY t.id ORDER BY t.created_at, t.rowid",
+            (TaskStatus.COMPLETED.name,))
+        return [row[0] for row in rows]
+
+    def task_ids_for_assignee(self, agent_id: str) -> List[str]:
+        return [row[0] for row in self._query(
+            "SELECT id FROM tasks WHERE assignee_id = ? ORDER BY created_at, rowid", (agent_id,))]
+
+    def task_ids_involving(self, agent_id: str) -> List[str]:
+        """Tasks created by the agent or holding a result from it."""
+        return [row[0] for row in self._query(
+            "SELECT id FROM tasks WHERE creator_id = ? OR id IN (SELECT task_id FROM results WHERE agent_id = ?)"
+            " ORDER BY created_at, rowid", (agent_id, agent_id))]
+
+    def subtask_ids(self, parent_task_id: str) -> List[str]:
+        return [row[0] for row in self._query(
+            "SELECT id FROM tasks WHERE parent_task_id = ? ORDER BY created_at, rowid", (parent_task_id,))]
+
+    def status_counts(self) -> Dict[str, int]:
+        return dict(self._query("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+
+    def messages_for_task(self, task_id: str) -> List[Dict[str, object]]:
+        rows = self._query(
+            "SELECT id, sender_id, recipient_id, content, created_at FROM messages"
+            " WHERE task_id = ? ORDER BY created_at", (task_id,))
+        return [{"id": id_, "sender_id": sender, "recipient_id": recipient, "content": content, "created_at": created_at}
+                for id_, sender, recipient, content, created_at in rows]
@@ -32,4 +32,6 @@ class Task:
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
     completed_at: Optional[float] = None
-    results: Dict[str, Any] = field(default_factory=dict) 
\ No newline at end of file
+    results: Dict[str, Any] = field(default_factory=dict)
+    # agent_id -> details of how its result was produced (e.g. "generation": LLM profiles and answer lengths)
+    result_metadata: Dict[str, Dict[str, Any]] = field(default_factory=dict) 
\ No newline at end of file
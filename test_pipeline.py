@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Tests for the stage scheduler, the virtual clock, dispatch and saved state
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import binstate
+from agents import AgentBase, AgentType
+from clock import VirtualClock, make_clock
+from llm_profiles import GenerationBudget
+from main import OfficeSimulation
+from tasks import Task, TaskPriority, TaskStatus
+from storage import task_to_dict
+from pipeline import Stage, PipelineScheduler, critical_path, topological_order
+
+
+def make_agent(agent_id, role, agent_type=AgentType.TEXT_ANALYST):
+    return AgentBase(
+        id=agent_id,
+        name=agent_id.title(),
+        role=role,
+        agent_type=agent_type,
+        skills=[],
+        personality_traits=[],
+        preferred_tools=[],
+        collaborators=[]
+    )
+
+
+def make_office():
+    office = OfficeSimulation(clock=VirtualClock(start=1000.0))
+    office.add_agent(make_agent("client1", "Client Advisor"))
+    office.add_agent(make_agent("copy1", "Copywriter"))
+    office.add_agent(make_agent("ux1", "UX/UI Designer", AgentType.IMAGE_GEN))
+    office.add_agent(make_agent("qa1", "Feedback & QA Agent", AgentType.BOSS))
+    return office
+
+
+STAGES = [
+    Stage("brief", "Client Advisor", "Brief"),
+    Stage("content", "Copywriter", "Content", depends_on=("brief",), inputs=("brief",), parent="brief"),
+    Stage("layout", "UX/UI Designer", "Layout", depends_on=("brief",), inputs=("brief",), parent="brief"),
+    Stage("graphics", "AI Graphic Designer", "Graphics", depends_on=("brief",), optional=True),
+    Stage("qa", "Feedback & QA Agent", "QA", depends_on=("content", "layout", "graphics"), inputs=("content", "layout", "graphics")),
+]
+
+
+def test_parallel_stages_overlap_in_virtual_time():
+    office = make_office()
+    started = time.perf_counter()
+    runs = asyncio.run(PipelineScheduler(office).run(STAGES, "Site", "Create a website"))
+    # Virtual mode: 3 stages x 2.0 simulated seconds without actually sleeping
+    assert time.perf_counter() - started < 1.0
+    assert runs["content"].started_at == runs["layout"].started_at
+    assert runs["qa"].finished_at - runs["brief"].started_at == pytest.approx(6.0)
+    path, length = critical_path(runs)
+    assert path[0] == "brief" and path[-1] == "qa"
+    assert length == pytest.approx(6.0)
+
+
+def test_stage_inputs_parents_and_optional_stages():
+    office = make_office()
+    runs = asyncio.run(PipelineScheduler(office).run(STAGES, "Site", "Create a website"))
+    assert runs["graphics"].task is None
+    assert runs["content"].task.parent_task_id == runs["brief"].task.id
+    assert runs["content"].task.description == runs["brief"].result
+    assert set(eval(runs["qa"].task.description)) == {"copy1", "ux1"}
+    assert len(office.tasks) == 4
+
+
+def test_missing_required_role_fails():
+    office = make_office()
+    stages = [Stage("deploy", "Hosting/DevOps", "Deploy")]
+    with pytest.raises(RuntimeError):
+        asyncio.run(PipelineScheduler(office).run(stages, "Site", "Create a website"))
+
+
+def test_topological_order_rejects_cycles_and_unknown_stages():
+    with pytest.raises(ValueError):
+        topological_order([Stage("a", "x", "A", depends_on=("b",)), Stage("b", "x", "B", depends_on=("a",))])
+    with pytest.raises(ValueError):
+        topological_order([Stage("a", "x", "A", depends_on=("missing",))])
+
+
+def test_clock_modes():
+    assert isinstance(make_clock("virtual"), VirtualClock)
+    assert make_clock("accelerated", factor=4.0).factor == 4.0
+    with pytest.raises(ValueError):
+        make_clock("sideways")
+
+
+def test_virtual_sleeps_wake_in_deadline_order():
+    clock = VirtualClock(start=0.0)
+    woke = []
+
+    async def sleeper(name, *delays):
+        for delay in delays:
+            await clock.sleep(delay)
+            woke.append((name, clock.time()))
+
+    async def scenario():
+        await asyncio.gather(sleeper("long", 2.0), sleeper("short", 0.5), sleeper("steps", 0.75, 0.75, 0.75))
+
+    asyncio.run(scenario())
+    assert woke == [("short", 0.5), ("steps", 0.75), ("steps", 1.5), ("long", 2.0), ("steps", 2.25)]
+
+
+def test_stage_spans_are_exported():
+    office = make_office()
+    asyncio.run(PipelineScheduler(office).run(STAGES, "Site", "Create a website"))
+    stages = {labels["stage"] for name, _start, _end, labels, _thread in office.metrics.spans if name == "stage"}
+    assert stages == {"brief", "content", "layout", "qa"}
+    prometheus = office.metrics.to_prometheus()
+    assert 'aioffice_span_seconds_count{span="stage",stage="qa",role="Feedback & QA Agent"} 1' in prometheus
+    trace = office.metrics.to_chrome_trace()["traceEvents"]
+    assert sum(1 for event in trace if event["ph"] == "X" and event["cat"] == "stage") == 4
+
+
+def test_generation_budget_follows_answer_lengths():
+    budget = GenerationBudget(min_samples=2)
+    start = budget.profile("Integrator (Coordinator)")
+    for _ in range(5):
+        budget.observe("Integrator (Coordinator)", start, tokens=300, seconds=3.0)
+    short = budget.profile("Integrator (Coordinator)")
+    assert short.num_predict == 512 and short.num_predict < start.num_predict  # 1.5 x 300 = 480, raised to min_predict
+    chatbot = budget.profile("AI Chatbot")
+    for _ in range(5):
+        budget.observe("AI Chatbot", chatbot, tokens=chatbot.num_predict, truncated=True)
+    assert budget.profile("AI Chatbot").num_predict > chatbot.num_predict
+    assert budget.profile("Copywriter", prompt="x" * 30000).num_ctx == 16384
+
+
+def test_idle_agent_is_not_held_up_by_a_busy_role():
+    office = OfficeSimulation(clock=VirtualClock(start=1000.0))
+    office.add_agent(make_agent("dev1", "Web Developer", AgentType.CODER))
+    office.add_agent(make_agent("analyst1", "Data Analyst", AgentType.ANALYST))
+    code_tasks = [office.create_task(f"Code {i}", "write code", "user") for i in range(20)]
+    analysis = office.create_task("Stats", "analiz dane statystyki", "user")
+
+    async def scenario():
+        pool = asyncio.ensure_future(office.process_tasks())
+        while office.tasks[analysis.id].status != TaskStatus.COMPLETED:
+            await asyncio.sleep(0.001)
+        pool.cancel()
+        await asyncio.gather(pool, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert office.tasks[analysis.id].assignee_id == "analyst1"
+    # The analyst started right away, alongside the first coding task
+    assert sum(1 for task in code_tasks if office.tasks[task.id].status == TaskStatus.COMPLETED) <= 1
+
+
+def test_queue_classifies_once_and_checks_each_bucket_once(monkeypatch):
+    office = OfficeSimulation(clock=VirtualClock(start=1000.0))
+    office.add_agent(make_agent("dev1", "Web Developer", AgentType.CODER))
+    office.add_agent(make_agent("analyst1", "Data Analyst", AgentType.ANALYST))
+    classified = []
+    capability = office.task_capability
+    monkeypatch.setattr(office.task_queue, "_bucket_of", lambda task: classified.append(task.id) or capability(task))
+    for i in range(50):
+        office.create_task(f"Code {i}", "write code", "user")
+    analysis = office.create_task("Stats", "analiz dane statystyki", "user", priority=TaskPriority.LOW)
+    assert len(classified) == 51
+    checked = []
+    # The coding agent is busy: its 50 tasks are skipped as one bucket
+    assert office.task_queue.pop_first(lambda bucket: checked.append(bucket) or "analysis" in bucket[0]) == analysis.id
+    assert len(checked) == 2 and len(office.task_queue) == 50
+    assert len(classified) == 51
+
+
+def test_registry_indexes_follow_changed_agents():
+    office = make_office()
+    agents = office.agents
+    copywriter = agents["copy1"]
+    assert agents.by_role("copywriter") == [copywriter]
+    copywriter.role, copywriter.agent_type = "Web Developer", AgentType.CODER
+    office.notify_agent_changed(copywriter)
+    assert agents.by_role("Copywriter") == [] and agents.by_role("web developer") == [copywriter]
+    assert agents.by_type(AgentType.CODER) == [copywriter]
+    assert agents.by_type(AgentType.TEXT_ANALYST) == [agents["client1"]]
+    # Removal uses the keys it was indexed under, even when the agent changed without a reindex
+    copywriter.role = "Data Analyst"
+    del agents["copy1"]
+    assert agents.by_role("web developer") == [] and agents.by_type(AgentType.CODER) == []
+    replacement = make_agent("ux1", "Copywriter")
+    agents["ux1"] = replacement
+    assert agents.by_type(AgentType.IMAGE_GEN) == [] and agents.find_by_role("copywriter") is replacement
+    assert sorted(agent.id for agent in agents.by_type(AgentType.TEXT_ANALYST)) == ["client1", "ux1"]
+
+
+def test_headless_conference_is_scoped_to_collaborators():
+    office = make_office()
+    host = office.agents["qa1"]
+    host.collaborators = ["copy1", "ux1"]
+    task = office.create_task("Site", "Create a website", "user")
+    assert office.gui is None
+    asyncio.run(host._communicate_with_team(task, office))
+    rounds = [labels for name, _start, _end, labels, _thread in office.metrics.spans if name == "conference.round"]
+    assert len(rounds) == 1 and rounds[0]["members"] == 2 and rounds[0]["task"] == task.id
+    messages = []
+    while not office.bus.queue.empty():
+        messages.append(office.bus.queue.get_nowait()[0])
+    # A question to each collaborator and their answers; client1 is not in the room
+    assert {(message.sender_id, message.recipient_id) for message in messages} <= \
+        {("qa1", "copy1"), ("qa1", "ux1"), ("copy1", "qa1"), ("ux1", "qa1")}
+    assert {message.recipient_id for message in messages if message.sender_id == "qa1"} == {"copy1", "ux1"}
+
+
+def test_task_store_commits_in_batches_and_updates_in_place(tmp_path):
+    import sqlite3
+    from task_store import TaskStore
+    path = str(tmp_path / "tasks.db")
+    store = TaskStore(path, commit_interval=60.0)
+    task = Task(title="Site", description="Create a website")
+    store.upsert_task(task)
+    store.upsert_task(Task(title="Blog", description="Write the blog"))
+    (rowid,) = store._query("SELECT rowid FROM tasks WHERE id = ?", (task.id,))[0]
+    task.status = TaskStatus.COMPLETED
+    task.results["copy1"] = "Done"
+    store.upsert_task(task)
+    # Visible to the store's own queries at once, to other connections after the batch is committed
+    assert store.get_task(task.id).status == TaskStatus.COMPLETED
+    other = sqlite3.connect(path)
+    assert other.execute("SELECT COUNT(*) FROM tasks").fetchone() == (0,)
+    store.flush()
+    assert other.execute("SELECT rowid, status FROM tasks WHERE id = ?", (task.id,)).fetchall() == [(rowid, "COMPLETED")]
+    other.close()
+    store.commit_interval = 0.05
+    store.delete_task(task.id)
+    deadline = time.time() + 5
+    while store._pending and time.time() < deadline:
+        time.sleep(0.01)
+    assert store._pending == 0
+    store.close()
+
+
+def test_headless_skips_invalid_briefs(tmp_path, capsys):
+    import headless
+    lines = [
+        "Bakery website with menu and contact form",
+        '{"title": "Shop", "priority": "urgent"}',
+        '["not", "an", "object"]',
+        '{"title": "Blog", "description": "Write the blog", "priority": "high"}',
+        '{"title": ',
+        '{"priority": "LOW"}',
+    ]
+    errors = []
+    briefs = headless.read_briefs(lines, errors)
+    assert [(brief["index"], brief["title"], brief["priority"]) for brief in briefs] == \
+        [(0, "Bakery website with menu and contact", TaskPriority.MEDIUM), (1, "Blog", TaskPriority.HIGH)]
+    assert [error.split(":")[0] for error in errors] == ["line 2", "line 3", "line 5", "line 6"]
+    with pytest.raises(headless.BriefError):
+        headless.read_briefs(lines)
+    path = tmp_path / "briefs.jsonl"
+    path.write_text("\n".join(lines[1:3]) + "\n", encoding="utf-8")
+    assert headless.main([str(path), "--clock", "virtual"]) == 1
+    assert "2 invalid brief(s) skipped" in capsys.readouterr().err
+
+
+def test_lazy_load_is_eager_with_a_task_store(tmp_path):
+    office = make_office()
+    office.create_task("Site", "Create a website", "user")
+    path = str(tmp_path / "state.aio")
+    office.save_all(path)
+    lazy = make_office()
+    lazy.load_all(path, lazy=True)
+    assert not isinstance(lazy.tasks, dict)
+    stored = make_office()
+    stored.enable_task_store()
+    stored.load_all(path, lazy=True)
+    assert isinstance(stored.tasks, dict) and len(stored.tasks) == 1
+
+
+def test_recovery_from_a_torn_log_keeps_new_roster_agents(tmp_path):
+    directory = str(tmp_path / "state")
+    office = make_office()
+    office.enable_persistence(directory)
+    task = office.create_task("Site", "Create a website", "user")
+    office.agents["copy1"].skills.append("SEO")
+    office.notify_agent_changed(office.agents["copy1"])
+    office.persistence.close()
+    with open(os.path.join(directory, "wal.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"op": "task", "data": {"id": "torn"')  # Crash in the middle of a write
+
+    restarted = make_office()
+    restarted.add_agent(make_agent("dev1", "Web Developer", AgentType.CODER))  # Added since the last run
+    restarted.enable_persistence(directory)
+    assert set(restarted.tasks) == {task.id}
+    assert restarted.tasks[task.id].title == "Site"
+    assert restarted.agents["copy1"].skills == ["SEO"]
+    assert "dev1" in restarted.agents and restarted.agents.by_role("Web Developer")
+
+
+def make_saved_office():
+    office = make_office()
+    office.create_task("Site", "Create a website", "user", priority=TaskPriority.HIGH)
+    task = office.create_task("Blog", "Write the blog", "client1")
+    task.dependencies.add("other")
+    task.results["copy1"] = "Short result"
+    office.notify_task_changed(task)
+    return office
+
+
+def test_binary_state_round_trips_json(tmp_path):
+    json_path, binary_path = str(tmp_path / "state.json"), str(tmp_path / "state.aio")
+    make_saved_office().save_all(json_path)
+    binstate.convert_json_to_binary(json_path, binary_path)
+    assert binstate.is_binary_state(binary_path)
+    office = make_office()
+    office.load_all(binary_path)
+    office.save_all(str(tmp_path / "again.json"))
+    with open(json_path, encoding="utf-8") as before, open(str(tmp_path / "again.json"), encoding="utf-8") as after:
+        assert json.load(before) == json.load(after)
+
+
+def test_binary_state_rejects_unknown_version():
+    data = bytearray(binstate.encode_state([], []))
+    binstate.HEADER.pack_into(data, 0, binstate.MAGIC, binstate.VERSION + 1, 0)
+    with pytest.raises(binstate.FormatError):
+        binstate.decode_state(bytes(data))
+
+
+def test_binary_state_blob_reference_record():
+    text = "x" * binstate.BLOB_MIN_CHARS
+    data = binstate.encode_state([], make_saved_office().tasks)
+    assert sum(1 for kind, _start, _end in binstate.iter_records(data) if kind == binstate.KIND_BLOB) == 0
+    task = Task(title="Big", description=text, results={"copy1": text, "qa1": text})
+    data = binstate.encode_state([], [task])
+    blobs = [(start, end) for kind, start, end in binstate.iter_records(data) if kind == binstate.KIND_BLOB]
+    assert len(blobs) == 1  # Description and both results reference the same blob record
+    _agents, (loaded,) = binstate.decode_state(data)
+    assert loaded.description == text and loaded.results == {"copy1": text, "qa1": text}
+
+
+def test_lazy_state_decodes_tasks_from_the_mapping(tmp_path):
+    saved = make_saved_office()
+    path = str(tmp_path / "state.aio")
+    saved.save_all(path)
+    office = make_office()
+    office.load_all(path, lazy=True)
+    assert isinstance(office.tasks, binstate.LazyTaskMap) and office.tasks.decoded_count == 0
+    assert list(office.tasks) == list(saved.tasks)
+    for task_id, expected in saved.tasks.items():
+        task = office.tasks[task_id]
+        assert isinstance(task.results, binstate.LazyResults) and not task.results.loaded
+        assert (task.title, task.priority, task.dependencies) == (expected.title, expected.priority, expected.dependencies)
+        assert dict(task.results) == expected.results
+    assert office.tasks.decoded_count == 2
+
+
+@pytest.mark.parametrize("locked", [False, True])
+def test_resaving_a_lazy_state_over_its_file(tmp_path, monkeypatch, locked):
+    monkeypatch.setattr(binstate, "MAPPED_FILES_LOCKED", locked)
+    saved = make_saved_office()
+    path = str(tmp_path / "state.aio")
+    saved.save_all(path)
+    office = make_office()
+    office.load_all(path, lazy=True)
+    blog = next(task for task in saved.tasks.values() if task.title == "Blog")
+    office.tasks[blog.id].results["qa1"] = "Approved"  # One task decoded and changed, the other copied raw
+    office.save_all(path)
+    assert isinstance(office.tasks.reader.buffer, bytes) == locked
+    blog.results["qa1"] = "Approved"
+    reloaded = make_office()
+    reloaded.load_all(path)
+    assert [task_to_dict(task) for task in reloaded.tasks.values()] == [task_to_dict(task) for task in saved.tasks.values()]
+    # The lazy view still reads its tasks after the save
+    assert [office.tasks[task_id].title for task_id in saved.tasks] == ["Site", "Blog"]
+
+
+def test_binary_state_ignores_unknown_task_fields(monkeypatch):
+    task = Task(title="Site", description="Create a website")
+    task.reviewer = "qa1"  # Field of a newer version
+    monkeypatch.setattr(binstate, "TASK_META_FIELDS", binstate.TASK_META_FIELDS + ["reviewer"])
+    data = binstate.encode_state([], [task])
+    monkeypatch.undo()
+    _agents, (loaded,) = binstate.decode_state(data)
+    assert loaded.id == task.id and not hasattr(loaded, "reviewer")
+
+
+@pytest.mark.parametrize("filename", ["state.json", "state.aio"])
+def test_duplicate_results_are_stored_once(tmp_path, filename):
+    report = "=== REPORT ===\n" + "Duplicate line of a long report.\n" * 40
+    office = make_office()
+    for title in ("First", "Second"):
+        task = office.create_task(title, "Write the report", "user")
+        task.results["copy1"] = report
+        task.results["qa1"] = "".join(report)  # Equal text, separate object
+        office.intern_results(task)
+    first, second = office.tasks.values()
+    assert first.results["copy1"] is second.results["qa1"]
+    path = str(tmp_path / filename)
+    office.save_all(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    if binstate.is_binary_state(path):
+        assert sum(1 for kind, _start, _end in binstate.iter_records(data) if kind == binstate.KIND_BLOB) == 1
+    else:
+        assert list(json.loads(data)["blobs"].values()) == [report]
+    assert data.count(b"Duplicate line of a long report.") == 40
+
+    loaded = make_office()
+    loaded.load_all(path)
+    assert [task.results for task in loaded.tasks.values()] == [task.results for task in office.tasks.values()]
+    assert len({id(result) for task in loaded.tasks.values() for result in task.results.values()}) == 1
+
+
+def test_reconfiguring_the_llm_client_lets_running_requests_finish():
+    pytest.importorskip("requests")
+    from fake_ollama import FakeOllama
+    from llm_client import configure_llm_client
+
+    async def scenario(url):
+        old = configure_llm_client(base_url=url, max_concurrency=1)
+        payload = {"prompt": "hi", "stream": False, "options": {"num_predict": 5}}
+        requests = [asyncio.ensure_future(old.generate(payload)) for _ in range(2)]  # Second one queued
+        await asyncio.sleep(0.05)  # First request is now waiting on the server
+        new = configure_llm_client(base_url=url)
+        return old, new, await asyncio.gather(*requests)
+
+    with FakeOllama(latency=0.2) as server:
+        old, new, responses = asyncio.run(scenario(server.url))
+    assert new is not old
+    assert [response.json()["eval_count"] for response in responses] == [5, 5]
+    deadline = time.monotonic() + 2.0
+    while old._session is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert old._session is None  # Closed in the background once drained
+
+
+def test_response_cache_reads_disk_off_the_event_loop(tmp_path):
+    import threading
+    from llm_cache import ResponseCache
+
+    directory = str(tmp_path / "cache")
+    key = ResponseCache.make_key("qwen3:0.6b", "prompt", {"num_predict": 200})
+    ResponseCache(directory).put(key, "answer")
+    cache = ResponseCache(directory)  # Empty memory tier: the entry is only on disk
+    disk_threads = []
+    read_disk = cache._get_disk
+    cache._get_disk = lambda k: disk_threads.append(threading.get_ident()) or read_disk(k)
+
+    async def scenario():
+        return await cache.aget(key), await cache.aget(key), await cache.aget("missing")
+
+    assert asyncio.run(scenario()) == ("answer", "answer", None)
+    assert len(disk_threads) == 2 and threading.get_ident() not in disk_threads  # Second lookup hit memory
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_rerun_hits_the_cache_after_the_budget_adapts(monkeypatch):
+    pytest.importorskip("requests")
+    import llm_cache
+    import llm_client
+    import llm_profiles
+    from fake_ollama import FakeOllama
+    from headless import run_briefs
+    from main import build_default_office
+
+    brief = {"index": 0, "title": "Bakery", "description": "Bakery website with menu", "priority": TaskPriority.MEDIUM}
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.ResponseCache(directory=None))
+    budget = GenerationBudget(min_samples=1)
+    monkeypatch.setattr(llm_profiles, "_budget", budget)
+    with FakeOllama() as server:
+        monkeypatch.setattr(llm_client, "_client", llm_client.OllamaClient(base_url=server.url))
+        office = build_default_office(VirtualClock(start=1000.0))
+        asyncio.run(run_briefs(office, [brief], 1, io.StringIO()))
+        first = server.stats()["requests"]
+        adapted = budget.profile("Integrator (Coordinator)")
+        asyncio.run(run_briefs(office, [brief], 1, io.StringIO()))
+        assert first > 0 and server.stats()["requests"] == first
+    assert adapted.num_predict != llm_profiles.DEFAULT_PROFILES["Integrator (Coordinator)"].num_predict